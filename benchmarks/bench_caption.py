@@ -0,0 +1,64 @@
+"""
+Caption throughput per batch size: pipeline_blip_ollama.caption_frames driving the mock
+BLIP model (benchmarks/mocks.py), so what is measured is the pipeline's batching and
+image loading around a model with a known cost per generate call and per image.
+
+Usage:
+    python benchmarks/bench_caption.py --frames 64 --batch-sizes 1,2,4,8,16
+    python benchmarks/bench_caption.py --frames-dir data/processed/EJFBM --per-call-ms 200 --per-image-ms 30
+Prints one JSON object.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from mocks import MockBlip, write_synthetic_frames  # noqa: E402
+from pipeline_blip_ollama import caption_frames  # noqa: E402
+
+DEFAULT_BATCH_SIZES = [1, 2, 4, 8, 16]
+
+
+def run(frames: int = 64, batch_sizes: List[int] = DEFAULT_BATCH_SIZES, per_call_ms: float = 50.0,
+        per_image_ms: float = 20.0, frames_dir: Optional[Path] = None) -> Dict[str, Any]:
+    if frames_dir is not None:
+        paths = sorted(frames_dir.glob("*.jpg"))[:frames]
+    else:
+        paths = write_synthetic_frames(Path(tempfile.mkdtemp(prefix="bench-caption-")), frames)
+    rows = []
+    for bs in batch_sizes:
+        blip = MockBlip(per_call_ms / 1000.0, per_image_ms / 1000.0)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            captions = caption_frames(blip, paths, batch_size=bs)
+        elapsed = time.perf_counter() - t0
+        rows.append({"batch_size": bs, "images": len(captions), "model_calls": blip.calls, "wall_s": elapsed,
+                     "images_per_s": len(captions) / elapsed if elapsed else None,
+                     # time outside the mock's sleep: image loading and the pipeline's own overhead
+                     "overhead_s": elapsed - blip.calls * blip.per_call_s - blip.images * blip.per_image_s})
+    base = rows[0]["images_per_s"] if rows else None
+    for r in rows:
+        r["speedup_vs_first"] = r["images_per_s"] / base if base else None
+    return {"benchmark": "caption", "model": "mock", "per_call_ms": per_call_ms, "per_image_ms": per_image_ms,
+            "frames": len(paths), "source": str(frames_dir) if frames_dir else "synthetic", "results": rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--frames", type=int, default=64)
+    p.add_argument("--batch-sizes", type=str, default=",".join(str(b) for b in DEFAULT_BATCH_SIZES))
+    p.add_argument("--per-call-ms", type=float, default=50.0, help="Mock model cost per generate call")
+    p.add_argument("--per-image-ms", type=float, default=20.0, help="Mock model cost per image in a batch")
+    p.add_argument("--frames-dir", type=str, default=None, help="Caption these JPEGs instead of synthetic ones")
+    args = p.parse_args()
+    print(json.dumps(run(args.frames, [int(b) for b in args.batch_sizes.split(",")], args.per_call_ms,
+                         args.per_image_ms, Path(args.frames_dir) if args.frames_dir else None), indent=2))
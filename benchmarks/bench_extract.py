@@ -0,0 +1,58 @@
+"""
+Frame-extraction benchmark: sampled frames/sec, wall and CPU time per decode mode.
+
+Usage:
+    python benchmarks/bench_extract.py data/raw/EJFBM.mp4 --fps 1 --repeat 3
+Prints one JSON object; no frames are written to disk.
+"""
+from pathlib import Path
+from typing import Dict, Any, List
+import contextlib
+import io
+import json
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from extract_frames import iter_frames, open_video  # noqa: E402
+
+DEFAULT_VIDEO = ROOT / "data" / "raw" / "EJFBM.mp4"
+MODES = ["read", "grab", "seek", "auto"]
+
+
+def time_mode(video: Path, sample_fps: float, mode: str, repeat: int) -> Dict[str, Any]:
+    best = None
+    for _ in range(repeat):
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            n = sum(1 for _ in iter_frames(video, sample_fps=sample_fps, mode=mode))
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        if best is None or wall < best["wall_s"]:
+            best = {"frames": n, "wall_s": wall, "cpu_s": cpu}
+    best["frames_per_s"] = best["frames"] / best["wall_s"] if best["wall_s"] else 0.0
+    return best
+
+
+def run(video: Path = DEFAULT_VIDEO, sample_fps: float = 1.0, modes: List[str] = MODES,
+        repeat: int = 3) -> Dict[str, Any]:
+    cap, video_fps, frame_count = open_video(video)
+    cap.release()
+    results = {m: time_mode(video, sample_fps, m, repeat) for m in modes}
+    base = results.get("read", {}).get("wall_s")
+    for r in results.values():
+        r["speedup_vs_read"] = (base / r["wall_s"]) if base and r["wall_s"] else None
+    return {"benchmark": "extract", "video": str(video.name), "video_fps": video_fps,
+            "source_frames": frame_count, "sample_fps": sample_fps, "repeat": repeat, "modes": results}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("video", type=str, nargs="?", default=str(DEFAULT_VIDEO))
+    p.add_argument("--fps", type=float, default=1.0)
+    p.add_argument("--modes", type=str, default=",".join(MODES), help="Comma-separated decode modes")
+    p.add_argument("--repeat", type=int, default=3, help="Keep the best of N runs per mode")
+    args = p.parse_args()
+    print(json.dumps(run(Path(args.video), args.fps, args.modes.split(","), args.repeat), indent=2))
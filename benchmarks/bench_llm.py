@@ -0,0 +1,85 @@
+"""
+LLM dispatch benchmark: window summaries/sec vs llm_backend concurrency.
+
+By default, the target is the Ollama stub with a fixed latency per call
+(benchmarks/mocks.py). At that latency the ideal speedup equals the concurrency, so
+the gap measures client overhead: connection pooling, threads and JSON. Point --url at
+a real Ollama server to measure the model instead.
+
+Usage:
+    python benchmarks/bench_llm.py --windows 32 --concurrency 1,2,4,8 --latency 0.2
+    python benchmarks/bench_llm.py --url http://127.0.0.1:11434 --model qwen3:8b --windows 8
+Prints one JSON object.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from mocks import SCENES, start_stub_llm  # noqa: E402
+from llm_backend import make_backend, map_concurrent  # noqa: E402
+from load_test_api import latency_summary  # noqa: E402
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8]
+
+
+def window_prompt(i: int, frames_per_window: int = 3) -> str:
+    # same shape as pipeline_blip_ollama.build_window_prompt, without importing the model stack
+    lines = ["You are a JSON-only summarizer for short surveillance windows.",
+             "Return EXACTLY one valid JSON object between <JSON_START> and <JSON_END>.",
+             "Now the frame captions follow:"]
+    for j in range(frames_per_window):
+        lines.append(f"- [{i * 10.0 + j * 5.0:.1f}s] a person walking across the {SCENES[(i + j) % len(SCENES)]}")
+    return "\n".join(lines)
+
+
+def run(windows: int = 32, concurrency: List[int] = DEFAULT_CONCURRENCY, latency: float = 0.2,
+        url: Optional[str] = None, model: str = "stub") -> Dict[str, Any]:
+    server = None
+    if url is None:
+        server, url = start_stub_llm(latency)
+    prompts = [window_prompt(i) for i in range(windows)]
+    rows = []
+    try:
+        for c in concurrency:
+            backend = make_backend("http", model, base_url=url, concurrency=c)
+            samples: List[float] = []
+
+            def call(prompt: str) -> str:
+                t = time.perf_counter()
+                out = backend.generate(prompt)
+                samples.append(time.perf_counter() - t)
+                return out
+
+            t0 = time.perf_counter()
+            map_concurrent(call, prompts, max_workers=c)
+            elapsed = time.perf_counter() - t0
+            backend.close()
+            rows.append({"concurrency": c, "wall_s": elapsed, "windows_per_s": windows / elapsed,
+                         "call": latency_summary(samples)})
+    finally:
+        if server is not None:
+            server.shutdown()
+    base = rows[0]["windows_per_s"] if rows else None
+    for r in rows:
+        r["speedup_vs_first"] = r["windows_per_s"] / base if base else None
+    return {"benchmark": "llm_dispatch", "target": "stub" if server is not None else url,
+            "latency_s": latency if server is not None else None, "windows": windows, "results": rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--windows", type=int, default=32)
+    p.add_argument("--concurrency", type=str, default=",".join(str(c) for c in DEFAULT_CONCURRENCY))
+    p.add_argument("--latency", type=float, default=0.2, help="Stub seconds per generate call")
+    p.add_argument("--url", type=str, default=None, help="Real Ollama server (default: in-process stub)")
+    p.add_argument("--model", type=str, default="stub")
+    args = p.parse_args()
+    print(json.dumps(run(args.windows, [int(c) for c in args.concurrency.split(",")], args.latency, args.url,
+                         args.model), indent=2))
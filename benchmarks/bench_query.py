@@ -0,0 +1,117 @@
+"""
+Report query benchmark: page latency vs depth for keyset (cursor) and OFFSET pagination,
+plus full-text search latency.
+
+Fills a fresh database with --rows synthetic segment rows (default 10M, a few GB of disk
+and a few minutes to build; the file is reused with --db on later runs), then times
+fetching one page at increasing depths with ReportStore.list_reports (keyset) and with
+the equivalent LIMIT/OFFSET query.
+
+Usage:
+    python benchmarks/bench_query.py --rows 10000000 --db /tmp/bench_reports.db
+    python benchmarks/bench_query.py --rows 1000000
+Prints one JSON object.
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.app.store import ReportStore, SELECT_REPORT_PAGE  # noqa: E402
+
+DEFAULT_ROWS = 10_000_000
+N_VIDEOS = 1000
+CHUNK = 100_000
+SUBJECTS = ["person", "two people", "a red truck", "a white van", "a dog", "a cyclist", "a forklift", "a delivery man"]
+ACTIONS = ["walking past", "parked at", "standing near", "driving through", "waiting by", "loading boxes at"]
+PLACES = ["the north gate", "the loading dock", "the parking lot", "the front door", "the fence", "the side entrance"]
+SEARCH_QUERIES = ["red truck north gate", "forklift loading dock", "dog fence"]
+
+
+def synthetic_summary(i: int) -> str:
+    return (f"{SUBJECTS[i % len(SUBJECTS)]} {ACTIONS[(i // 7) % len(ACTIONS)]} "
+            f"{PLACES[(i // 41) % len(PLACES)]} (segment {i})")
+
+
+def populate(db_path: str, rows: int) -> None:
+    store = ReportStore(db_path)   # creates/migrates the schema
+    store.close()
+    conn = sqlite3.connect(db_path)
+    have = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    if have >= rows:
+        conn.close()
+        return
+    conn.execute("PRAGMA synchronous=OFF")
+    now = datetime.now(timezone.utc).isoformat()
+    if conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 0:
+        conn.executemany("INSERT INTO videos (name, generated_at, ingested_at) VALUES (?, ?, ?)",
+                         [(f"cam-{v:04d}.mp4", now, now) for v in range(N_VIDEOS)])
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for lo in range(have, rows, CHUNK):
+        batch = []
+        for i in range(lo, min(rows, lo + CHUNK)):
+            ts = (base + timedelta(milliseconds=250 * i)).isoformat()
+            batch.append((ts, synthetic_summary(i), 1 + i % N_VIDEOS,
+                          float(i % 600), float(i % 600 + 20), (i % 100) / 100.0))
+        conn.executemany("INSERT INTO reports (ts, summary, video_id, start_s, end_s, confidence) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def run(rows: int = DEFAULT_ROWS, db: Optional[str] = None, limit: int = 50, repeat: int = 5,
+        depths: Optional[List[int]] = None) -> Dict[str, Any]:
+    db = db or str(Path(tempfile.mkdtemp(prefix="bench-query-")) / "reports.db")
+    t0 = time.perf_counter()
+    populate(db, rows)
+    build_s = time.perf_counter() - t0
+
+    store = ReportStore(db)
+    conn = store.connection()
+    total = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    depths = depths or [d for d in (0, 1_000, 100_000, 1_000_000, total - limit) if 0 <= d <= total - limit]
+    offset_sql = SELECT_REPORT_PAGE.format(where="1").replace("LIMIT ?", "LIMIT ? OFFSET ?")
+    results = []
+    for depth in sorted(set(depths)):
+        # the cursor a client would hold after `depth` rows (not part of the timing)
+        after = None
+        if depth:
+            after = conn.execute("SELECT ts, id FROM reports ORDER BY ts DESC, id DESC LIMIT 1 OFFSET ?",
+                                 (depth - 1,)).fetchone()
+        keyset_ms = timed(lambda: store.list_reports(after=after, limit=limit), repeat)
+        offset_ms = timed(lambda: conn.execute(offset_sql, (limit, depth)).fetchall(), repeat)
+        results.append({"depth": depth, "keyset_ms": keyset_ms, "offset_ms": offset_ms})
+    filtered_ms = timed(lambda: store.list_reports(video="cam-0042.mp4", min_confidence=0.5, limit=limit), repeat)
+    search_ms = {q: timed(lambda: store.search(q, limit=20), repeat) for q in SEARCH_QUERIES}
+    store.close()
+    return {"benchmark": "query", "rows": total, "page_size": limit, "build_s": build_s, "db": db,
+            "pages": results, "filtered_first_page_ms": filtered_ms, "search_ms": search_ms}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    p.add_argument("--db", type=str, default=None, help="Database file to build/reuse (default: temp dir)")
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+    print(json.dumps(run(args.rows, args.db, args.limit, args.repeat), indent=2))
@@ -0,0 +1,171 @@
+"""
+Adaptive vs fixed-rate frame sampling: captions spent and event recall.
+
+Fixed baseline: extract at --fps and caption frames_per_window evenly spaced frames of
+every window (the pipeline default). Adaptive: extract_frames --adaptive (a probe pass,
+then budget_per_minute frames where the motion is) and caption up to frames_per_window
+frames of every window by motion (pipeline --adaptive-frames). Captions are counted
+once per unique frame, as caption_windows does.
+
+Ground-truth events are runs of frames whose motion energy, measured at truth_fps, is
+at or above the threshold (gaps shorter than merge_gap are joined). With synthetic > 0
+a clip of that many minutes with planted moving objects is written to a temp dir and
+the planted intervals are the events. An event counts as recalled when some captioned
+frame lies within its span +- tolerance seconds.
+
+Usage:
+    python benchmarks/bench_sampling.py data/raw/EJFBM.mp4
+    python benchmarks/bench_sampling.py --synthetic 5 --budget-per-minute 6
+Prints one JSON object; no frames are written to disk.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from adaptive_sampling import (motion_energy, probe_gray, DEFAULT_BUDGET_PER_MINUTE,  # noqa: E402
+                               DEFAULT_MOTION_THRESHOLD, DEFAULT_PROBE_FPS)
+from extract_frames import iter_adaptive_frames, iter_frames  # noqa: E402
+from pipeline_blip_ollama import (build_windows, pick_window_frames, DEFAULT_WINDOW, DEFAULT_STRIDE,  # noqa: E402
+                                  DEFAULT_FRAMES_PER_WINDOW)
+
+DEFAULT_VIDEO = ROOT / "data" / "raw" / "EJFBM.mp4"
+Event = Tuple[float, float]
+
+
+def synthetic_video(path: Path, minutes: float, fps: float = 10.0, size: Tuple[int, int] = (320, 180),
+                    seed: int = 0) -> List[Event]:
+    """Write a static noisy scene with a square crossing it every ~40-90 s; return the crossings."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    background = rng.integers(60, 120, (h, w, 3), dtype=np.uint8)
+    events, t = [], float(rng.uniform(10, 30))
+    duration = minutes * 60.0
+    while t < duration - 10:
+        length = float(rng.uniform(3, 8))
+        events.append((t, min(t + length, duration)))
+        t += length + float(rng.uniform(40, 90))
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(int(duration * fps)):
+        ts = i / fps
+        frame = background.copy()
+        for start, end in events:
+            if start <= ts < end:
+                x = int((ts - start) / (end - start) * (w - 40))
+                frame[h // 2 - 20:h // 2 + 20, x:x + 40] = (230, 230, 230)
+        writer.write(frame)
+    writer.release()
+    return events
+
+
+def detect_events(video: Path, truth_fps: float, threshold: float, merge_gap: float) -> List[Event]:
+    """Runs of frames at or above threshold, measured at truth_fps."""
+    ts, grays = [], []
+    for t, frame in iter_frames(video, sample_fps=truth_fps):
+        ts.append(t)
+        grays.append(probe_gray(frame))
+    energy = motion_energy(np.stack(grays)) if grays else np.zeros(0)
+    events: List[List[float]] = []
+    for t, e in zip(ts, energy):
+        if e < threshold:
+            continue
+        if events and t - events[-1][1] <= merge_gap:
+            events[-1][1] = t
+        else:
+            events.append([t, t])
+    return [(a, b) for a, b in events]
+
+
+def recall(events: List[Event], captioned_ts: List[float], tolerance: float) -> Optional[float]:
+    if not events:
+        return None
+    ts = np.sort(np.asarray(captioned_ts, dtype=np.float64))
+    hit = 0
+    for start, end in events:
+        i = np.searchsorted(ts, start - tolerance)
+        hit += bool(i < len(ts) and ts[i] <= end + tolerance)
+    return hit / len(events)
+
+
+def captioned(ts: np.ndarray, motion: Optional[np.ndarray], window: float, stride: float,
+              frames_per_window: int, threshold: float) -> List[float]:
+    """Timestamps of the unique frames caption_windows would caption."""
+    picked = set()
+    for win in build_windows(ts, window_size=window, stride=stride):
+        picked.update(pick_window_frames(win, frames_per_window, motion, threshold))
+    return [float(ts[i]) for i in sorted(picked)]
+
+
+def run(video: Path = DEFAULT_VIDEO, synthetic: float = 0.0, sample_fps: float = 1.0,
+        probe_fps: float = DEFAULT_PROBE_FPS, budget_per_minute: int = DEFAULT_BUDGET_PER_MINUTE,
+        threshold: float = DEFAULT_MOTION_THRESHOLD, window: float = DEFAULT_WINDOW,
+        stride: float = DEFAULT_STRIDE, frames_per_window: int = DEFAULT_FRAMES_PER_WINDOW,
+        truth_fps: float = 5.0, merge_gap: float = 2.0, tolerance: float = 2.0) -> Dict[str, Any]:
+    with contextlib.ExitStack() as stack:
+        if synthetic:
+            tmp = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+            video = tmp / "synthetic.mp4"
+            events = synthetic_video(video, synthetic)
+            source = f"synthetic {synthetic:g} min"
+        else:
+            video = Path(video)
+            source = video.name
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not synthetic:
+                events = detect_events(video, truth_fps, threshold, merge_gap)
+
+            t0 = time.perf_counter()
+            fixed_ts = np.asarray([t for t, _ in iter_frames(video, sample_fps=sample_fps)], dtype=np.float64)
+            fixed_extract_s = time.perf_counter() - t0
+            fixed = captioned(fixed_ts, None, window, stride, frames_per_window, threshold)
+
+            t0 = time.perf_counter()
+            kept = [(t, e) for t, _, e in iter_adaptive_frames(video, probe_fps=probe_fps,
+                                                               budget_per_minute=budget_per_minute,
+                                                               threshold=threshold)]
+            adaptive_extract_s = time.perf_counter() - t0
+            adaptive_ts = np.asarray([t for t, _ in kept], dtype=np.float64)
+            adaptive = captioned(adaptive_ts, np.asarray([e for _, e in kept], dtype=np.float32),
+                                 window, stride, frames_per_window, threshold)
+
+    def side(extracted: int, caps: List[float], extract_s: float) -> Dict[str, Any]:
+        return {"frames_extracted": extracted, "captions": len(caps), "extract_s": extract_s,
+                "recall_events": recall(events, caps, tolerance)}
+
+    return {"benchmark": "sampling", "video": source, "events": len(events), "sample_fps": sample_fps,
+            "probe_fps": probe_fps, "budget_per_minute": budget_per_minute, "threshold": threshold,
+            "frames_per_window": frames_per_window, "tolerance_s": tolerance,
+            "fixed": side(len(fixed_ts), fixed, fixed_extract_s),
+            "adaptive": side(len(adaptive_ts), adaptive, adaptive_extract_s),
+            "captions_saved": len(fixed) - len(adaptive),
+            "captions_saved_ratio": (1 - len(adaptive) / len(fixed)) if fixed else None}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("video", type=str, nargs="?", default=str(DEFAULT_VIDEO))
+    p.add_argument("--synthetic", type=float, default=0.0,
+                   help="Benchmark a generated clip of N minutes with planted events instead")
+    p.add_argument("--fps", type=float, default=1.0, help="Fixed-rate baseline sampling fps")
+    p.add_argument("--probe-fps", type=float, default=DEFAULT_PROBE_FPS)
+    p.add_argument("--budget-per-minute", type=int, default=DEFAULT_BUDGET_PER_MINUTE)
+    p.add_argument("--motion-threshold", type=float, default=DEFAULT_MOTION_THRESHOLD)
+    p.add_argument("--frames-per-window", type=int, default=DEFAULT_FRAMES_PER_WINDOW)
+    p.add_argument("--truth-fps", type=float, default=5.0, help="Sampling rate of the ground-truth motion pass")
+    p.add_argument("--tolerance", type=float, default=2.0, help="Seconds around an event that still count")
+    args = p.parse_args()
+    print(json.dumps(run(Path(args.video), synthetic=args.synthetic, sample_fps=args.fps,
+                         probe_fps=args.probe_fps, budget_per_minute=args.budget_per_minute,
+                         threshold=args.motion_threshold, frames_per_window=args.frames_per_window,
+                         truth_fps=args.truth_fps, tolerance=args.tolerance), indent=2))
@@ -0,0 +1,83 @@
+"""
+Similarity search benchmark: query latency and recall of the IVF vector index vs exact scan.
+
+Builds a VectorIndex of --vectors synthetic clustered unit vectors (default 1M x 384, the
+all-MiniLM-L6-v2 width; ~0.8 GB of float16 on disk) by appending them in batches the way
+the embedding indexer does, then times --queries searches with the default nprobe and an
+exact scan and reports recall@k of the approximate results.
+
+Usage:
+    python benchmarks/bench_similar.py --vectors 1000000
+    python benchmarks/bench_similar.py --vectors 200000 --nprobe 32
+Prints one JSON object.
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional
+import json
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.app.vectors import VectorIndex, DEFAULT_NPROBE, normalize  # noqa: E402
+
+BATCH = 50_000
+
+
+def synthetic(rng: np.random.Generator, centers: np.ndarray, n: int) -> np.ndarray:
+    """Unit vectors scattered around random topic centers (embeddings of similar events cluster)."""
+    return normalize(centers[rng.integers(len(centers), size=n)] + 0.5 * rng.normal(size=(n, centers.shape[1])))
+
+
+def run(vectors: int = 1_000_000, dim: int = 384, queries: int = 50, k: int = 10,
+        nprobe: int = DEFAULT_NPROBE, path: Optional[str] = None) -> Dict[str, Any]:
+    tmp = None
+    if path is None:
+        tmp = tempfile.mkdtemp(prefix="bench-similar-")
+        path = str(Path(tmp) / "vectors")
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(16, vectors // 1000), dim))
+    index = VectorIndex(path, nprobe=nprobe)
+    index.reset("synthetic", dim)
+
+    t0 = time.perf_counter()
+    for lo in range(0, vectors, BATCH):
+        n = min(BATCH, vectors - lo)
+        index.add([(lo + i + 1, 0) for i in range(n)], synthetic(rng, centers, n), last_report_id=lo + n)
+    build_s = time.perf_counter() - t0
+
+    qs = synthetic(rng, centers, queries)
+    ivf_ms, exact_ms, recall = [], [], []
+    for q in qs:
+        t = time.perf_counter()
+        approx = index.search(q, k=k)
+        ivf_ms.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter()
+        exact = index.search(q, k=k, exact=True)
+        exact_ms.append((time.perf_counter() - t) * 1000)
+        truth = {h["report_id"] for h in exact}
+        recall.append(len(truth & {h["report_id"] for h in approx}) / max(1, len(truth)))
+    stats = index.stats()
+    if tmp:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"benchmark": "similar", "vectors": vectors, "dim": dim, "lists": stats["lists"], "nprobe": nprobe,
+            "build_s": build_s, "ivf_p50_ms": float(np.median(ivf_ms)), "ivf_max_ms": float(np.max(ivf_ms)),
+            "exact_p50_ms": float(np.median(exact_ms)), f"recall_at_{k}": float(np.mean(recall))}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--vectors", type=int, default=1_000_000)
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--queries", type=int, default=50)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    p.add_argument("--path", type=str, default=None, help="Index directory to build (default: temp dir)")
+    args = p.parse_args()
+    print(json.dumps(run(args.vectors, args.dim, args.queries, args.k, args.nprobe, args.path), indent=2))
@@ -0,0 +1,84 @@
+"""
+Windowing scaling benchmark: naive per-window rescan vs windowing.iter_window_ranges,
+plus the cost of merging one summary per window (streaming.SegmentMerger, as used by
+merge_summaries) for the same synthetic frame lists.
+
+Usage:
+    python benchmarks/bench_windowing.py --sizes 1000,10000,100000,1000000 --fps 2
+The naive O(windows x frames) scan is skipped above --naive-max frames.
+Prints one JSON object.
+"""
+from pathlib import Path
+from typing import Any, Dict, List
+import json
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from windowing import iter_window_ranges  # noqa: E402
+from streaming import SegmentMerger  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def synthetic_ts(n: int, fps: float) -> List[float]:
+    return [i / fps for i in range(n)]
+
+
+def naive_windows(ts: List[float], window: float, stride: float) -> int:
+    # the original build_windows() scan, counting frames instead of keeping them
+    total = 0
+    start = 0.0
+    while start <= ts[-1]:
+        end = start + window
+        total += len([t for t in ts if start <= t < end])
+        start += stride
+    return total
+
+
+def indexed_windows(ts: List[float], window: float, stride: float) -> int:
+    return sum(hi - lo for _, _, lo, hi in iter_window_ranges(ts, window, stride))
+
+
+def merge_windows(ts: List[float], window: float, stride: float, merge_gap: float = 2.0) -> int:
+    merger = SegmentMerger(merge_gap)
+    segments = 0
+    for start, end, lo, hi in iter_window_ranges(ts, window, stride):
+        segments += len(merger.add({"start": start, "end": end, "summary": f"{hi - lo} frames",
+                                    "evidence": [{"ts": ts[lo], "text": "frame"}] if hi > lo else []}))
+    return segments + len(merger.flush())
+
+
+def run(sizes: List[int] = DEFAULT_SIZES, fps: float = 2.0, window: float = 20.0, stride: float = 10.0,
+        naive_max: int = 20_000) -> Dict[str, Any]:
+    rows = []
+    for n in sizes:
+        ts = synthetic_ts(n, fps)
+        t0 = time.perf_counter()
+        total = indexed_windows(ts, window, stride)
+        row = {"frames": n, "windows": int(ts[-1] // stride) + 1, "indexed_s": time.perf_counter() - t0,
+               "naive_s": None}
+        t0 = time.perf_counter()
+        row["segments"] = merge_windows(ts, window, stride)
+        row["merge_s"] = time.perf_counter() - t0
+        if n <= naive_max:
+            t0 = time.perf_counter()
+            assert naive_windows(ts, window, stride) == total
+            row["naive_s"] = time.perf_counter() - t0
+        rows.append(row)
+    return {"benchmark": "windowing", "fps": fps, "window": window, "stride": stride, "results": rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=str, default=",".join(str(s) for s in DEFAULT_SIZES))
+    p.add_argument("--fps", type=float, default=2.0)
+    p.add_argument("--window", type=float, default=20.0)
+    p.add_argument("--stride", type=float, default=10.0)
+    p.add_argument("--naive-max", type=int, default=20_000)
+    args = p.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.fps, args.window, args.stride, args.naive_max), indent=2))
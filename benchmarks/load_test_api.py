@@ -0,0 +1,129 @@
+"""
+Load test for the reports API: sustained inserts/sec and latency percentiles.
+
+Each worker thread alternates POST /reports and (every --read-every requests)
+GET /latest-report for --duration seconds.
+
+Usage:
+    # against a running service (uvicorn src.app.main:app --port 8080)
+    python benchmarks/load_test_api.py --url http://127.0.0.1:8080 --workers 32 --duration 10
+    # in-process (FastAPI TestClient on a temporary database)
+    python benchmarks/load_test_api.py --workers 16 --duration 5
+Prints one JSON object.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, Any]:
+    return {"count": len(samples),
+            "p50_ms": (percentile(samples, 50) or 0.0) * 1000,
+            "p95_ms": (percentile(samples, 95) or 0.0) * 1000,
+            "p99_ms": (percentile(samples, 99) or 0.0) * 1000,
+            "max_ms": (max(samples) if samples else 0.0) * 1000}
+
+
+def http_requester(url: str) -> Callable[[], Callable[[str, str, Optional[dict]], int]]:
+    """Factory of per-thread keep-alive request functions against a live server."""
+    parts = urlsplit(url)
+
+    def make():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+
+        def request(method: str, path: str, body: Optional[dict] = None) -> int:
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            return resp.status
+        return request
+    return make
+
+
+def inprocess_requester() -> Callable[[], Callable[[str, str, Optional[dict]], int]]:
+    db_path = str(Path(tempfile.mkdtemp(prefix="loadtest-")) / "reports.db")
+    os.environ.setdefault("REPORTS_DB", db_path)   # before main creates its module-level store
+    from fastapi.testclient import TestClient
+    import src.app.main as main
+    from src.app.store import ReportStore
+
+    main.store = ReportStore(db_path)
+
+    def make():
+        client = TestClient(main.app)
+
+        def request(method: str, path: str, body: Optional[dict] = None) -> int:
+            return client.request(method, path, json=body).status_code
+        return request
+    return make
+
+
+def run(url: Optional[str] = None, workers: int = 16, duration: float = 5.0, read_every: int = 5) -> Dict[str, Any]:
+    make = http_requester(url) if url else inprocess_requester()
+    writes: List[float] = []
+    reads: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(n: int) -> None:
+        request = make()
+        my_writes, my_reads, my_errors, i = [], [], 0, 0
+        while time.perf_counter() < deadline:
+            i += 1
+            if read_every and i % read_every == 0:
+                t0 = time.perf_counter()
+                status = request("GET", "/latest-report")
+                my_reads.append(time.perf_counter() - t0)
+            else:
+                t0 = time.perf_counter()
+                status = request("POST", "/reports", {"summary": f"load test worker {n} request {i}"})
+                my_writes.append(time.perf_counter() - t0)
+            if status != 200:
+                my_errors += 1
+        with lock:
+            writes.extend(my_writes)
+            reads.extend(my_reads)
+            errors[0] += my_errors
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return {"benchmark": "api_load", "target": url or "in-process", "workers": workers, "duration_s": elapsed,
+            "inserts_per_s": len(writes) / elapsed if elapsed else 0.0, "errors": errors[0],
+            "post_reports": latency_summary(writes), "get_latest_report": latency_summary(reads)}
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--url", type=str, default=os.environ.get("LOADTEST_URL"),
+                   help="Base URL of a running service (default: in-process TestClient)")
+    p.add_argument("--workers", type=int, default=16)
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--read-every", type=int, default=5, help="Every Nth request is GET /latest-report (0: never)")
+    args = p.parse_args()
+    print(json.dumps(run(args.url, args.workers, args.duration, args.read_every), indent=2))
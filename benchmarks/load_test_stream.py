@@ -0,0 +1,150 @@
+"""
+Load test for GET /reports/stream: many concurrent SSE subscribers, reports POSTed at a
+steady rate, end-to-end delivery latency (POST sent -> event parsed by each subscriber).
+
+Subscribers are plain asyncio sockets in this process, so 1k of them are cheap. Unless
+--url is given, the service is started with uvicorn in a subprocess on a temporary
+database, so the server and the clients do not share a GIL.
+
+Usage:
+    python benchmarks/load_test_stream.py --subscribers 1000 --reports 200 --rate 50
+    python benchmarks/load_test_stream.py --url http://127.0.0.1:8080 --subscribers 500
+Prints one JSON object.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+import asyncio
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from load_test_api import latency_summary  # noqa: E402
+
+
+def start_server() -> (subprocess.Popen, str):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    env = dict(os.environ, REPORTS_DB=str(Path(tempfile.mkdtemp(prefix="loadtest-stream-")) / "reports.db"),
+               REPORTS_EMBEDDER="hashing")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.app.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=str(ROOT), env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+async def subscriber(host: str, port: int, expect: int, latencies: List[float], ready: asyncio.Event,
+                     connected: List[int], deadline: float) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /reports/stream HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):   # response headers
+        pass
+    connected[0] += 1
+    if connected[0] == connected[1]:
+        ready.set()
+    got = 0
+    try:
+        while got < expect:
+            line = await asyncio.wait_for(reader.readline(), max(0.1, deadline - time.time()))
+            if not line:
+                break
+            # chunked transfer: data lines arrive intact between chunk-size lines
+            if line.startswith(b"data: "):
+                event = json.loads(line[6:])
+                latencies.append(time.time() - float(event["summary"].rsplit(" ", 1)[1]))
+                got += 1
+    except asyncio.TimeoutError:
+        pass
+    writer.close()
+    return got
+
+
+def post_reports(url: str, n: int, rate: float) -> List[float]:
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    post_latency = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        delay = t0 + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        body = json.dumps({"summary": f"stream load test {i} {time.time()}"})
+        t = time.perf_counter()
+        conn.request("POST", "/reports", body=body, headers={"Content-Type": "application/json"})
+        conn.getresponse().read()
+        post_latency.append(time.perf_counter() - t)
+    return post_latency
+
+
+async def run_async(url: str, subscribers: int, reports: int, rate: float, timeout: float) -> Dict[str, Any]:
+    parts = urlsplit(url)
+    latencies: List[float] = []
+    ready = asyncio.Event()
+    connected = [0, subscribers]
+    deadline = time.time() + timeout
+    t0 = time.perf_counter()
+    tasks = [asyncio.create_task(subscriber(parts.hostname, parts.port or 80, reports, latencies, ready,
+                                            connected, deadline))
+             for _ in range(subscribers)]
+    await asyncio.wait_for(ready.wait(), timeout)
+    connect_s = time.perf_counter() - t0
+    post_latency: List[float] = []
+    poster = threading.Thread(target=lambda: post_latency.extend(post_reports(url, reports, rate)))
+    t1 = time.perf_counter()
+    poster.start()
+    received = await asyncio.gather(*tasks)
+    poster.join()
+    elapsed = time.perf_counter() - t1
+    return {"benchmark": "report_stream", "target": url, "subscribers": subscribers, "reports": reports,
+            "rate_per_s": rate, "connect_all_s": round(connect_s, 3), "elapsed_s": round(elapsed, 3),
+            "events_expected": subscribers * reports, "events_received": sum(received),
+            "events_per_s": sum(received) / elapsed if elapsed else 0.0,
+            "delivery": latency_summary(latencies), "post_reports": latency_summary(post_latency)}
+
+
+def run(url: Optional[str] = None, subscribers: int = 1000, reports: int = 200, rate: float = 50.0,
+        timeout: float = 120.0) -> Dict[str, Any]:
+    proc = None
+    if url is None:
+        proc, url = start_server()
+    try:
+        return asyncio.run(run_async(url, subscribers, reports, rate, timeout))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--url", type=str, default=os.environ.get("LOADTEST_URL"),
+                   help="Base URL of a running service (default: start one with uvicorn)")
+    p.add_argument("--subscribers", type=int, default=1000)
+    p.add_argument("--reports", type=int, default=200)
+    p.add_argument("--rate", type=float, default=50.0, help="Reports POSTed per second")
+    p.add_argument("--timeout", type=float, default=120.0)
+    args = p.parse_args()
+    print(json.dumps(run(args.url, args.subscribers, args.reports, args.rate, args.timeout), indent=2))
@@ -0,0 +1,80 @@
+"""
+Stand-ins for the models, so the pipeline stages can be timed without torch weights or an
+Ollama install.
+
+MockBlip has BlipWrapper's interface (caption, caption_batch, caption_images). Each
+generate call sleeps for `per_call_s + per_image_s * batch`, which models the fixed
+cost that batching amortizes. Captions are derived from the pixels, so the same frame
+always gets the same caption.
+
+start_stub_llm is scripts/ollama_stub_server.py run in a daemon thread, with a fixed
+latency per generate call.
+"""
+from pathlib import Path
+from typing import List, Tuple
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from ollama_stub_server import start_stub_server  # noqa: E402
+
+SHADES = ["a dark", "a dim", "a grey", "a bright", "a washed-out"]
+SCENES = ["parking lot", "loading dock", "gate", "corridor", "street"]
+
+
+class MockBlip:
+    def __init__(self, per_call_s: float = 0.05, per_image_s: float = 0.02):
+        self.per_call_s = per_call_s
+        self.per_image_s = per_image_s
+        self.calls = 0
+        self.images = 0
+
+    def caption(self, image_path: Path) -> str:
+        return self.caption_batch([image_path])[0]
+
+    def caption_batch(self, image_paths: List[Path]) -> List[str]:
+        images = []
+        for p in image_paths:
+            with Image.open(p) as img:
+                images.append(img.convert("RGB"))
+        return self.caption_images(images)
+
+    def caption_images(self, images: List[Image.Image]) -> List[str]:
+        self.calls += 1
+        self.images += len(images)
+        time.sleep(self.per_call_s + self.per_image_s * len(images))
+        captions = []
+        for img in images:
+            px = np.asarray(img.resize((8, 8)), dtype=np.float32)
+            shade = SHADES[min(len(SHADES) - 1, int(px.mean() / 256 * len(SHADES)))]
+            scene = SCENES[int(px[..., 0].sum() + 2 * px[..., 2].sum()) % len(SCENES)]
+            captions.append(f"{shade} view of a {scene}")
+        return captions
+
+
+def write_synthetic_frames(out_dir: Path, n: int, size: Tuple[int, int] = (320, 240)) -> List[Path]:
+    """n small, distinct JPEGs (a moving gradient) for caption benchmarks without a video."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    w, h = size
+    x = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    paths = []
+    for i in range(n):
+        r = (x + 7 * i) % 256
+        g = (y + 13 * i) % 256
+        b = np.full((h, w), (37 * i) % 256, dtype=np.float32)
+        rgb = np.stack(np.broadcast_arrays(r, g, b), axis=-1).astype(np.uint8)
+        path = out_dir / f"frame_{i:06d}.jpg"
+        Image.fromarray(rgb).save(path, quality=85)
+        paths.append(path)
+    return paths
+
+
+def start_stub_llm(latency: float = 0.2):
+    """(server, base_url) of an Ollama stub answering every generate call after `latency` seconds."""
+    return start_stub_server(latency=latency)
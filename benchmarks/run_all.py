@@ -0,0 +1,170 @@
+"""
+Run the benchmark suite and write one JSON document, to diff performance between commits.
+
+Each benchmark's run() is called with the parameters of a profile: "quick" finishes in
+about a minute, "full" uses the sizes the individual scripts default to. A benchmark
+that fails (e.g. a missing optional dependency) is recorded as {"error": ...} and the
+others still run. The models are mocks (benchmarks/mocks.py): the suite measures this
+code, not BLIP or the LLM.
+
+With --compare, numeric results are matched against an earlier run by JSON path.
+Changes worse than --threshold are listed under "regressions", and the exit status is 1.
+Throughput ("*_per_s", speedups, recall) should go up; times ("*_s", "*_ms") should go
+down.
+
+Usage:
+    python benchmarks/run_all.py --out bench-$(git rev-parse --short HEAD).json
+    python benchmarks/run_all.py --only caption,llm_dispatch --compare bench-main.json
+    python benchmarks/run_all.py --profile full --out bench-full.json
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import contextlib
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+DEFAULT_VIDEO = ROOT / "data" / "raw" / "EJFBM.mp4"
+
+# name -> (module, {profile: run() kwargs})
+SUITE: Dict[str, Tuple[str, Dict[str, Dict[str, Any]]]] = {
+    "extract": ("bench_extract", {"quick": {"video": DEFAULT_VIDEO, "repeat": 1},
+                                  "full": {"video": DEFAULT_VIDEO, "repeat": 3}}),
+    "windowing": ("bench_windowing", {"quick": {"sizes": [1_000, 10_000, 100_000]}, "full": {}}),
+    "caption": ("bench_caption", {"quick": {"frames": 32, "batch_sizes": [1, 4, 16]}, "full": {"frames": 256}}),
+    "llm_dispatch": ("bench_llm", {"quick": {"windows": 16, "latency": 0.1}, "full": {"windows": 64}}),
+    "api_load": ("load_test_api", {"quick": {"workers": 8, "duration": 3.0}, "full": {"duration": 10.0}}),
+    "query": ("bench_query", {"quick": {"rows": 100_000, "repeat": 3}, "full": {"rows": 1_000_000}}),
+    "similar": ("bench_similar", {"quick": {"vectors": 50_000, "queries": 20}, "full": {}}),
+    "stream": ("load_test_stream", {"quick": {"subscribers": 100, "reports": 40, "rate": 20.0},
+                                    "full": {}}),
+    "sampling": ("bench_sampling", {"quick": {"synthetic": 3.0}, "full": {"synthetic": 10.0}}),
+}
+IGNORED_KEYS = {"duration_s", "elapsed_s", "latency_s", "connect_all_s"}
+
+
+def git_info() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=str(ROOT), capture_output=True, text=True,
+                              timeout=30).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "-uno"))}
+    except (OSError, subprocess.SubprocessError):
+        return {"commit": None, "dirty": None}
+
+
+def environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+def run_one(name: str, profile: str) -> Dict[str, Any]:
+    module, profiles = SUITE[name]
+    t0 = time.perf_counter()
+    try:
+        # benchmarks and the code they call print progress: keep stdout for the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            result = importlib.import_module(module).run(**profiles.get(profile, {}))
+    except BaseException as e:   # SystemExit/ImportError from a missing dependency included
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        traceback.print_exc(file=sys.stderr)
+        result = {"benchmark": name, "error": f"{type(e).__name__}: {e}"}
+    result["suite_wall_s"] = time.perf_counter() - t0
+    return result
+
+
+def numeric_leaves(value: Any, path: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from numeric_leaves(v, f"{path}.{k}" if path else str(k))
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from numeric_leaves(v, f"{path}[{i}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield path, float(value)
+
+
+def direction(path: str) -> int:
+    """+1 if bigger is better, -1 if smaller is better, 0 if the value is not a performance figure."""
+    key = path.rsplit(".", 1)[-1]
+    if key in IGNORED_KEYS or key == "suite_wall_s":
+        return 0
+    if key.endswith("_per_s") or key.startswith(("speedup", "recall")):
+        return 1
+    if key.endswith(("_s", "_ms")):
+        return -1
+    return 0
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_time_s: float = 0.005) -> List[Dict[str, Any]]:
+    """
+    Performance figures that got worse than `threshold` (relative) since `baseline`.
+    Times below min_time_s on both sides are timer noise and are skipped.
+    """
+    if current.get("profile") != baseline.get("profile"):
+        print(f"[bench] comparing profile {current.get('profile')} with {baseline.get('profile')}: "
+              f"sizes differ, most paths will not match", file=sys.stderr)
+    old = dict(numeric_leaves(baseline.get("results", {})))
+    regressions = []
+    for path, new in numeric_leaves(current.get("results", {})):
+        sign = direction(path)
+        prev = old.get(path)
+        if not sign or not prev or path.endswith("]") or new == prev:
+            continue
+        if sign < 0:
+            scale = 1000.0 if path.endswith("_ms") else 1.0
+            if max(new, prev) / scale < min_time_s:
+                continue
+        change = (new - prev) / abs(prev)
+        if change * sign < -threshold:
+            regressions.append({"path": path, "baseline": prev, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def run_suite(names: Optional[List[str]] = None, profile: str = "quick",
+              progress: Callable[[str], None] = lambda msg: print(msg, file=sys.stderr)) -> Dict[str, Any]:
+    names = names or list(SUITE)
+    unknown = [n for n in names if n not in SUITE]
+    if unknown:
+        raise ValueError(f"unknown benchmarks: {', '.join(unknown)} (available: {', '.join(SUITE)})")
+    doc = {"suite": "surveil-bench", "profile": profile,
+           "started_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+           **git_info(), "environment": environment(), "results": {}}
+    for name in names:
+        progress(f"[bench] {name} ...")
+        doc["results"][name] = run_one(name, profile)
+        progress(f"[bench] {name} done in {doc['results'][name]['suite_wall_s']:.1f}s")
+    return doc
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--profile", choices=["quick", "full"], default="quick")
+    p.add_argument("--only", type=str, default=None, help=f"Comma-separated subset of: {','.join(SUITE)}")
+    p.add_argument("--out", type=str, default=None, help="Also write the JSON document to this file")
+    p.add_argument("--compare", type=str, default=None, help="Earlier run_all JSON to check for regressions")
+    p.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    p.add_argument("--min-time", type=float, default=0.005, help="Ignore times shorter than this (seconds)")
+    args = p.parse_args()
+    doc = run_suite(args.only.split(",") if args.only else None, args.profile)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        doc["baseline"] = {"file": args.compare, "commit": baseline.get("commit")}
+        doc["regressions"] = compare(doc, baseline, args.threshold, args.min_time)
+    text = json.dumps(doc, indent=2, default=str)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    if doc.get("regressions"):
+        sys.exit(1)
@@ -0,0 +1,298 @@
+"""
+scripts/batch_ingest.py
+
+Batch driver: process every video under data/raw/ with the three pipeline stages
+overlapping across videos.
+
+ - extract   : extract_frames() in a process pool (decode is CPU-bound, one core per video).
+               Its workers are spawned, not forked: by the time the pool starts them a
+               caption thread may already be loading BLIP, and forking a process with
+               live torch/OpenMP threads can deadlock the child.
+ - caption   : caption_windows() on a thread pool sharing one BLIP model
+ - summarize : summarize_windows() + merge/refine/save on a thread pool sharing one LLM backend
+
+A video moves to the next stage as soon as its previous stage finishes, so one clip can be
+decoding while another is being captioned and a third is waiting on the LLM. A finished
+video gets a summarized.json marker in its processed dir, whether its report was saved
+or pushed to --push-url; videos with a marker (or a report under data/reports/) are
+skipped, and videos that already have a frame index skip extraction.
+Ends with an aggregate throughput report (videos/hour, frames/sec per stage).
+
+Usage:
+    python scripts/batch_ingest.py --raw-dir data/raw --fps 1 --extract-workers 4 --caption-workers 1 --llm-workers 2
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from extract_frames import extract_frames, safe_name, DECODE_MODES
+from frame_index import FrameIndex, has_index
+
+DEFAULT_RAW_DIR = Path("data") / "raw"
+DEFAULT_PROCESSED_DIR = Path("data") / "processed"
+DEFAULT_REPORTS_DIR = Path("data") / "reports"
+VIDEO_PATTERNS = ("*.mp4",)
+DONE_MARKER = "summarized.json"
+
+
+def find_videos(raw_dir: Path) -> List[Path]:
+    videos = []
+    for pattern in VIDEO_PATTERNS:
+        videos.extend(raw_dir.glob(pattern))
+    return sorted(videos)
+
+
+def is_summarized(video: Path, processed_root: Path) -> bool:
+    """True once a batch run has finished `video`, or a report for it is on disk."""
+    return ((processed_root / safe_name(video) / DONE_MARKER).exists()
+            or (DEFAULT_REPORTS_DIR / f"{video.name}_summaries.json").exists())
+
+
+def mark_summarized(video: Path, processed_root: Path, report: str) -> None:
+    """report: where the report went (the saved file, or the API it was pushed to)."""
+    out_dir = processed_root / safe_name(video)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    marker = {"video": video.name, "report": report, "finished_at": time.time()}
+    (out_dir / DONE_MARKER).write_text(json.dumps(marker), encoding="utf-8")
+
+
+def extract_job(video: str, out_dir: str, sample_fps: float, decode_mode: str, pack: bool = False,
+                adaptive: bool = False) -> Dict[str, Any]:
+    """Runs in a worker process; returns frame count and busy seconds."""
+    t0 = time.perf_counter()
+    extract_frames(Path(video), Path(out_dir), sample_fps=sample_fps, mode=decode_mode, pack=pack, adaptive=adaptive)
+    return {"frames": len(FrameIndex.load(Path(out_dir))), "seconds": time.perf_counter() - t0}
+
+
+class SharedBlip:
+    """Load BLIP once, on first use, for all caption workers (load: see pipeline_blip_ollama.blip_loader)."""
+
+    def __init__(self, load: Optional[Callable[[], Any]] = None):
+        self._lock = threading.Lock()
+        self._load = load
+        self._blip = None
+
+    def __call__(self):
+        with self._lock:
+            if self._blip is None:
+                if self._load is None:
+                    from pipeline_blip_ollama import BlipWrapper
+                    self._load = BlipWrapper
+                self._blip = self._load()
+            return self._blip
+
+
+class StageStats:
+    def __init__(self, name: str, unit: str = "frames"):
+        self.name = name
+        self.unit = unit
+        self.videos = 0
+        self.items = 0
+        self.seconds = 0.0
+        self.failures = 0
+
+    def add(self, items: int, seconds: float) -> None:
+        self.videos += 1
+        self.items += items
+        self.seconds += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"videos": self.videos, self.unit: self.items, "busy_s": round(self.seconds, 3),
+                f"{self.unit}_per_s": (self.items / self.seconds) if self.seconds else 0.0,
+                "failures": self.failures}
+
+
+def run_batch(raw_dir: Path = DEFAULT_RAW_DIR,
+              processed_root: Path = DEFAULT_PROCESSED_DIR,
+              sample_fps: float = 1.0,
+              decode_mode: str = "auto",
+              pack: bool = False,
+              adaptive: bool = False,
+              extract_workers: int = max(1, (os.cpu_count() or 2) // 2),
+              caption_workers: int = 1,
+              llm_workers: int = 2,
+              force: bool = False,
+              pipeline_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # imported here: spawned extraction workers import this module and need none of it
+    import pipeline_blip_ollama as pipeline
+    from llm_backend import make_backend
+
+    kw = dict(pipeline_kwargs or {})
+    llm_concurrency = kw.get("llm_concurrency", pipeline.DEFAULT_CONCURRENCY)
+    ollama_model = kw.get("ollama_model", pipeline.OLLAMA_MODEL)
+
+    videos = find_videos(raw_dir)
+    todo = [v for v in videos if force or not is_summarized(v, processed_root)]
+    print(f"[Batch] {len(videos)} videos in {raw_dir}, {len(videos) - len(todo)} already summarized, {len(todo)} to do")
+
+    stats = {"extract": StageStats("extract"), "caption": StageStats("caption"),
+             "summarize": StageStats("summarize", unit="windows")}
+    failed: Dict[str, str] = {}
+    load_blip, blip_quantized, blip_model = pipeline.blip_loader(kw.get("caption_worker"), kw.get("quantize", False))
+    get_blip = SharedBlip(load_blip)
+    backend = make_backend(kw.get("llm_backend", "auto"), ollama_model,
+                           base_url=kw.get("ollama_url", pipeline.DEFAULT_OLLAMA_URL),
+                           timeout=kw.get("llm_timeout", pipeline.DEFAULT_TIMEOUT),
+                           retries=kw.get("llm_retries", pipeline.DEFAULT_RETRIES),
+                           concurrency=llm_workers * llm_concurrency)
+    # one cache for the batch: identical prompts of different videos are coalesced too
+    llm_cache_path = kw.get("llm_cache_path", pipeline.DEFAULT_LLM_CACHE_PATH)
+    llm_cache = (pipeline.LLMCache(llm_cache_path, ttl=kw.get("llm_cache_ttl", pipeline.DEFAULT_TTL))
+                 if llm_cache_path is not None else None)
+
+    def caption_job(processed_dir: Path) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        started = pipeline.metrics.snapshot()   # timings in the report cover caption + summarize
+        stage = pipeline.caption_windows(
+            processed_dir,
+            window_size=kw.get("window_size", pipeline.DEFAULT_WINDOW),
+            stride=kw.get("stride", pipeline.DEFAULT_STRIDE),
+            frames_per_window=kw.get("frames_per_window", pipeline.DEFAULT_FRAMES_PER_WINDOW),
+            get_blip=get_blip,
+            caption_batch_size=kw.get("caption_batch_size", pipeline.DEFAULT_CAPTION_BATCH_SIZE),
+            caption_cache_path=kw.get("caption_cache_path", pipeline.DEFAULT_CACHE_PATH),
+            caption_cache_max_entries=kw.get("caption_cache_max_entries", pipeline.DEFAULT_MAX_ENTRIES),
+            blip_quantized=blip_quantized, blip_model=blip_model, adaptive=adaptive)
+        stage["seconds"] = time.perf_counter() - t0
+        stage["metrics_since"] = started
+        return stage
+
+    def summarize_job(stage: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        cache_since = llm_cache.stats() if llm_cache is not None else None
+        results = pipeline.summarize_windows(stage["windows"], stage["captioned"], ollama_model, backend,
+                                             llm_concurrency=llm_concurrency, llm_cache=llm_cache)
+        saved = pipeline.finalize_report(stage["video"], results,
+                                         merge_gap=kw.get("merge_gap", pipeline.DEFAULT_MERGE_GAP),
+                                         ollama_model=ollama_model, backend=backend, llm_concurrency=llm_concurrency,
+                                         push_url=kw.get("push_url"), metrics_since=stage["metrics_since"],
+                                         segment_span=kw.get("segment_span", pipeline.DEFAULT_SEGMENT_SPAN),
+                                         hierarchy_fanout=kw.get("hierarchy_fanout", pipeline.DEFAULT_FANOUT),
+                                         llm_cache=llm_cache, llm_cache_since=cache_since)
+        return {"windows": len(results), "seconds": time.perf_counter() - t0,
+                "report": str(saved) if saved is not None else kw.get("push_url")}
+
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=extract_workers, mp_context=multiprocessing.get_context("spawn")) \
+            as extract_pool, \
+            ThreadPoolExecutor(max_workers=caption_workers, thread_name_prefix="caption") as caption_pool, \
+            ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="summarize") as llm_pool:
+        pending = {}
+        for video in todo:
+            out_dir = processed_root / safe_name(video)
+            if not force and has_index(out_dir):
+                pending[caption_pool.submit(caption_job, out_dir)] = (video, "caption")
+            else:
+                fut = extract_pool.submit(extract_job, str(video), str(out_dir), sample_fps, decode_mode, pack, adaptive)
+                pending[fut] = (video, "extract")
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                video, stage_name = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    print(f"[Batch] {video.name}: {stage_name} failed: {e}")
+                    stats[stage_name].failures += 1
+                    failed[video.name] = f"{stage_name}: {e}"
+                    continue
+                if stage_name == "extract":
+                    stats["extract"].add(result["frames"], result["seconds"])
+                    out_dir = processed_root / safe_name(video)
+                    pending[caption_pool.submit(caption_job, out_dir)] = (video, "caption")
+                elif stage_name == "caption":
+                    stats["caption"].add(result["frames_captioned"], result["seconds"])
+                    pending[llm_pool.submit(summarize_job, result)] = (video, "summarize")
+                else:
+                    stats["summarize"].add(result["windows"], result["seconds"])
+                    mark_summarized(video, processed_root, result["report"])
+                    print(f"[Batch] {video.name}: done")
+    backend.close()
+    llm_cache_stats = llm_cache.stats() if llm_cache is not None else None
+    if llm_cache is not None:
+        llm_cache.close()
+
+    wall = time.perf_counter() - t_start
+    completed = stats["summarize"].videos
+    report = {
+        "videos_found": len(videos),
+        "videos_skipped": len(videos) - len(todo),
+        "videos_completed": completed,
+        "videos_failed": failed,
+        "wall_s": round(wall, 3),
+        "videos_per_hour": (completed * 3600.0 / wall) if wall else 0.0,
+        "workers": {"extract": extract_workers, "caption": caption_workers, "summarize": llm_workers},
+        "stages": {name: s.as_dict() for name, s in stats.items()},
+        "llm_cache": llm_cache_stats,
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    from pipeline_blip_ollama import (DEFAULT_WINDOW, DEFAULT_STRIDE, DEFAULT_FRAMES_PER_WINDOW, DEFAULT_MERGE_GAP,
+                                      DEFAULT_SEGMENT_SPAN, DEFAULT_FANOUT)
+
+    parser = argparse.ArgumentParser(description="Extract, caption and summarize every video under a directory.")
+    parser.add_argument("--raw-dir", type=str, default=str(DEFAULT_RAW_DIR))
+    parser.add_argument("--processed-dir", type=str, default=str(DEFAULT_PROCESSED_DIR))
+    parser.add_argument("--fps", type=float, default=1.0)
+    parser.add_argument("--decode-mode", choices=DECODE_MODES, default="auto")
+    parser.add_argument("--pack", action="store_true", help="Extract into one frames.pack per video (see frame_store.py)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Sample and pick window frames by motion instead of --fps (see adaptive_sampling.py)")
+    parser.add_argument("--extract-workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--caption-workers", type=int, default=1, help="Threads sharing one BLIP model")
+    parser.add_argument("--llm-workers", type=int, default=2, help="Videos summarized at the same time")
+    parser.add_argument("--force", action="store_true", help="Re-process videos that already have outputs")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW)
+    parser.add_argument("--stride", type=float, default=DEFAULT_STRIDE)
+    parser.add_argument("--frames-per-window", type=int, default=DEFAULT_FRAMES_PER_WINDOW)
+    parser.add_argument("--merge-gap", type=float, default=DEFAULT_MERGE_GAP)
+    parser.add_argument("--segment-span", type=float, default=DEFAULT_SEGMENT_SPAN,
+                        help="Cut merged segments after N seconds (0: never)")
+    parser.add_argument("--hierarchy-fanout", type=int, default=DEFAULT_FANOUT,
+                        help="Segments per digest call (0: no digests)")
+    parser.add_argument("--ollama-model", type=str, default=None)
+    parser.add_argument("--llm-backend", choices=["auto", "http", "cli"], default="auto")
+    parser.add_argument("--ollama-url", type=str, default=None)
+    parser.add_argument("--llm-concurrency", type=int, default=None, help="LLM calls in flight per video")
+    parser.add_argument("--caption-batch-size", type=int, default=None)
+    parser.add_argument("--push-url", type=str, default=None, help="POST reports to this API instead of data/reports/")
+    parser.add_argument("--llm-cache", type=str, default=None, help="SQLite LLM response cache (default: data/cache/llm.sqlite)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Send every prompt to the LLM")
+    parser.add_argument("--report-out", type=str, default=None, help="Also write the throughput report here")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus /metrics on this port")
+    parser.add_argument("--caption-worker", type=str, default=None,
+                        help="Caption with a running scripts/caption_worker.py at this address")
+    parser.add_argument("--quantize", action="store_true", help="Load BLIP with dynamic int8 quantization")
+    args = parser.parse_args()
+    if args.metrics_port:
+        from pipeline_metrics import serve_metrics
+        serve_metrics(args.metrics_port)
+
+    kwargs = {"window_size": args.window, "stride": args.stride, "frames_per_window": args.frames_per_window,
+              "merge_gap": args.merge_gap, "llm_backend": args.llm_backend, "quantize": args.quantize,
+              "segment_span": args.segment_span or None, "hierarchy_fanout": args.hierarchy_fanout}
+    if args.no_llm_cache:
+        kwargs["llm_cache_path"] = None
+    elif args.llm_cache:
+        kwargs["llm_cache_path"] = Path(args.llm_cache)
+    for key, value in (("ollama_model", args.ollama_model), ("ollama_url", args.ollama_url),
+                       ("llm_concurrency", args.llm_concurrency), ("caption_batch_size", args.caption_batch_size),
+                       ("push_url", args.push_url), ("caption_worker", args.caption_worker)):
+        if value is not None:
+            kwargs[key] = value
+    report = run_batch(Path(args.raw_dir), Path(args.processed_dir), sample_fps=args.fps,
+                       decode_mode=args.decode_mode, pack=args.pack, adaptive=args.adaptive, extract_workers=args.extract_workers,
+                       caption_workers=args.caption_workers, llm_workers=args.llm_workers,
+                       force=args.force, pipeline_kwargs=kwargs)
+    if args.report_out:
+        Path(args.report_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
@@ -0,0 +1,126 @@
+"""
+scripts/caption_cache.py
+
+Persistent, content-addressed cache of BLIP captions.
+
+Entries are keyed by sha256(frame bytes) + BLIP model name + generation params, so
+re-running summaries with different window/stride/LLM settings never re-captions a
+frame whose JPEG has not changed. Stored in a single SQLite file with LRU eviction
+once the table grows past max_entries. Several caption threads (batch_ingest) and
+processes may share the file: WAL, and a busy timeout instead of "database is locked".
+
+Usage (from the pipeline):
+    cache = CaptionCache(Path("data/cache/captions.sqlite"), model_name=BLIP_MODEL_NAME,
+                         params={"max_length": 40})
+    hits, missing = cache.lookup(paths)   # {path: caption}, {path: key}
+    ...caption the missing paths...
+    cache.store({missing[p]: caption for p, caption in new_captions.items()})
+    print(cache.stats())
+"""
+from pathlib import Path
+from typing import Callable, Dict, Any, Hashable, Iterable, Tuple, Optional
+import hashlib
+import json
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = Path("data") / "cache" / "captions.sqlite"
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+
+def file_digest(path: Path) -> str:
+    """sha256 of the file contents (frames are small JPEGs, read in one go)."""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class CaptionCache:
+    def __init__(self, db_path: Path = DEFAULT_CACHE_PATH, model_name: str = "",
+                 params: Optional[Dict[str, Any]] = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        # model + generation params are folded into every key: a new model or
+        # max_length never serves captions produced under the old settings
+        self.namespace = model_name + "|" + json.dumps(params or {}, sort_keys=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conn = sqlite3.connect(str(self.db_path), timeout=busy_timeout_ms / 1000)
+        self.conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS captions (
+                key TEXT PRIMARY KEY,
+                caption TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_captions_last_used ON captions(last_used)")
+        self.conn.commit()
+
+    def key_for(self, image_path: Path, digest: Callable[[Any], str] = file_digest) -> str:
+        return hashlib.sha256(f"{digest(image_path)}|{self.namespace}".encode("utf-8")).hexdigest()
+
+    def lookup(self, paths: Iterable[Hashable],
+               digest: Callable[[Any], str] = file_digest) -> Tuple[Dict[Any, str], Dict[Any, str]]:
+        """
+        Resolve unique paths against the cache.
+        Returns (hits {path: caption}, missing {path: key}); keep the keys to store() later.
+        Unreadable frames are reported as missing with an empty key and are never stored.
+        digest maps a path to the sha256 of its JPEG bytes; pass PackReader.digest to look
+        up records of a frame pack by record number instead.
+        """
+        keys: Dict[Any, str] = {}
+        for p in dict.fromkeys(paths):
+            try:
+                keys[p] = self.key_for(p, digest)
+            except (OSError, IndexError):
+                keys[p] = ""
+        found: Dict[str, str] = {}
+        wanted = [k for k in keys.values() if k]
+        # stay well under SQLite's bound-parameter limit
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(self.conn.execute(
+                f"SELECT key, caption FROM captions WHERE key IN ({marks})", chunk).fetchall())
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE captions SET last_used = ? WHERE key = ?",
+                                  [(now, k) for k in found])
+            self.conn.commit()
+        hits = {p: found[k] for p, k in keys.items() if k in found}
+        missing = {p: k for p, k in keys.items() if k not in found}
+        self.hits += len(hits)
+        self.misses += len(missing)
+        return hits, missing
+
+    def store(self, entries: Dict[str, str]) -> None:
+        """Insert {key: caption}; empty keys/captions (failed frames) are skipped."""
+        rows = [(k, c, time.time()) for k, c in entries.items() if k and c]
+        if not rows:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO captions (key, caption, last_used) VALUES (?, ?, ?)", rows)
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self) -> None:
+        count = self.conn.execute("SELECT COUNT(*) FROM captions").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM captions WHERE key IN (SELECT key FROM captions ORDER BY last_used ASC LIMIT ?)",
+                (excess,))
+            self.evictions += excess
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        entries = self.conn.execute("SELECT COUNT(*) FROM captions").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": entries, "hit_rate": (self.hits / total) if total else 0.0}
+
+    def close(self) -> None:
+        self.conn.close()
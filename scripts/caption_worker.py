@@ -0,0 +1,150 @@
+"""
+scripts/caption_worker.py
+
+Resident BLIP captioning process. It loads the model once (optionally dynamically
+quantized to int8 for CPU) and serves caption requests over a local socket, so pipeline
+runs skip the torch import and the from_pretrained load on every video.
+
+Protocol: src/app/worker_ipc.py (multiprocessing.connection, pickled messages,
+authenticated with a shared key: CAPTION_WORKER_AUTHKEY when set, else a random key the
+worker writes on first start to CAPTION_WORKER_KEYFILE, default
+data/cache/caption_worker.key, mode 0600). One request dict per message, one response
+dict back:
+
+    {"op": "info"}                         -> {"model", "quantized", "device", "load_s", "served"}
+    {"op": "caption", "paths": [...]}      -> {"captions": [...]}   (files read by the worker,
+                                                                  only under its --root dirs)
+    {"op": "images", "images": [(mode, (w, h), bytes), ...]} -> {"captions": [...]}
+    {"op": "shutdown"}                     -> {"ok": True}
+    failures                               -> {"error": "..."}
+
+Each client connection gets a thread. Model calls are serialized: one model, one
+forward pass at a time.
+
+Addresses: see worker_ipc (default 127.0.0.1:18765). TCP on a non-loopback host is
+refused unless --allow-remote is given (then share CAPTION_WORKER_AUTHKEY with the clients).
+
+Usage:
+    python scripts/caption_worker.py --quantize                    # serve on 127.0.0.1:18765
+    python scripts/pipeline_blip_ollama.py data/processed/EJFBM --caption-worker 127.0.0.1:18765
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import threading
+import time
+
+from PIL import Image
+
+from pipeline_metrics import load_app_module
+
+worker_ipc = load_app_module("worker_ipc")
+
+DEFAULT_ADDRESS = "127.0.0.1:18765"
+DEFAULT_KEYFILE = Path("data") / "cache" / "caption_worker.key"
+KEY_PREFIX = "CAPTION_WORKER"
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """CAPTION_WORKER_AUTHKEY, else the key file (see worker_ipc.load_authkey)."""
+    return worker_ipc.load_authkey(KEY_PREFIX, DEFAULT_KEYFILE, create=create)
+
+
+class CaptionServer(worker_ipc.WorkerServer):
+    """Serve `blip` (anything with caption_batch(paths) and caption_images(images))."""
+
+    label = "caption"
+
+    def __init__(self, blip, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None,
+                 roots: Optional[Sequence[Path]] = None, allow_remote: bool = False):
+        """roots: directories the "caption" op may read files from (default: the working directory)."""
+        super().__init__(address, authkey if authkey is not None else load_authkey(create=True),
+                         allow_remote=allow_remote)
+        self.blip = blip
+        self.roots = [Path(r).resolve() for r in (roots or [Path.cwd()])]
+        self._model_lock = threading.Lock()
+        self.served = 0
+
+    def info(self) -> Dict[str, Any]:
+        return {"model": getattr(self.blip, "model_name", type(self.blip).__name__),
+                "quantized": bool(getattr(self.blip, "quantized", False)),
+                "device": getattr(self.blip, "device", "cpu"), "load_s": getattr(self.blip, "load_s", None),
+                "served": self.served}
+
+    def check_path(self, path: str) -> Path:
+        resolved = Path(path).resolve()
+        if not any(resolved.is_relative_to(root) for root in self.roots):
+            raise PermissionError(f"{path} is outside the worker's roots")
+        return resolved
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        op = req.get("op")
+        if op == "info":
+            return self.info()
+        if op == "caption":
+            with self._model_lock:
+                captions = self.blip.caption_batch([self.check_path(p) for p in req["paths"]])
+                self.served += len(captions)
+        elif op == "images":
+            images = [Image.frombytes(mode, size, data) for mode, size, data in req["images"]]
+            with self._model_lock:
+                captions = self.blip.caption_images(images)
+                self.served += len(captions)
+        else:
+            return {"error": f"unknown op {op!r}"}
+        return {"captions": captions}
+
+
+class CaptionClient(worker_ipc.WorkerClient):
+    """BlipWrapper look-alike that forwards to a running caption worker (thread-safe)."""
+
+    label = "caption worker"
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None):
+        super().__init__(address, authkey if authkey is not None else load_authkey())
+        self.info = self._call({"op": "info"})
+        self.model_name = self.info["model"]
+        self.quantized = self.info["quantized"]
+
+    def caption(self, image_path: Path) -> str:
+        return self.caption_batch([image_path])[0]
+
+    def caption_batch(self, image_paths: List[Path]) -> List[str]:
+        # absolute: the worker's working directory is not ours
+        return self._call({"op": "caption", "paths": [str(Path(p).resolve()) for p in image_paths]})["captions"]
+
+    def caption_images(self, images: List[Image.Image]) -> List[str]:
+        payload = []
+        for img in images:
+            img = img if img.mode == "RGB" else img.convert("RGB")
+            payload.append((img.mode, img.size, img.tobytes()))
+        return self._call({"op": "images", "images": payload})["captions"]
+
+
+if __name__ == "__main__":
+    import argparse
+    from pipeline_blip_ollama import BlipWrapper, BLIP_MODEL_NAME
+
+    p = argparse.ArgumentParser(description="Keep BLIP loaded and caption frames for pipeline runs.")
+    p.add_argument("--address", type=str, default=DEFAULT_ADDRESS,
+                   help="host:port, unix:/path.sock or a named pipe (default: %(default)s)")
+    p.add_argument("--model", type=str, default=BLIP_MODEL_NAME)
+    p.add_argument("--device", type=str, default="cpu")
+    p.add_argument("--quantize", action="store_true", help="Dynamic int8 quantization of the Linear layers (CPU)")
+    p.add_argument("--root", type=str, action="append", default=None,
+                   help="Directory the worker may read frames from (repeatable; default: the working directory)")
+    p.add_argument("--allow-remote", action="store_true",
+                   help="Allow a non-loopback TCP address (anyone with the key can run code in the worker)")
+    p.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus /metrics on this port")
+    args = p.parse_args()
+    if args.metrics_port:
+        from pipeline_metrics import serve_metrics
+        serve_metrics(args.metrics_port)
+    t0 = time.perf_counter()
+    server = CaptionServer(BlipWrapper(args.model, device=args.device, quantize=args.quantize), args.address,
+                           roots=[Path(r) for r in args.root] if args.root else None, allow_remote=args.allow_remote)
+    print(f"[Worker] {args.model} ready in {time.perf_counter() - t0:.1f}s "
+          f"(quantized={args.quantize}); listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
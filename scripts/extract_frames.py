@@ -2,12 +2,32 @@
 Extract sampled frames from a video and save them under data/processed/<video_id>/
 Usage:
     python scripts/extract_frames.py path/to/video.mp4 --fps 1.0
+    python scripts/extract_frames.py path/to/video.mp4 --fps 1.0 --decode-mode grab
+    python scripts/extract_frames.py path/to/video.mp4 --adaptive --budget-per-minute 6
+
+Frames are listed in a columnar index (index.json + .npy columns, see frame_index.py);
+metadata.json is still written for older tools unless --no-json is given. With --pack
+the frames go to a single frames.pack instead of one JPEG each (see frame_store.py).
+With --adaptive the frames are chosen by motion instead of a fixed --fps (see
+adaptive_sampling.py). Every frame's motion energy goes into the index either way.
 """
 
 import argparse
 from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple
 import cv2
-import json
+import time
+import numpy as np
+
+from frame_index import FrameIndexWriter, HEADER_FILE, LEGACY_FILE
+from frame_store import PackWriter, DEFAULT_PACK_SIZE
+from adaptive_sampling import (MotionProbe, allocate_budget, motion_energy, probe_gray, DEFAULT_PROBE_FPS,
+                               DEFAULT_BUDGET_PER_MINUTE, DEFAULT_MIN_PER_MINUTE, DEFAULT_MOTION_THRESHOLD)
+
+from pipeline_metrics import metrics
+
+DECODE_MODES = ["auto", "read", "grab", "seek"]
+SEEK_MIN_STEP = 250      # ~10s at 25 fps: beyond a typical CCTV keyframe interval
 
 
 def safe_name(p: Path) -> str:
@@ -15,9 +35,8 @@ def safe_name(p: Path) -> str:
     return p.stem.replace(" ", "_").replace(".", "_")
 
 
-def extract_frames(video_path: Path, out_dir: Path, sample_fps: float = 1.0, max_frames: int = None):
-    """Extract frames from the given video at a target FPS and save them with timestamps."""
-    out_dir.mkdir(parents=True, exist_ok=True)
+def open_video(video_path: Path):
+    """Open a video with OpenCV and return (cap, video_fps, frame_count)."""
     cap = cv2.VideoCapture(str(video_path))
 
     if not cap.isOpened():
@@ -26,57 +45,195 @@ def extract_frames(video_path: Path, out_dir: Path, sample_fps: float = 1.0, max
     # Get basic video info
     video_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
     frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    return cap, video_fps, frame_count
+
+
+def choose_decode_mode(step: int, frame_count: int) -> str:
+    """
+    Pick the cheapest way to visit every step-th frame:
+      read - decode everything (nothing to skip)
+      grab - demux skipped frames with cap.grab(), decode only the kept ones
+      seek - jump with CAP_PROP_POS_MSEC; only pays off when the gap spans
+             several keyframe intervals, since each seek decodes from a keyframe
+    """
+    if step <= 1:
+        return "read"
+    if step >= SEEK_MIN_STEP and frame_count > 0:
+        return "seek"
+    return "grab"
+
+
+def iter_frames(video_path: Path, sample_fps: float = 1.0, max_frames: int = None,
+                mode: str = "auto") -> Iterator[Tuple[float, np.ndarray]]:
+    """Decode the video and lazily yield (ts, BGR ndarray) for every sampled frame."""
+    cap, video_fps, frame_count = open_video(video_path)
     duration = frame_count / video_fps if video_fps else 0.0
-    print(f"Video FPS={video_fps:.2f}, frames={frame_count}, duration={duration:.2f}s")
 
     # Determine how often to sample frames
     step = max(1, int(round(video_fps / sample_fps)))
+    if mode == "auto":
+        mode = choose_decode_mode(step, frame_count)
+    elif mode == "seek" and frame_count <= 0:
+        # seeking needs the frame count to know where to stop; some containers/streams report 0
+        print("Frame count unknown; seek mode falls back to grab")
+        mode = "grab"
+    print(f"Video FPS={video_fps:.2f}, frames={frame_count}, duration={duration:.2f}s, decode mode={mode}")
 
     idx = 0
     saved = 0
-    metadata = {"video": str(video_path.name), "frames": []}
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Save every nth frame
-        if idx % step == 0:
-            ts = idx / video_fps
-            fname = f"frame_{saved:04d}.jpg"
-            out_path = out_dir / fname
-
-            # Save frame as JPEG
-            cv2.imwrite(str(out_path), frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
-
-            # Robust relative path handling for Windows
-            try:
-                rel_path = out_path.resolve().relative_to(Path.cwd().resolve())
-                rel_path_str = str(rel_path)
-            except Exception:
-                rel_path_str = str(out_path.resolve())
-
-            metadata["frames"].append({
-                "index": saved,
-                "ts": ts,
-                "path": rel_path_str
-            })
-
-            saved += 1
-            if max_frames and saved >= max_frames:
+    t = time.perf_counter()
+    try:
+        while True:
+            if mode == "seek":
+                if idx >= frame_count:
+                    break
+                cap.set(cv2.CAP_PROP_POS_MSEC, idx * 1000.0 / video_fps)
+                ret, frame = cap.read()
+            elif mode == "grab" and idx % step != 0:
+                # advance the demuxer without decoding pixels
+                if not cap.grab():
+                    break
+                idx += 1
+                continue
+            else:
+                ret, frame = cap.read()
+            if not ret:
                 break
 
-        idx += 1
+            # Keep every nth frame
+            if idx % step == 0:
+                metrics.observe("stage_seconds", time.perf_counter() - t, stage="decode")
+                yield idx / video_fps, frame
+                t = time.perf_counter()
+                saved += 1
+                if max_frames and saved >= max_frames:
+                    break
+
+            idx += step if mode == "seek" else 1
+    finally:
+        cap.release()
+
+
+def iter_selected_frames(video_path: Path, frame_numbers: Sequence[int]) -> Iterator[Tuple[int, np.ndarray]]:
+    """Decode only the given source frames (ascending); grab() past the rest."""
+    wanted = iter(frame_numbers)
+    target = next(wanted, None)
+    cap, _, _ = open_video(video_path)
+    idx = 0
+    try:
+        while target is not None:
+            if not cap.grab():
+                break
+            if idx == target:
+                t = time.perf_counter()
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                metrics.observe("stage_seconds", time.perf_counter() - t, stage="decode")
+                yield idx, frame
+                target = next(wanted, None)
+            idx += 1
+    finally:
+        cap.release()
+
+
+def iter_adaptive_frames(video_path: Path, probe_fps: float = DEFAULT_PROBE_FPS,
+                         budget_per_minute: int = DEFAULT_BUDGET_PER_MINUTE,
+                         min_per_minute: int = DEFAULT_MIN_PER_MINUTE,
+                         threshold: float = DEFAULT_MOTION_THRESHOLD, max_frames: Optional[int] = None,
+                         mode: str = "auto") -> Iterator[Tuple[float, np.ndarray, float]]:
+    """
+    Yield (ts, BGR frame, motion energy) for the frames adaptive_sampling.allocate_budget keeps:
+    a probe pass at probe_fps that keeps 64x36 grays only, then a pass that decodes the kept frames.
+    """
+    t0 = time.perf_counter()
+    ts, grays = [], []
+    for t, frame in iter_frames(video_path, sample_fps=probe_fps, mode=mode):
+        ts.append(t)
+        grays.append(probe_gray(frame))
+    if not ts:
+        return
+    cap, video_fps, _ = open_video(video_path)
+    cap.release()
+    ts_arr = np.asarray(ts, dtype=np.float64)
+    energy = motion_energy(np.stack(grays))
+    keep = allocate_budget(ts_arr, energy, budget_per_minute, min_per_minute, threshold)
+    if max_frames:
+        keep = keep[:max_frames]
+    print(f"[Adaptive] probed {len(ts)} frames at {probe_fps} fps in {time.perf_counter() - t0:.2f}s; keeping "
+          f"{len(keep)} ({int(np.count_nonzero(energy >= threshold))} active, budget {budget_per_minute}/min)")
+    by_frame = {int(round(ts_arr[i] * video_fps)): int(i) for i in keep}
+    for frame_number, frame in iter_selected_frames(video_path, sorted(by_frame)):
+        i = by_frame[frame_number]
+        yield float(ts_arr[i]), frame, float(energy[i])
+
+
+class FrameWriter:
+    """
+    Persist sampled frames under out_dir plus a frame index (and the metadata.json export):
+    one JPEG per frame, or with pack=True one frames.pack for the whole video, downscaled
+    to a shorter side of pack_size pixels (see frame_store.py).
+    """
+
+    def __init__(self, out_dir: Path, video_name: str, video_fps: Optional[float] = None, json_export: bool = True,
+                 pack: bool = False, pack_size: Optional[int] = DEFAULT_PACK_SIZE):
+        self.out_dir = out_dir
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.video_fps = video_fps
+        self.json_export = json_export and not pack
+        self.pack = PackWriter(out_dir, size=pack_size) if pack else None
+        self.index = FrameIndexWriter(out_dir, video_name, video_fps=video_fps, store="pack" if pack else "files")
+        self.probe = MotionProbe()
+
+    @property
+    def count(self) -> int:
+        return len(self.index)
+
+    def write(self, ts: float, frame: np.ndarray, motion: Optional[float] = None) -> None:
+        """motion: the frame's energy if the caller measured it; else it is measured against the previous write."""
+        if motion is None:
+            motion = self.probe.push(frame)
+        with metrics.timer("stage_seconds", stage="jpeg_write"):
+            if self.pack is not None:
+                self.pack.append(frame)
+            else:
+                cv2.imwrite(str(self.index.next_path()), frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+        self.index.append(ts, int(round(ts * self.video_fps)) if self.video_fps else -1, motion)
+
+    def close(self) -> Path:
+        if self.pack is not None:
+            self.pack.close()
+        self.index.close(json_export=self.json_export)
+        return self.out_dir / (LEGACY_FILE if self.json_export else HEADER_FILE)
+
 
+def extract_frames(video_path: Path, out_dir: Path, sample_fps: float = 1.0, max_frames: int = None,
+                   mode: str = "auto", json_export: bool = True, pack: bool = False,
+                   pack_size: Optional[int] = DEFAULT_PACK_SIZE, adaptive: bool = False,
+                   probe_fps: float = DEFAULT_PROBE_FPS, budget_per_minute: int = DEFAULT_BUDGET_PER_MINUTE,
+                   motion_threshold: float = DEFAULT_MOTION_THRESHOLD):
+    """
+    Extract frames from the given video at a target FPS and save them with timestamps.
+    adaptive: ignore sample_fps and keep up to budget_per_minute frames where there is motion
+    (probed at probe_fps, see iter_adaptive_frames).
+    """
+    cap, video_fps, _ = open_video(video_path)
     cap.release()
+    writer = FrameWriter(out_dir, str(video_path.name), video_fps=video_fps, json_export=json_export,
+                         pack=pack, pack_size=pack_size)
+    if adaptive:
+        for ts, frame, motion in iter_adaptive_frames(video_path, probe_fps=probe_fps,
+                                                      budget_per_minute=budget_per_minute,
+                                                      threshold=motion_threshold, max_frames=max_frames, mode=mode):
+            writer.write(ts, frame, motion)
+    else:
+        for ts, frame in iter_frames(video_path, sample_fps=sample_fps, max_frames=max_frames, mode=mode):
+            writer.write(ts, frame)
 
-    # Save metadata
-    meta_path = out_dir / "metadata.json"
-    with open(meta_path, "w", encoding="utf-8") as fh:
-        json.dump(metadata, fh, indent=2)
+    # Save the frame index
+    meta_path = writer.close()
 
-    print(f"✅ Saved {saved} frames to {out_dir}")
+    print(f"✅ Saved {writer.count} frames to {out_dir}")
     print(f"📝 Metadata written to {meta_path}")
 
 
@@ -85,6 +242,23 @@ if __name__ == "__main__":
     parser.add_argument("video", type=str, help="Path to the input MP4 file.")
     parser.add_argument("--fps", type=float, default=1.0, help="Frames per second to sample (default: 1.0)")
     parser.add_argument("--max-frames", type=int, default=None, help="Stop after this many frames (optional).")
+    parser.add_argument("--decode-mode", choices=DECODE_MODES, default="auto",
+                        help="read: decode every frame; grab: skip without decoding; seek: jump by timestamp; "
+                             "auto: pick from the sampling ratio (default)")
+    parser.add_argument("--no-json", action="store_true",
+                        help="Only write the binary frame index, not the metadata.json export")
+    parser.add_argument("--pack", action="store_true",
+                        help="Store frames in one frames.pack per video instead of one JPEG each")
+    parser.add_argument("--pack-size", type=int, default=DEFAULT_PACK_SIZE,
+                        help="With --pack, downscale to this shorter side in pixels (0: full size; default: %(default)s)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Sample by motion instead of a fixed --fps (see adaptive_sampling.py)")
+    parser.add_argument("--probe-fps", type=float, default=DEFAULT_PROBE_FPS,
+                        help="With --adaptive, rate at which motion is measured (default: %(default)s)")
+    parser.add_argument("--budget-per-minute", type=int, default=DEFAULT_BUDGET_PER_MINUTE,
+                        help="With --adaptive, frames kept per minute of activity at most (default: %(default)s)")
+    parser.add_argument("--motion-threshold", type=float, default=DEFAULT_MOTION_THRESHOLD,
+                        help="Mean gray-level change (0-255) that counts as activity (default: %(default)s)")
 
     args = parser.parse_args()
     video_path = Path(args.video)
@@ -95,4 +269,7 @@ if __name__ == "__main__":
     vidname = safe_name(video_path)
     out_dir = Path("data") / "processed" / vidname
 
-    extract_frames(video_path, out_dir, sample_fps=args.fps, max_frames=args.max_frames)
+    extract_frames(video_path, out_dir, sample_fps=args.fps, max_frames=args.max_frames, mode=args.decode_mode,
+                   json_export=not args.no_json, pack=args.pack, pack_size=args.pack_size or None,
+                   adaptive=args.adaptive, probe_fps=args.probe_fps, budget_per_minute=args.budget_per_minute,
+                   motion_threshold=args.motion_threshold)
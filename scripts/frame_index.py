@@ -0,0 +1,194 @@
+"""
+scripts/frame_index.py
+
+Columnar index of the frames extract_frames saved under data/processed/<video>/:
+
+    index.json       header: {"version", "video", "count", "pattern", "video_fps", "store", "motion"}
+    index_ts.npy     float64 timestamp (seconds) of saved frame i, ascending
+    index_frame.npy  int64 source-video frame number of saved frame i (-1 if unknown)
+    index_motion.npy float32 motion energy of saved frame i (adaptive_sampling.py); only
+                     when the header says "motion": true
+
+Frame i is the file pattern.format(i) next to the index, so no path is stored and
+none depends on the working directory of whoever ran the extraction. The arrays are
+memory-mapped on load, so a long recording costs a header parse and two small mmaps
+instead of a json.load of one dict per frame. Consumers bisect the ts column
+(windowing.iter_window_ranges) and only touch the rows they sample.
+
+With "store": "pack" the pixels are not files but records of frames.pack
+(frame_store.py), row i = record i; otherwise ("files") frame i is pattern.format(i).
+
+metadata.json ({"video", "frames": [{"index", "ts", "path"}, ...]}) is still written
+as an export for older tools (not for packed stores: they could not read the frames).
+Directories that only have metadata.json are converted the first time they are loaded.
+"""
+from array import array
+from pathlib import Path, PureWindowsPath
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import json
+import os
+
+import numpy as np
+
+HEADER_FILE = "index.json"
+TS_FILE = "index_ts.npy"
+FRAME_FILE = "index_frame.npy"
+MOTION_FILE = "index_motion.npy"
+LEGACY_FILE = "metadata.json"
+FRAME_PATTERN = "frame_{:04d}.jpg"
+VERSION = 1
+
+
+def has_index(processed_dir: Path) -> bool:
+    """True if processed_dir holds frames in either format."""
+    return (processed_dir / HEADER_FILE).exists() or (processed_dir / LEGACY_FILE).exists()
+
+
+def _save_npy(path: Path, arr: np.ndarray) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.save(fh, arr)
+    os.replace(tmp, path)
+
+
+class FrameIndex:
+    def __init__(self, root: Path, video: Optional[str], ts: np.ndarray, frame: np.ndarray,
+                 pattern: str = FRAME_PATTERN, video_fps: Optional[float] = None,
+                 names: Optional[List[str]] = None, store: str = "files", motion: Optional[np.ndarray] = None):
+        self.root = root
+        self.video = video
+        self.ts = ts
+        self.frame = frame
+        self.pattern = pattern
+        self.video_fps = video_fps
+        self.names = names    # only for converted directories whose files do not follow `pattern`
+        self.store = store    # "files" or "pack"
+        self.motion = motion  # None for indexes written before motion energies were recorded
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def path(self, i: int) -> Path:
+        return self.root / (self.names[i] if self.names is not None else self.pattern.format(i))
+
+    def paths(self, indices: Sequence[int]) -> List[Path]:
+        return [self.path(int(i)) for i in indices]
+
+    def frame_dicts(self) -> Iterator[Dict[str, Any]]:
+        """The old metadata.json rows, one at a time."""
+        for i in range(len(self)):
+            yield {"index": i, "ts": float(self.ts[i]), "path": str(self.path(i))}
+
+    # ---------- persistence ----------
+    @classmethod
+    def load(cls, processed_dir: Path) -> "FrameIndex":
+        """Memory-map the index of processed_dir (converting a metadata.json-only directory first)."""
+        processed_dir = Path(processed_dir)
+        header_path = processed_dir / HEADER_FILE
+        if not header_path.exists():
+            if not (processed_dir / LEGACY_FILE).exists():
+                raise FileNotFoundError(f"no frame index ({HEADER_FILE} or {LEGACY_FILE}) in {processed_dir}")
+            index = cls.from_metadata(processed_dir)
+            try:
+                index.save()
+            except OSError as e:    # read-only copy: use it from memory
+                print(f"[FrameIndex] could not write the index for {processed_dir}: {e}")
+            return index
+        header = json.loads(header_path.read_text(encoding="utf-8"))
+        if header.get("version") != VERSION:
+            raise ValueError(f"unsupported frame index version {header.get('version')} in {processed_dir}")
+        count = header["count"]
+        ts = np.load(processed_dir / TS_FILE, mmap_mode="r") if count else np.zeros(0, dtype=np.float64)
+        frame = np.load(processed_dir / FRAME_FILE, mmap_mode="r") if count else np.zeros(0, dtype=np.int64)
+        motion = np.load(processed_dir / MOTION_FILE, mmap_mode="r") if count and header.get("motion") else None
+        return cls(processed_dir, header.get("video"), ts, frame, pattern=header.get("pattern", FRAME_PATTERN),
+                   video_fps=header.get("video_fps"), names=header.get("names"), store=header.get("store", "files"),
+                   motion=motion)
+
+    @classmethod
+    def from_metadata(cls, processed_dir: Path) -> "FrameIndex":
+        """Build an index from a legacy metadata.json; its paths are only used for their file names."""
+        meta = json.loads((processed_dir / LEGACY_FILE).read_text(encoding="utf-8"))
+        frames = sorted(meta.get("frames", []), key=lambda f: f["ts"])
+        ts = np.array([f["ts"] for f in frames], dtype=np.float64)
+        frame = np.full(len(frames), -1, dtype=np.int64)
+        # written on Windows or elsewhere: keep the base name only, whatever the separator
+        names = [PureWindowsPath(f["path"]).name for f in frames]
+        if names == [FRAME_PATTERN.format(i) for i in range(len(names))]:
+            names = None
+        return cls(processed_dir, meta.get("video"), ts, frame, names=names)
+
+    def save(self) -> None:
+        """Write the arrays, then the header (readers only look for the header)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        if len(self):
+            _save_npy(self.root / TS_FILE, np.ascontiguousarray(self.ts, dtype=np.float64))
+            _save_npy(self.root / FRAME_FILE, np.ascontiguousarray(self.frame, dtype=np.int64))
+            if self.motion is not None:
+                _save_npy(self.root / MOTION_FILE, np.ascontiguousarray(self.motion, dtype=np.float32))
+        header = {"version": VERSION, "video": self.video, "count": len(self), "pattern": self.pattern,
+                  "video_fps": self.video_fps, "store": self.store, "motion": self.motion is not None}
+        if self.names is not None:
+            header["names"] = self.names
+        tmp = self.root / (HEADER_FILE + ".tmp")
+        tmp.write_text(json.dumps(header, indent=2), encoding="utf-8")
+        os.replace(tmp, self.root / HEADER_FILE)
+
+    def export_json(self) -> Path:
+        """metadata.json in the old format (paths relative to the cwd when possible, as before)."""
+        root = self.root.resolve()
+        try:
+            root = root.relative_to(Path.cwd().resolve())
+        except ValueError:
+            pass
+        prefix = str(root / "_")[:-1]   # "<dir>/" with the platform's separator
+        names = self.names or [self.pattern.format(i) for i in range(len(self))]
+        rows = [{"index": i, "ts": ts, "path": prefix + name}
+                for i, (ts, name) in enumerate(zip(self.ts.tolist(), names))]
+        meta_path = self.root / LEGACY_FILE
+        # indented like before for short clips; only json.dumps without indent uses the C encoder
+        text = json.dumps({"video": self.video, "frames": rows}, indent=2 if len(rows) <= 10_000 else None)
+        meta_path.write_text(text, encoding="utf-8")
+        return meta_path
+
+
+class FrameIndexWriter:
+    """Accumulates (ts, frame number) rows in compact arrays; close() writes the index."""
+
+    def __init__(self, root: Path, video: Optional[str], video_fps: Optional[float] = None,
+                 pattern: str = FRAME_PATTERN, store: str = "files"):
+        self.root = root
+        self.video = video
+        self.video_fps = video_fps
+        self.pattern = pattern
+        self.store = store
+        self._ts = array("d")
+        self._frame = array("q")
+        self._motion = array("f")
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def next_path(self) -> Path:
+        return self.root / self.pattern.format(len(self._ts))
+
+    def append(self, ts: float, frame_number: int = -1, motion: Optional[float] = None) -> None:
+        """motion: the frame's motion energy; the index only gets the column if every row has one."""
+        self._ts.append(ts)
+        self._frame.append(frame_number)
+        if motion is not None and len(self._motion) == len(self._ts) - 1:
+            self._motion.append(motion)
+
+    def to_index(self) -> FrameIndex:
+        # copies: a buffer exported to NumPy could no longer grow
+        motion = np.frombuffer(self._motion, dtype=np.float32).copy() if len(self._motion) == len(self._ts) else None
+        return FrameIndex(self.root, self.video, np.frombuffer(self._ts, dtype=np.float64).copy(),
+                          np.frombuffer(self._frame, dtype=np.int64).copy(), pattern=self.pattern,
+                          video_fps=self.video_fps, store=self.store, motion=motion)
+
+    def close(self, json_export: bool = True) -> FrameIndex:
+        index = self.to_index()
+        index.save()
+        if json_export and self.store == "files":
+            index.export_json()
+        return index
@@ -0,0 +1,125 @@
+"""
+scripts/frame_store.py
+
+Packed frame store: all sampled frames of one video in a single append-only file,
+instead of one JPEG per frame.
+
+    frames.pack   JPEG payloads back to back
+    frames.offs   (offset, length) per frame as little-endian uint64 pairs, append-only
+
+Both files are only ever appended to: a crash leaves at most a torn last record, which
+the reader ignores. The frame index (frame_index.py) still holds the timestamps; its
+header says "store": "pack", and row i of the index is record i of the pack.
+
+Readers mmap the pack. cv2.imdecode reads each JPEG straight out of the mapping, so
+the compressed bytes are never copied into Python objects. With `size`, frames are
+downscaled at write time so that their shorter side is `size` pixels. BLIP resizes
+every input to 384x384 (DEFAULT_PACK_SIZE), so no more pixels than that are stored or
+decoded.
+
+Usage:
+    python scripts/extract_frames.py data/raw/EJFBM.mp4 --pack            # shorter side 384
+    python scripts/extract_frames.py data/raw/EJFBM.mp4 --pack --pack-size 0   # full resolution
+"""
+from pathlib import Path
+from typing import List, Optional
+import hashlib
+import mmap
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+PACK_FILE = "frames.pack"
+OFFSETS_FILE = "frames.offs"
+DEFAULT_PACK_SIZE = 384          # BLIP (base) input resolution
+DEFAULT_JPEG_QUALITY = 85
+_RECORD = np.dtype("<u8")
+
+
+def fit_shorter_side(frame: np.ndarray, size: Optional[int]) -> np.ndarray:
+    """Downscale so the shorter side is `size` pixels (never upscales; None/0: unchanged)."""
+    h, w = frame.shape[:2]
+    if not size or min(h, w) <= size:
+        return frame
+    scale = size / float(min(h, w))
+    return cv2.resize(frame, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+class PackWriter:
+    def __init__(self, root: Path, size: Optional[int] = DEFAULT_PACK_SIZE, quality: int = DEFAULT_JPEG_QUALITY,
+                 resume: bool = False):
+        """resume: keep appending to an existing pack (default: start a new one, like a re-extraction)."""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.quality = quality
+        mode = "ab" if resume else "wb"
+        self._pack = open(self.root / PACK_FILE, mode)
+        self._offs = open(self.root / OFFSETS_FILE, mode)
+        self._end = self._pack.seek(0, os.SEEK_END)
+        self.count = self._offs.seek(0, os.SEEK_END) // (2 * _RECORD.itemsize)
+
+    def append(self, frame: np.ndarray) -> int:
+        """Encode a BGR frame and append it; returns its record number."""
+        ok, buf = cv2.imencode(".jpg", fit_shorter_side(frame, self.size),
+                               [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return self.append_bytes(buf.tobytes())
+
+    def append_bytes(self, data: bytes) -> int:
+        self._pack.write(data)
+        self._offs.write(np.array([self._end, len(data)], dtype=_RECORD).tobytes())
+        self._end += len(data)
+        self.count += 1
+        return self.count - 1
+
+    def close(self) -> None:
+        self._pack.close()
+        self._offs.close()
+
+
+class PackReader:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._file = open(self.root / PACK_FILE, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.buffer = np.frombuffer(self._map, dtype=np.uint8) if self._map is not None else np.zeros(0, np.uint8)
+        offs = np.fromfile(self.root / OFFSETS_FILE, dtype=_RECORD)
+        records = offs[: len(offs) // 2 * 2].reshape(-1, 2)
+        # drop a torn tail: records whose payload did not make it to disk
+        self.records = records[records.sum(axis=1) <= size] if len(records) else records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def raw(self, i: int) -> np.ndarray:
+        """JPEG bytes of frame i: a view into the mapping, no copy."""
+        off, length = self.records[i]
+        return self.buffer[int(off):int(off) + int(length)]
+
+    def digest(self, i: int) -> str:
+        """sha256 of frame i's JPEG bytes (the caption cache key, like caption_cache.file_digest)."""
+        return hashlib.sha256(self.raw(i)).hexdigest()
+
+    def decode(self, i: int) -> np.ndarray:
+        frame = cv2.imdecode(self.raw(i), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"frame {i} of {self.root / PACK_FILE} does not decode")
+        return frame
+
+    def image(self, i: int) -> Image.Image:
+        """Frame i as an RGB PIL image (what BlipWrapper.caption_images takes)."""
+        return Image.fromarray(cv2.cvtColor(self.decode(i), cv2.COLOR_BGR2RGB))
+
+    def images(self, indices: List[int]) -> List[Image.Image]:
+        return [self.image(int(i)) for i in indices]
+
+    def close(self) -> None:
+        # views handed out (raw()) keep the mapping alive; just let go of ours
+        self.buffer = np.zeros(0, np.uint8)
+        self._map = None
+        self._file.close()
@@ -0,0 +1,71 @@
+"""
+scripts/hierarchical.py
+
+Hierarchical (map-reduce) summarization of long recordings.
+
+Level 0 is the merged, refined segments of a report. Each higher level groups the
+nodes of the level below, `fanout` consecutive nodes at a time, and reduces every group
+to one digest with one LLM call; this repeats until a single whole-video digest is
+left. Calls within a level are independent and run concurrently; levels run one after
+another.
+
+Every reduce prompt sees at most `fanout` child summaries (truncated, see
+pipeline_blip_ollama.build_digest_prompt), so prompt size is bounded no matter how long
+the recording is. merge_summaries(max_span=...) bounds level 0 in the same way: on a
+continuously busy camera the segments are cut every `segment_span` seconds instead of
+growing into one segment that spans the whole recording.
+
+With the defaults (10-minute segments, fanout 6) level 1 covers about an hour and the
+top level covers the whole video. The report keeps level 0 in "summaries" and puts
+the higher levels in "digests" (emitted_digests: a node carried up unchanged is not a
+digest, it would only duplicate the row below it). The reports API stores the level of
+every row, and GET /reports?level=N serves one zoom level.
+
+Model-free on purpose: the caller passes reduce_group(children) -> {"summary", "confidence"}.
+"""
+from typing import Any, Callable, Dict, List
+
+from llm_backend import map_concurrent, DEFAULT_CONCURRENCY
+
+DEFAULT_FANOUT = 6
+DEFAULT_SEGMENT_SPAN = 600.0     # seconds; with fanout 6, level 1 is ~1 hour
+
+
+def group_nodes(nodes: List[Dict[str, Any]], fanout: int) -> List[List[Dict[str, Any]]]:
+    """Consecutive groups of at most fanout nodes."""
+    return [nodes[i:i + fanout] for i in range(0, len(nodes), fanout)]
+
+
+def summarize_hierarchy(segments: List[Dict[str, Any]],
+                        reduce_group: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+                        fanout: int = DEFAULT_FANOUT,
+                        concurrency: int = DEFAULT_CONCURRENCY) -> List[List[Dict[str, Any]]]:
+    """
+    Reduce segments (sorted by start) level by level.
+    Returns [level 0, level 1, ...]; every node has "start", "end", "summary", "confidence",
+    "level" and "children" (number of nodes it was reduced from, 0 at level 0). The last
+    level holds one node, unless there were no segments. A trailing group of a single
+    node is carried up as is, without an LLM call, and marked "carried": True.
+    """
+    levels = [[{**s, "level": 0, "children": 0} for s in segments]]
+    if fanout < 2:
+        return levels
+    while len(levels[-1]) > 1:
+        level = len(levels)
+        groups = group_nodes(levels[-1], fanout)
+
+        def reduce_one(children: List[Dict[str, Any]]) -> Dict[str, Any]:
+            if len(children) == 1:
+                return {**children[0], "level": level, "evidence": [], "carried": True}
+            digest = reduce_group(children)
+            return {"start": children[0]["start"], "end": children[-1]["end"],
+                    "summary": digest.get("summary", ""), "confidence": digest.get("confidence", 0.0),
+                    "evidence": [], "level": level, "children": len(children)}
+
+        levels.append(map_concurrent(reduce_one, groups, max_workers=concurrency))
+    return levels
+
+
+def emitted_digests(levels: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """The nodes above level 0 that an LLM call produced, level by level."""
+    return [node for level in levels[1:] for node in level if not node.get("carried")]
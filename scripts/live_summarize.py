@@ -0,0 +1,367 @@
+"""
+scripts/live_summarize.py
+
+Long-running summarization of a live camera (RTSP/HTTP stream, device index) or of a
+local file replayed at real-time speed.
+
+ - capture   : a thread reads the stream with cv2.VideoCapture, keeps one frame every
+               1/fps seconds (grab() for the rest, so skipped frames are never decoded)
+               and puts it on a FrameRing. The ring never blocks the camera: when the
+               rest of the pipeline falls behind, frames are dropped by --drop-policy.
+ - caption   : the main loop feeds RollingWindows; every closed window has its sampled
+               frames captioned with BLIP, in one batch.
+ - summarize : window prompts go to the LLM backend, at most --max-pending windows in
+               flight; beyond that the main loop waits, the ring fills and drops.
+ - publish   : window results, in order, go through SegmentMerger; each segment it
+               closes (gap found, or --max-segment seconds reached) is refined and POSTed
+               to /reports/bulk right away (appended to data/reports/<name>_live.ndjson
+               if there is no --push-url or the push fails).
+
+Memory is bounded by the ring, the frames of the open windows (downscaled to
+--max-side at capture) and the in-flight windows. Timestamps are seconds since the
+session started. Ctrl-C stops capture and flushes the last segment.
+
+Usage:
+    python scripts/live_summarize.py rtsp://camera.local/stream1 --name gate-cam --push-url http://127.0.0.1:8080
+    python scripts/live_summarize.py data/raw/EJFBM.mp4 --realtime --fps 1 --push-url http://127.0.0.1:8080
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import argparse
+import collections
+import json
+import threading
+import time
+
+import cv2
+from PIL import Image
+
+from extract_frames import safe_name
+from streaming import FrameRing, RollingWindows, SegmentMerger, pick_indices, DEFAULT_RING_SIZE, DROP_POLICIES
+from llm_backend import make_backend, DEFAULT_OLLAMA_URL, DEFAULT_CONCURRENCY, DEFAULT_RETRIES, DEFAULT_TIMEOUT
+from pipeline_blip_ollama import (BlipWrapper, blip_loader, call_ollama_summarize, refine_merged_with_ollama,
+                                  push_report, OLLAMA_MODEL, DEFAULT_WINDOW, DEFAULT_STRIDE,
+                                  DEFAULT_FRAMES_PER_WINDOW, DEFAULT_MERGE_GAP, DEFAULT_OUTPUT_DIR)
+from llm_cache import LLMCache, DEFAULT_LLM_CACHE_PATH, DEFAULT_TTL
+from pipeline_metrics import metrics, serve_metrics
+
+DEFAULT_MAX_SEGMENT = 120.0
+DEFAULT_MAX_SIDE = 640
+DEFAULT_RECONNECT_DELAY = 2.0
+
+
+def is_file_source(source: Union[str, int]) -> bool:
+    return isinstance(source, str) and "://" not in source and Path(source).is_file()
+
+
+def downscale(frame, max_side: Optional[int]):
+    h, w = frame.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return frame
+    scale = max_side / float(max(h, w))
+    return cv2.resize(frame, (int(round(w * scale)), int(round(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+class LiveCapture(threading.Thread):
+    """
+    Read `source` and put sampled {"seq", "ts", "image"} items on `ring`.
+    Files: ts is the position in the file; with realtime, reading is paced to
+    speed x real time, like a camera. Streams: ts is wall-clock time since start and a
+    dropped connection is reopened every reconnect_delay seconds until stop().
+    """
+
+    def __init__(self, source: Union[str, int], ring: FrameRing, sample_fps: float = 1.0,
+                 realtime: bool = False, speed: float = 1.0, max_side: Optional[int] = DEFAULT_MAX_SIDE,
+                 reconnect_delay: float = DEFAULT_RECONNECT_DELAY):
+        super().__init__(name="live-capture", daemon=True)
+        self.source = source
+        self.ring = ring
+        self.interval = 1.0 / sample_fps
+        self.is_file = is_file_source(source)
+        self.realtime = realtime
+        self.speed = speed
+        self.max_side = max_side
+        self.reconnect_delay = reconnect_delay
+        self.error: Optional[BaseException] = None
+        self.frames_read = 0
+        self.reconnects = 0
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def run(self) -> None:
+        seq = 0
+        next_ts = 0.0
+        t0 = time.monotonic()
+        try:
+            while not self._stopping.is_set():
+                cap = self._open()
+                if cap is None:
+                    if self.is_file:
+                        raise RuntimeError(f"Cannot open video: {self.source}")
+                    print(f"[Live] cannot open {self.source}; retrying in {self.reconnect_delay:.0f}s")
+                    self._stopping.wait(self.reconnect_delay)
+                    continue
+                fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+                idx = 0
+                while not self._stopping.is_set():
+                    if not cap.grab():
+                        break
+                    ts = idx / fps if self.is_file else time.monotonic() - t0
+                    idx += 1
+                    self.frames_read += 1
+                    if self.is_file and self.realtime:
+                        delay = t0 + ts / self.speed - time.monotonic()
+                        if delay > 0:
+                            self._stopping.wait(delay)
+                    if ts + 1e-9 < next_ts:
+                        continue
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        continue
+                    self.ring.put({"seq": seq, "ts": ts, "image": downscale(frame, self.max_side)})
+                    seq += 1
+                    next_ts += self.interval
+                    while next_ts <= ts:   # fell behind the sampling clock: skip, do not burst
+                        next_ts += self.interval
+                cap.release()
+                if self.is_file:
+                    break
+                if not self._stopping.is_set():
+                    self.reconnects += 1
+                    print(f"[Live] stream ended; reconnecting in {self.reconnect_delay:.0f}s")
+                    self._stopping.wait(self.reconnect_delay)
+        except BaseException as e:   # surfaced by run_live
+            self.error = e
+        finally:
+            self.ring.close()
+
+
+class SegmentPublisher:
+    """Refine each finished segment and push it (or append it to an NDJSON file) off the main loop."""
+
+    def __init__(self, name: str, generated_at: str, ollama_model: str, backend,
+                 push_url: Optional[str] = None, out_path: Optional[Path] = None, refine: bool = True,
+                 llm_cache: Optional[LLMCache] = None):
+        self.name = name
+        self.generated_at = generated_at
+        self.ollama_model = ollama_model
+        self.backend = backend
+        self.push_url = push_url
+        self.out_path = out_path or DEFAULT_OUTPUT_DIR / f"{name}_live.ndjson"
+        self.refine = refine
+        self.llm_cache = llm_cache
+        self.pushed = 0
+        self.saved = 0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="publish")   # keeps segment order
+
+    def submit(self, segment: Dict[str, Any]) -> None:
+        self._pool.submit(self._publish, segment)
+
+    def _publish(self, segment: Dict[str, Any]) -> None:
+        try:
+            if self.refine:
+                segment = refine_merged_with_ollama([segment], self.ollama_model, backend=self.backend,
+                                                    cache=self.llm_cache)[0]
+        except Exception as e:
+            print(f"[Live] refine failed ({e}); publishing the merged text")
+        print(f"[Segment] {segment['start']:.1f}-{segment['end']:.1f}s: {segment.get('summary', '')[:80]}")
+        report = {"video": self.name, "generated_at": self.generated_at, "summaries": [segment]}
+        if self.push_url:
+            try:
+                push_report(self.push_url, report)
+                self.pushed += 1
+                return
+            except Exception as e:
+                print(f"[Push] failed to push segment to {self.push_url}: {e}; appending to {self.out_path}")
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.out_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+        self.saved += 1
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+def run_live(source: Union[str, int],
+             name: Optional[str] = None,
+             sample_fps: float = 1.0,
+             window_size: float = DEFAULT_WINDOW,
+             stride: float = DEFAULT_STRIDE,
+             frames_per_window: int = DEFAULT_FRAMES_PER_WINDOW,
+             merge_gap: float = DEFAULT_MERGE_GAP,
+             max_segment: Optional[float] = DEFAULT_MAX_SEGMENT,
+             ring_size: int = DEFAULT_RING_SIZE,
+             drop_policy: str = "oldest",
+             max_pending: Optional[int] = None,
+             realtime: bool = False,
+             speed: float = 1.0,
+             max_side: Optional[int] = DEFAULT_MAX_SIDE,
+             ollama_model: str = OLLAMA_MODEL,
+             llm_backend: str = "auto",
+             ollama_url: str = DEFAULT_OLLAMA_URL,
+             llm_concurrency: int = DEFAULT_CONCURRENCY,
+             llm_timeout: int = DEFAULT_TIMEOUT,
+             llm_retries: int = DEFAULT_RETRIES,
+             push_url: Optional[str] = None,
+             refine: bool = True,
+             get_blip: Callable[[], BlipWrapper] = BlipWrapper,
+             llm_cache_path: Optional[Path] = DEFAULT_LLM_CACHE_PATH,
+             llm_cache_ttl: Optional[float] = DEFAULT_TTL) -> Dict[str, Any]:
+    """Run until the source ends (files) or Ctrl-C; returns session counters."""
+    if name is None:
+        name = Path(source).name if is_file_source(source) else safe_name(Path(str(source).split("://")[-1]))
+    started_at = datetime.now(timezone.utc).isoformat()
+    blip = get_blip()
+    backend = make_backend(llm_backend, ollama_model, base_url=ollama_url, timeout=llm_timeout,
+                           retries=llm_retries, concurrency=llm_concurrency)
+    # static cameras repeat the same captions window after window: serve those from the cache
+    llm_cache = LLMCache(llm_cache_path, ttl=llm_cache_ttl) if llm_cache_path is not None else None
+    max_pending = max_pending or 2 * max(1, llm_concurrency)
+    ring = FrameRing(ring_size, drop_policy)
+    capture = LiveCapture(source, ring, sample_fps=sample_fps, realtime=realtime, speed=speed, max_side=max_side)
+    windows = RollingWindows(window_size, stride)
+    merger = SegmentMerger(merge_gap, max_span=max_segment)
+    publisher = SegmentPublisher(name, started_at, ollama_model, backend, push_url=push_url, refine=refine,
+                                 llm_cache=llm_cache)
+    pending: "collections.deque" = collections.deque()   # (window, captioned, future) in window order
+    stats = {"windows": 0, "segments": 0, "caption_failures": 0, "pending_peak": 0}
+    started = metrics.snapshot()
+    metrics.gauge_fn("queue_depth", ring.__len__, queue="live_ring")
+    metrics.gauge_fn("queue_depth", pending.__len__, queue="live_llm_pending")
+    metrics.gauge_fn("ring_dropped_frames", lambda: ring.dropped)
+
+    def drain(block_until: int) -> None:
+        """Hand finished windows to the merger in order; block while more than block_until are in flight."""
+        while pending and (len(pending) > block_until or pending[0][2].done()):
+            win, captioned, fut = pending.popleft()
+            try:
+                summary_obj = fut.result()
+            except Exception as e:
+                print(f"[Live] summarizing {win['start']:.0f}-{win['end']:.0f}s failed: {e}")
+                summary_obj = {}
+            result = {"start": win["start"], "end": win["end"], "summary": summary_obj.get("summary", ""),
+                      "evidence": captioned, "confidence": summary_obj.get("confidence", 0.0)}
+            for segment in merger.add(result):
+                stats["segments"] += 1
+                publisher.submit(segment)
+
+    def close_windows(closed: List[Dict[str, Any]], pool: ThreadPoolExecutor) -> None:
+        picks = [[win["frames"][i] for i in pick_indices(len(win["frames"]), frames_per_window)] for win in closed]
+        todo = list({f["seq"]: f for ps in picks for f in ps}.values())
+        captions: Dict[int, str] = {}
+        if todo:
+            try:
+                images = [Image.fromarray(f["image"][:, :, ::-1]) for f in todo]   # BGR -> RGB
+                captions = dict(zip((f["seq"] for f in todo), blip.caption_images(images)))
+            except Exception as e:
+                print(f"[BLIP] failed to caption {len(todo)} live frames: {e}")
+                stats["caption_failures"] += len(todo)
+        for win, ps in zip(closed, picks):
+            captioned = [{"ts": f["ts"], "caption": captions.get(f["seq"], "")} for f in ps]
+            pending.append((win, captioned,
+                            pool.submit(call_ollama_summarize, ollama_model, captioned, backend=backend,
+                                        cache=llm_cache)))
+            stats["windows"] += 1
+            drain(max_pending)
+            stats["pending_peak"] = max(stats["pending_peak"], len(pending))
+
+    print(f"[Live] {source} as {name!r} (fps={sample_fps}, window={window_size}s stride={stride}s, "
+          f"ring={ring_size} drop={drop_policy})")
+    t0 = time.perf_counter()
+    capture.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, llm_concurrency), thread_name_prefix="llm") as pool:
+            try:
+                for item in ring:
+                    closed = windows.push(item)
+                    if closed:
+                        close_windows(closed, pool)
+                    drain(max_pending)
+            except KeyboardInterrupt:
+                print("[Live] stopping ...")
+            capture.stop()
+            close_windows(windows.flush(), pool)
+            drain(0)
+        for segment in merger.flush():
+            stats["segments"] += 1
+            publisher.submit(segment)
+    finally:
+        capture.stop()
+        publisher.close()
+        backend.close()
+        if llm_cache is not None:
+            llm_cache_stats = llm_cache.stats()
+            llm_cache.close()
+    if capture.error is not None:
+        raise capture.error
+
+    stats.update({"name": name, "elapsed_s": round(time.perf_counter() - t0, 3), "frames_read": capture.frames_read,
+                  "frames_sampled": ring.pushed, "frames_dropped": ring.dropped, "reconnects": capture.reconnects,
+                  "segments_pushed": publisher.pushed, "segments_saved": publisher.saved})
+    if metrics.enabled:
+        stats["timings"] = metrics.summary(since=started)
+    if llm_cache is not None:
+        stats["llm_cache"] = llm_cache_stats
+    print(json.dumps(stats, indent=2))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a live stream (or a file replayed in real time).")
+    parser.add_argument("source", type=str, help="Stream URL (rtsp://, http://), camera index, or a video file")
+    parser.add_argument("--name", type=str, default=None, help="Video name reported to the API (default: from source)")
+    parser.add_argument("--fps", type=float, default=1.0, help="Frames sampled per second")
+    parser.add_argument("--realtime", action="store_true", help="Replay a file at real-time speed, like a camera")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor with --realtime")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW)
+    parser.add_argument("--stride", type=float, default=DEFAULT_STRIDE)
+    parser.add_argument("--frames-per-window", type=int, default=DEFAULT_FRAMES_PER_WINDOW)
+    parser.add_argument("--merge-gap", type=float, default=DEFAULT_MERGE_GAP)
+    parser.add_argument("--max-segment", type=float, default=DEFAULT_MAX_SEGMENT,
+                        help="Publish a segment once it spans this many seconds (default: %(default)s)")
+    parser.add_argument("--ring-size", type=int, default=DEFAULT_RING_SIZE, help="Sampled frames buffered")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default="oldest",
+                        help="When the ring is full drop the oldest buffered frame or the incoming one")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="Windows waiting on the LLM before capture backs off (default: 2 x concurrency)")
+    parser.add_argument("--max-side", type=int, default=DEFAULT_MAX_SIDE, help="Downscale frames at capture (0: off)")
+    parser.add_argument("--no-refine", action="store_true", help="Publish merged window text without a refine call")
+    parser.add_argument("--ollama-model", type=str, default=OLLAMA_MODEL)
+    parser.add_argument("--llm-backend", choices=["auto", "http", "cli"], default="auto")
+    parser.add_argument("--ollama-url", type=str, default=DEFAULT_OLLAMA_URL)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--llm-timeout", type=int, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--llm-retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--llm-cache", type=str, default=str(DEFAULT_LLM_CACHE_PATH), help="SQLite LLM response cache")
+    parser.add_argument("--llm-cache-ttl", type=float, default=DEFAULT_TTL, help="Seconds a cached response stays valid")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Send every prompt to the LLM")
+    parser.add_argument("--push-url", type=str, default=None,
+                        help="Reports API to POST each segment to (default: append to data/reports/<name>_live.ndjson)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus /metrics on this port")
+    parser.add_argument("--caption-worker", type=str, default=None,
+                        help="Caption with a running scripts/caption_worker.py at this address")
+    parser.add_argument("--quantize", action="store_true", help="Load BLIP with dynamic int8 quantization")
+    args = parser.parse_args()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    source: Union[str, int] = int(args.source) if args.source.isdigit() else args.source
+    run_live(source, name=args.name, sample_fps=args.fps, window_size=args.window, stride=args.stride,
+             frames_per_window=args.frames_per_window, merge_gap=args.merge_gap, max_segment=args.max_segment,
+             ring_size=args.ring_size, drop_policy=args.drop_policy, max_pending=args.max_pending,
+             realtime=args.realtime, speed=args.speed, max_side=args.max_side or None,
+             ollama_model=args.ollama_model, llm_backend=args.llm_backend, ollama_url=args.ollama_url,
+             llm_concurrency=args.llm_concurrency, llm_timeout=args.llm_timeout, llm_retries=args.llm_retries,
+             push_url=args.push_url, refine=not args.no_refine,
+             get_blip=blip_loader(args.caption_worker, args.quantize)[0],
+             llm_cache_path=None if args.no_llm_cache else Path(args.llm_cache), llm_cache_ttl=args.llm_cache_ttl)
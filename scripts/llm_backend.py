@@ -0,0 +1,185 @@
+"""
+scripts/llm_backend.py
+
+LLM backends used by the summarization pipeline.
+
+ - OllamaHTTPBackend: talks to the Ollama HTTP API (POST /api/generate) over a small
+   pool of keep-alive connections, so every window reuses an open socket and the model
+   stays resident between calls (keep_alive).
+ - OllamaCLIBackend: the original `ollama run <model> <prompt>` subprocess path, kept as
+   a fallback when the HTTP server is not reachable.
+ - map_concurrent: bounded-concurrency thread-pool dispatch that preserves input order.
+
+Both backends expose generate(prompt) -> str and never raise on transport errors:
+they return "" (the HTTP backend after its retries, the CLI on a non-zero exit or a
+timeout, whatever it printed), which the pipeline's JSON extraction already treats as
+"no answer, use the fallback summary" and the LLM cache never stores.
+
+Offline testing: run scripts/ollama_stub_server.py and point --ollama-url at it.
+"""
+from typing import List, Callable, TypeVar, Iterable, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import http.client
+import json
+import os
+import queue
+import subprocess
+import time
+
+from pipeline_metrics import metrics
+
+DEFAULT_OLLAMA_URL = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 2
+DEFAULT_CONCURRENCY = 4
+DEFAULT_KEEP_ALIVE = "10m"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_ollama_cli(model: str, prompt: str, timeout: int = DEFAULT_TIMEOUT) -> str:
+    """Call: ollama run <model> <prompt> via subprocess and return stdout text ("" if it fails or times out)."""
+    cmd = ["ollama", "run", model, prompt]
+    with metrics.timer("stage_seconds", stage="llm_call", backend="cli"):
+        try:
+            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True, timeout=timeout)
+            return out
+        except subprocess.CalledProcessError as e:
+            # the output is an error message ("Error: pull model manifest ..."), not an answer
+            metrics.inc("llm_errors_total", backend="cli", error="exit_status")
+            print(f"[LLM] `ollama run` exited with status {e.returncode}: {(e.output or '').strip()[:200]}")
+            return ""
+        except subprocess.TimeoutExpired:
+            metrics.inc("llm_errors_total", backend="cli", error="timeout")
+            print(f"[LLM] `ollama run` timed out after {timeout}s")
+            return ""
+        except FileNotFoundError:
+            metrics.inc("llm_errors_total", backend="cli", error="not_found")
+            print("[LLM] `ollama` executable not found on PATH")
+            return ""
+
+
+class OllamaCLIBackend:
+    name = "cli"
+
+    def __init__(self, model: str, timeout: int = DEFAULT_TIMEOUT):
+        self.model = model
+        self.timeout = timeout
+
+    def generate(self, prompt: str) -> str:
+        return run_ollama_cli(self.model, prompt, timeout=self.timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class OllamaHTTPBackend:
+    name = "http"
+
+    def __init__(self, model: str, base_url: str = DEFAULT_OLLAMA_URL, timeout: int = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = 0.5, pool_size: int = DEFAULT_CONCURRENCY,
+                 options: Optional[Dict[str, Any]] = None):
+        if "://" not in base_url:
+            base_url = "http://" + base_url
+        parts = urlsplit(base_url)
+        self.model = model
+        self.scheme = parts.scheme
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 11434)
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.options = options or {}
+        # idle keep-alive connections; at most pool_size are kept, extra ones are closed
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _new_conn(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_conn()
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """One JSON request on a pooled connection; raises on HTTP/transport errors."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        conn = self._acquire()
+        try:
+            conn.request(method, self.base_path + path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def available(self) -> bool:
+        try:
+            self.request("GET", "/api/tags")
+            return True
+        except Exception:
+            return False
+
+    def generate(self, prompt: str) -> str:
+        payload = {"model": self.model, "prompt": prompt, "stream": False, "keep_alive": DEFAULT_KEEP_ALIVE}
+        if self.options:
+            payload["options"] = self.options
+        with metrics.timer("stage_seconds", stage="llm_call", backend="http"):
+            for attempt in range(self.retries + 1):
+                try:
+                    return self.request("POST", "/api/generate", payload).get("response", "")
+                except Exception as e:
+                    if attempt == self.retries:
+                        metrics.inc("llm_errors_total", backend="http", error="gave_up")
+                        print(f"[LLM] generate failed after {attempt + 1} attempt(s): {e}")
+                        return ""
+                    metrics.inc("llm_errors_total", backend="http", error="retried")
+                    time.sleep(self.backoff * (2 ** attempt))
+        return ""
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def make_backend(kind: str, model: str, base_url: str = DEFAULT_OLLAMA_URL, timeout: int = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, concurrency: int = DEFAULT_CONCURRENCY):
+    """kind: "http", "cli", or "auto" (HTTP if the server answers, else the CLI)."""
+    if kind == "cli":
+        return OllamaCLIBackend(model, timeout=timeout)
+    backend = OllamaHTTPBackend(model, base_url=base_url, timeout=timeout, retries=retries, pool_size=concurrency)
+    if kind == "auto" and not backend.available():
+        print(f"[LLM] no Ollama HTTP server at {base_url}; falling back to `ollama run`")
+        return OllamaCLIBackend(model, timeout=timeout)
+    return backend
+
+
+def map_concurrent(fn: Callable[[T], R], items: Iterable[T], max_workers: int = DEFAULT_CONCURRENCY) -> List[R]:
+    """Apply fn to every item with at most max_workers in flight; results keep input order."""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm") as pool:
+        return list(pool.map(fn, items))
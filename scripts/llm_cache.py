@@ -0,0 +1,190 @@
+"""
+scripts/llm_cache.py
+
+Persistent cache of LLM responses, with in-flight coalescing.
+
+Entries are keyed by sha256(model | prompt template version | normalized prompt).
+Normalization collapses whitespace. For window prompts it also drops the "[12.0s]"
+timestamp markers, so a static camera whose BLIP captions repeat ("a parking lot with
+cars parked") gets one LLM call per distinct caption list instead of one per window.
+The pipeline only keeps summary/confidence from a window answer; the evidence comes
+from its own captions. The summary text itself is shared as is: if the model quotes
+times in it ("a car arrives at 12.0s"), a window served from the cache carries the
+times of the window that was generated first. Callers that need exact times in the
+summary should not pass strip_timestamps. Bump a template version (pipeline_blip_ollama.PROMPT_VERSIONS)
+whenever a prompt's wording changes, so old answers are never served for it.
+
+Stored in one SQLite file like caption_cache.py. Entries older than `ttl` seconds are
+misses (and are deleted); past max_entries the least recently used entries are evicted.
+Empty responses (the backends' "no answer") are never stored, nor are responses the
+caller's `cacheable` check rejects (the pipeline only stores answers it can parse). The file may be shared
+by several pipeline runs (WAL, busy timeout); a cache write that still fails is logged
+and counted in write_errors, and the response is returned uncached.
+
+Identical prompts that are in flight at the same time share one call: the first
+caller generates, the others wait for its answer (counted as "coalesced").
+
+Usage:
+    cache = LLMCache(Path("data/cache/llm.sqlite"))
+    raw = cache.generate(model, "window/1", prompt, backend.generate, strip_timestamps=True)
+    print(cache.stats())
+"""
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import contextlib
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+from pipeline_metrics import metrics
+
+DEFAULT_LLM_CACHE_PATH = Path("data") / "cache" / "llm.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600.0
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+_SPACE = re.compile(r"\s+")
+_TIMESTAMP = re.compile(r"\[\d+(?:\.\d+)?s\]\s*")
+
+
+def normalize_prompt(prompt: str, strip_timestamps: bool = False) -> str:
+    if strip_timestamps:
+        prompt = _TIMESTAMP.sub("", prompt)
+    return _SPACE.sub(" ", prompt).strip()
+
+
+class LLMCache:
+    def __init__(self, db_path: Path = DEFAULT_LLM_CACHE_PATH, ttl: Optional[float] = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+        self.write_errors = 0
+        self.rejected = 0   # answers not stored because cacheable() refused them
+        # generate() is called from map_concurrent's threads: one connection, one lock
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=busy_timeout_ms / 1000)
+        self.conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def key_for(model: str, template: str, prompt: str, strip_timestamps: bool = False) -> str:
+        text = f"{model}|{template}|{normalize_prompt(prompt, strip_timestamps)}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> Optional[str]:
+        """Caller holds the lock."""
+        row = self.conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if self.ttl is not None and now - row[1] > self.ttl:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+            self.expired += 1
+            return None
+        self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        return row[0]
+
+    def _put(self, key: str, response: str) -> None:
+        """Caller holds the lock."""
+        now = time.time()
+        self.conn.execute("INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                          (key, response, now, now))
+        count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (excess,))
+            self.evictions += excess
+        self.conn.commit()
+
+    def generate(self, model: str, template: str, prompt: str, generate: Callable[[str], str],
+                 strip_timestamps: bool = False, cacheable: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        The cached response to prompt, else generate(prompt) - once, however many callers ask at once.
+        A generated response is stored only if it is non-empty and cacheable(response) (when given) is true.
+        """
+        key = self.key_for(model, template, prompt, strip_timestamps)
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                cached = self._get(key)
+                if cached is not None:
+                    self.hits += 1
+                    metrics.inc("llm_cache_total", result="hit")
+                    return cached
+                self.misses += 1
+                owner = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if waiting is not None:
+            metrics.inc("llm_cache_total", result="coalesced")
+            return waiting.result()
+        metrics.inc("llm_cache_total", result="miss")
+        try:
+            response = generate(prompt)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            owner.set_exception(e)
+            raise
+        with self._lock:
+            try:
+                if response and (cacheable is None or cacheable(response)):
+                    self._put(key, response)
+                elif response:
+                    self.rejected += 1
+            except sqlite3.Error as e:
+                # e.g. "database is locked" past the busy timeout: the answer is still good
+                self.write_errors += 1
+                print(f"[LLM cache] could not store a response: {e}")
+                with contextlib.suppress(sqlite3.Error):
+                    self.conn.rollback()
+            finally:
+                # always release the waiters, whatever happened to the write
+                self._inflight.pop(key, None)
+                owner.set_result(response)
+        return response
+
+    def stats(self, since: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Counters (since an earlier stats() result, when given) and the current entry count.
+        hit_rate counts coalesced calls as hits: they did not cost an LLM call either.
+        """
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        out = {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "expired": self.expired,
+               "evictions": self.evictions, "write_errors": self.write_errors, "rejected": self.rejected}
+        if since is not None:
+            out = {k: v - since.get(k, 0) for k, v in out.items()}
+        total = out["hits"] + out["misses"] + out["coalesced"]
+        out["entries"] = entries
+        out["hit_rate"] = ((out["hits"] + out["coalesced"]) / total) if total else 0.0
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -1,33 +1,28 @@
 """
 A tiny mock captioner for development.
-Reads data/processed/<video>/metadata.json and returns simple templated captions per frame/window.
+Reads the frame index of data/processed/<video> and returns simple templated captions per frame/window.
 """
 import json
 from pathlib import Path
 from datetime import datetime
 
-def load_metadata(video_processed_dir: Path):
-    meta_file = video_processed_dir / "metadata.json"
-    with open(meta_file, encoding="utf-8") as fh:
-        return json.load(fh)
+from frame_index import FrameIndex
+from windowing import iter_window_ranges
 
-def simple_aggregate_captions(metadata, window=20.0):
-    frames = metadata["frames"]
-    if not frames:
+def load_metadata(video_processed_dir: Path) -> FrameIndex:
+    return FrameIndex.load(video_processed_dir)
+
+def simple_aggregate_captions(index: FrameIndex, window=20.0):
+    if not len(index):
         return []
     caps = []
-    last_ts = frames[-1]["ts"]
-    start = 0.0
-    while start <= last_ts:
-        end = start + window
-        texts = [f for f in frames if start <= f["ts"] < end]
-        if texts:
+    for start, end, lo, hi in iter_window_ranges(index.ts, window, window):
+        if hi > lo:
             caps.append({
                 "start": start,
                 "end": end,
-                "summary": f"{len(texts)} sampled frames between {start:.1f}s and {end:.1f}s (demo summary)."
+                "summary": f"{hi - lo} sampled frames between {start:.1f}s and {end:.1f}s (demo summary)."
             })
-        start = end
     return caps
 
 if __name__ == "__main__":
@@ -39,10 +34,10 @@ if __name__ == "__main__":
     video_dir = Path(args.video_processed_dir)
     if not video_dir.exists():
         raise SystemExit("Processed directory not found: " + str(video_dir))
-    meta = load_metadata(video_dir)
-    captions = simple_aggregate_captions(meta, window=args.window)
+    index = load_metadata(video_dir)
+    captions = simple_aggregate_captions(index, window=args.window)
     out = {
-        "video": meta.get("video"),
+        "video": index.video,
         "generated_at": datetime.utcnow().isoformat() + "Z",
         "captions": captions
     }
@@ -0,0 +1,99 @@
+"""
+A tiny stand-in for the Ollama HTTP API, for offline development and tests.
+Implements GET /api/tags and POST /api/generate (non-streaming). The "summary" is the
+caption lines found in the prompt joined together, wrapped in <JSON_START>/<JSON_END>
+like a well-behaved model would answer.
+
+Usage:
+    python scripts/ollama_stub_server.py --port 11434 --latency 0.2
+    python scripts/pipeline_blip_ollama.py data/processed/EJFBM --ollama-url http://127.0.0.1:11434
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Tuple
+import json
+import re
+import threading
+import time
+
+CAPTION_LINE = re.compile(r"^- (?:\[(?P<ts>[\d.]+)s\] )?(?P<text>.*)$")
+
+
+def fake_completion(prompt: str) -> str:
+    evidence = []
+    for line in prompt.splitlines():
+        m = CAPTION_LINE.match(line)
+        if m:
+            evidence.append({"ts": float(m.group("ts") or 0.0), "text": m.group("text")})
+    summary = "; ".join(dict.fromkeys(e["text"] for e in evidence)) or "no activity"
+    body = {"summary": summary, "evidence": evidence, "confidence": 0.5 if evidence else 0.0}
+    return "<JSON_START>\n" + json.dumps(body) + "\n<JSON_END>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real server
+
+    def _send_json(self, status: int, payload) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "stub:latest"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            fail = server.fail_next > 0
+            if fail:
+                server.fail_next -= 1
+        if fail:
+            self._send_json(500, {"error": "injected failure"})
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        self._send_json(200, {"model": body.get("model"), "response": fake_completion(body.get("prompt", "")),
+                              "done": True})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                      fail_next: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a daemon thread; returns (server, base_url). Call server.shutdown() when done."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_next = fail_next
+    server.calls = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--host", type=str, default="127.0.0.1")
+    p.add_argument("--port", type=int, default=11434)
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per generate call")
+    args = p.parse_args()
+    server, url = start_stub_server(args.host, args.port, latency=args.latency)
+    print("Ollama stub listening on", url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
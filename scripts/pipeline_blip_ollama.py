@@ -2,17 +2,28 @@
 scripts/pipeline_blip_ollama.py
 
 Pipeline:
- - read data/processed/<video>/metadata.json
+ - read the frame index of data/processed/<video> (frame_index.py; metadata.json-only dirs are converted)
  - build overlapping windows (window_size, stride)
- - sample N frames per window (start/mid/end)
- - caption each sampled frame using BLIP (Salesforce/blip-image-captioning-base)
- - summarize each window by calling Ollama (local LLM) via CLI with strict JSON markers
- - merge overlapping/adjacent window summaries
+ - sample N frames per window (start/mid/end; or, with --adaptive-frames, up to N where the motion is)
+ - caption every unique sampled frame once, in batches, using BLIP (Salesforce/blip-image-captioning-base)
+ - summarize each window by calling Ollama (local LLM) with strict JSON markers, several windows
+   at a time over the Ollama HTTP API (falls back to the `ollama run` CLI)
+ - merge overlapping/adjacent window summaries (segments capped at --segment-span seconds)
  - optionally refine merged summaries with Ollama
- - save final JSON report to data/reports/<video>_summaries.json
+ - reduce the segments level by level into hour-level and whole-video digests (hierarchical.py)
+ - LLM answers are cached on disk and identical prompts in flight share one call (llm_cache.py)
+ - save final JSON report to data/reports/<video>_summaries.json (or --push-url it to the reports API)
 
 Usage:
     python scripts/pipeline_blip_ollama.py data/processed/EJFBM --window 20 --stride 10 --frames-per-window 3
+    python scripts/pipeline_blip_ollama.py data/processed/EJFBM --caption-batch-size 16
+    python scripts/pipeline_blip_ollama.py data/processed/EJFBM --no-caption-cache
+    python scripts/pipeline_blip_ollama.py data/processed/EJFBM --llm-backend http --llm-concurrency 4
+    python scripts/pipeline_blip_ollama.py data/raw/EJFBM.mp4 --stream --fps 1 [--save-frames]
+    python scripts/pipeline_blip_ollama.py data/processed/EJFBM --caption-worker 127.0.0.1:18765   # see caption_worker.py
+
+torch/transformers are imported when a BlipWrapper is built, not at import time: --help,
+fully cached runs and runs against a caption worker never load them.
 
 Requirements:
     .venv active
@@ -20,17 +31,31 @@ Requirements:
     ollama installed and models available (e.g., qwen3:8b)
 """
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Sequence, Tuple
 import json
 from PIL import Image
 import argparse
 from datetime import datetime, timezone
-import subprocess
 import math
-import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import numpy as np
+
+from caption_cache import CaptionCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, file_digest
+from extract_frames import iter_frames, open_video, FrameWriter, safe_name
+from frame_index import FrameIndex
+from frame_store import PackReader
+from windowing import iter_window_ranges
+from hierarchical import summarize_hierarchy, emitted_digests, DEFAULT_FANOUT, DEFAULT_SEGMENT_SPAN
+from adaptive_sampling import MotionProbe, pick_active, DEFAULT_MOTION_THRESHOLD
+from llm_cache import LLMCache, DEFAULT_LLM_CACHE_PATH, DEFAULT_TTL
+from streaming import FrameProducer, RollingWindows, SegmentMerger, pick_indices, DEFAULT_QUEUE_SIZE
+from llm_backend import (run_ollama_cli, make_backend, map_concurrent, DEFAULT_OLLAMA_URL,
+                         DEFAULT_CONCURRENCY, DEFAULT_RETRIES, DEFAULT_TIMEOUT)
 
-# BLIP imports
-from transformers import BlipProcessor, BlipForConditionalGeneration
+from pipeline_metrics import metrics
 
 # ---------- Config ----------
 OLLAMA_MODEL = "qwen3:8b"                        # change to a model you have locally (ollama list)
@@ -39,80 +64,149 @@ DEFAULT_WINDOW = 20.0
 DEFAULT_STRIDE = 10.0
 DEFAULT_FRAMES_PER_WINDOW = 3
 DEFAULT_MERGE_GAP = 2.0
+DEFAULT_CAPTION_BATCH_SIZE = 8
+BLIP_MAX_LENGTH = 40
+REFINE_EVIDENCE = 12              # captions per refine prompt, spread over the segment
+DIGEST_CHILD_CHARS = 400          # per child summary in a digest prompt
+# part of every LLM cache key: bump a version when its prompt builder changes
+PROMPT_VERSIONS = {"window": "window/1", "refine": "refine/1", "digest": "digest/1"}
 DEFAULT_OUTPUT_DIR = Path("data") / "reports"
 
 # ---------- Utilities ----------
-def load_metadata(processed_dir: Path) -> Dict[str, Any]:
-    meta_path = processed_dir / "metadata.json"
-    if not meta_path.exists():
-        raise FileNotFoundError(f"metadata.json not found in {processed_dir}")
-    return json.loads(meta_path.read_text(encoding="utf-8"))
-
-def build_windows(frames: List[Dict[str, Any]], window_size: float, stride: float) -> List[Dict]:
-    if not frames:
-        return []
-    last_ts = frames[-1]["ts"]
-    windows = []
-    start = 0.0
-    while start <= last_ts:
-        end = start + window_size
-        in_frames = [f for f in frames if f["ts"] >= start and f["ts"] < end]
-        windows.append({"start": start, "end": end, "frames": in_frames})
-        start += stride
-    return windows
-
-def sample_frames_for_window(win: Dict, frames_per_window: int) -> List[Path]:
-    in_frames = win["frames"]
-    if not in_frames:
-        return []
-    n = min(frames_per_window, len(in_frames))
-    if n == 1:
-        picks = [in_frames[0]]
-    else:
-        indices = [ round(i*(len(in_frames)-1)/(n-1)) for i in range(n) ]
-        picks = [ in_frames[i] for i in indices ]
-    picked_paths = []
-    for p in picks:
-        pth = Path(p["path"])
-        if not pth.exists():
-            # try relative to processed dir or cwd
-            alt = Path.cwd() / p["path"]
-            if alt.exists():
-                pth = alt
-            else:
-                # fallback: try processed dir name
-                pth = Path.cwd() / p["path"]
-        picked_paths.append(pth)
-    return picked_paths
+def load_metadata(processed_dir: Path) -> FrameIndex:
+    """The frame index of processed_dir, memory-mapped (metadata.json-only dirs are converted once)."""
+    return FrameIndex.load(processed_dir)
+
+def build_windows(ts: Sequence[float], window_size: float, stride: float) -> List[Dict]:
+    """
+    Windows as {"start", "end", "lo", "hi"}: frames lo..hi-1 are the frames in [start, end).
+    ts must be ascending (a FrameIndex.ts column is).
+    """
+    return [{"start": start, "end": end, "lo": lo, "hi": hi}
+            for start, end, lo, hi in iter_window_ranges(ts, window_size, stride)]
+
+def pick_window_frames(win: Dict, frames_per_window: int, motion: Optional[np.ndarray] = None,
+                       motion_threshold: float = DEFAULT_MOTION_THRESHOLD) -> List[int]:
+    """
+    Positions of the evenly spaced (start/mid/end) frames of one window - or, given the
+    index's motion column, of at most frames_per_window frames where the motion is
+    (a single one for a quiet window, see adaptive_sampling.pick_active).
+    """
+    if motion is not None:
+        return [win["lo"] + i for i in pick_active(motion[win["lo"]:win["hi"]], frames_per_window, motion_threshold)]
+    return [win["lo"] + i for i in pick_indices(win["hi"] - win["lo"], frames_per_window)]
 
 # ---------- BLIP wrapper ----------
 class BlipWrapper:
-    def __init__(self, model_name: str = BLIP_MODEL_NAME, device: str = "cpu"):
-        print(f"[BLIP] loading {model_name} (device={device}) ...")
+    def __init__(self, model_name: str = BLIP_MODEL_NAME, device: str = "cpu", quantize: bool = False):
+        """quantize: dynamic int8 quantization of the Linear layers (CPU only; faster, captions may differ)."""
+        print(f"[BLIP] loading {model_name} (device={device}{', int8' if quantize else ''}) ...")
+        t0 = time.perf_counter()
+        import torch   # deferred: importing torch + transformers alone takes seconds
+        from transformers import BlipProcessor, BlipForConditionalGeneration
+        self._torch = torch
         self.processor = BlipProcessor.from_pretrained(model_name)
-        self.model = BlipForConditionalGeneration.from_pretrained(model_name)
+        self.model = BlipForConditionalGeneration.from_pretrained(model_name).eval()
         # model.to(device)  # Leave on CPU by default; uncomment for GPU
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model_name = model_name
         self.device = device
+        self.quantized = quantize
+        self.load_s = time.perf_counter() - t0
+        metrics.observe("stage_seconds", self.load_s, stage="model_load")
+        print(f"[BLIP] loaded in {self.load_s:.1f}s")
 
     def caption(self, image_path: Path) -> str:
-        img = Image.open(image_path).convert("RGB")
-        inputs = self.processor(images=img, return_tensors="pt")
-        outputs = self.model.generate(**inputs, max_length=40)
-        caption = self.processor.decode(outputs[0], skip_special_tokens=True)
-        return caption
-
-# ---------- Ollama CLI helpers (robust JSON extraction) ----------
-def run_ollama_cli(model: str, prompt: str, timeout: int = 60) -> str:
-    """Call: ollama run <model> <prompt> via subprocess and return stdout text."""
-    cmd = ["ollama", "run", model, prompt]
-    try:
-        out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True, timeout=timeout)
-        return out
-    except subprocess.CalledProcessError as e:
-        return e.output or ""
-    except subprocess.TimeoutExpired as e:
-        return e.output or ""
+        return self.caption_batch([image_path])[0]
+
+    def caption_batch(self, image_paths: List[Path]) -> List[str]:
+        """Caption several images with a single processor/generate call."""
+        images = []
+        with metrics.timer("stage_seconds", stage="image_load"):
+            for p in image_paths:
+                with Image.open(p) as img:
+                    images.append(img.convert("RGB"))
+        return self.caption_images(images)
+
+    def caption_images(self, images: List[Image.Image]) -> List[str]:
+        """Caption already-decoded RGB images (the streaming path never touches disk)."""
+        with metrics.timer("stage_seconds", stage="caption_batch"):
+            inputs = self.processor(images=images, return_tensors="pt")
+            with self._torch.inference_mode():
+                outputs = self.model.generate(**inputs, max_length=BLIP_MAX_LENGTH)
+            captions = [self.processor.decode(o, skip_special_tokens=True) for o in outputs]
+        metrics.inc("stage_items_total", len(images), stage="caption_batch")
+        return captions
+
+def caption_cache_params(quantized: bool = False) -> Dict[str, Any]:
+    """Generation settings that go into the caption cache key (int8 captions are cached apart)."""
+    params: Dict[str, Any] = {"max_length": BLIP_MAX_LENGTH}
+    if quantized:
+        params["quantize"] = "int8"
+    return params
 
+def blip_loader(caption_worker: Optional[str] = None,
+                quantize: bool = False) -> Tuple[Callable[[], Any], bool, str]:
+    """
+    (get_blip, quantized, model_name) for the caption stage. With caption_worker
+    ("host:port" etc.), the captioner is a client of that resident process; if nothing
+    answers there, the model is loaded in-process as usual. quantized and model_name are
+    what the captioner really runs (the worker decides for itself), for the caption cache key.
+    """
+    if caption_worker:
+        from multiprocessing import AuthenticationError
+        from caption_worker import CaptionClient
+        try:
+            client = CaptionClient(caption_worker)
+            print(f"[BLIP] using caption worker at {caption_worker} ({client.model_name}, "
+                  f"quantized={client.quantized})")
+            return (lambda: client), client.quantized, client.model_name
+        except (OSError, EOFError, AuthenticationError) as e:
+            print(f"[BLIP] no caption worker at {caption_worker} ({e}); loading the model in-process")
+    return functools.partial(BlipWrapper, BLIP_MODEL_NAME, quantize=quantize), quantize, BLIP_MODEL_NAME
+
+def caption_frames(blip: BlipWrapper, paths: List[Any], batch_size: int = DEFAULT_CAPTION_BATCH_SIZE,
+                   load_images: Optional[Callable[[List[Any]], List[Image.Image]]] = None) -> Dict[Any, str]:
+    """
+    Caption each unique path exactly once, batch_size images at a time.
+    With load_images, paths are opaque refs (e.g. pack record numbers) that it turns into
+    RGB images for blip.caption_images.
+    Returns {path: caption}; frames that fail to load or caption map to "".
+    """
+    unique = list(dict.fromkeys(paths))
+    captions: Dict[Any, str] = {}
+    batch_size = max(1, batch_size)
+
+    def caption_batch(batch: List[Any]) -> List[str]:
+        if load_images is None:
+            return blip.caption_batch(batch)
+        return blip.caption_images(load_images(batch))
+
+    t0 = time.perf_counter()
+    for i in range(0, len(unique), batch_size):
+        batch = unique[i:i + batch_size]
+        try:
+            results = caption_batch(batch)
+        except Exception as e:
+            # one bad frame should not cost the whole batch: retry individually
+            print(f"[BLIP] batch of {len(batch)} failed ({e}); captioning one by one")
+            results = []
+            for p in batch:
+                try:
+                    results.append(blip.caption(p) if load_images is None else caption_batch([p])[0])
+                except Exception as e2:
+                    print("[BLIP] failed to caption", p, e2)
+                    results.append("")
+        captions.update(zip(batch, results))
+    elapsed = time.perf_counter() - t0
+    if unique:
+        rate = len(unique) / elapsed if elapsed > 0 else float("inf")
+        print(f"[BLIP] captioned {len(unique)} unique frames in {elapsed:.2f}s "
+              f"({rate:.2f} images/sec, batch size {batch_size})")
+    return captions
+
+# ---------- Ollama helpers (robust JSON extraction) ----------
 def extract_between_markers(text: str, start_marker: str = "<JSON_START>", end_marker: str = "<JSON_END>") -> Optional[str]:
     s = text.find(start_marker)
     e = text.find(end_marker, s + len(start_marker)) if s != -1 else -1
@@ -139,11 +233,7 @@ def extract_first_json(text: str) -> Optional[str]:
                 return text[start:i+1]
     return None
 
-def call_ollama_summarize(model: str, frames_captioned: List[Dict[str, Any]], timeout: int = 60) -> Dict[str, Any]:
-    """
-    frames_captioned: [{"ts": float, "caption": str}, ...]
-    Returns parsed JSON or fallback {"summary":..., "evidence":..., "confidence":0.0}
-    """
+def build_window_prompt(frames_captioned: List[Dict[str, Any]]) -> str:
     lines = [
         "You are a JSON-only summarizer for short surveillance windows.",
         "DO NOT output any explanations, reasoning, or commentary.",
@@ -157,9 +247,9 @@ def call_ollama_summarize(model: str, frames_captioned: List[Dict[str, Any]], ti
     ]
     for f in frames_captioned:
         lines.append(f"- [{f['ts']:.1f}s] {f['caption']}")
-    prompt = "\n".join(lines)
+    return "\n".join(lines)
 
-    raw = run_ollama_cli(model, prompt, timeout=timeout)
+def parse_window_response(raw: str, frames_captioned: List[Dict[str, Any]]) -> Dict[str, Any]:
     json_text = extract_first_json(raw)
     if json_text:
         try:
@@ -174,107 +264,226 @@ def call_ollama_summarize(model: str, frames_captioned: List[Dict[str, Any]], ti
     summary = " ".join([f["caption"] for f in frames_captioned])[:400]
     return {"summary": summary, "evidence": frames_captioned, "confidence": 0.0}
 
-def refine_merged_with_ollama(merged: List[Dict], model: str, timeout: int = 60) -> List[Dict]:
+def has_json_answer(raw: str) -> bool:
+    """True if raw holds a JSON object the parse_*_response helpers can use (worth caching)."""
+    json_text = extract_first_json(raw)
+    if not json_text:
+        return False
+    try:
+        return isinstance(json.loads(json_text), dict)
+    except ValueError:
+        return False
+
+def llm_generate(model: str, prompt: str, template: str, timeout: int = 60, backend=None,
+                 cache: Optional[LLMCache] = None) -> str:
+    """
+    Send prompt to backend (default: the `ollama run` CLI), through cache when given.
+    template is a PROMPT_VERSIONS key; window prompts are cached without their timestamps.
+    Only answers with a parsable JSON object are cached: error text or a truncated answer
+    would otherwise be served as a hit for the whole TTL.
+    """
+    def run(p: str) -> str:
+        return backend.generate(p) if backend is not None else run_ollama_cli(model, p, timeout=timeout)
+    if cache is None:
+        return run(prompt)
+    return cache.generate(model, PROMPT_VERSIONS[template], prompt, run, strip_timestamps=template == "window",
+                          cacheable=has_json_answer)
+
+def call_ollama_summarize(model: str, frames_captioned: List[Dict[str, Any]], timeout: int = 60,
+                          backend=None, cache: Optional[LLMCache] = None) -> Dict[str, Any]:
+    """
+    frames_captioned: [{"ts": float, "caption": str}, ...]
+    backend: an llm_backend object with generate(prompt); defaults to the `ollama run` CLI.
+    Returns parsed JSON or fallback {"summary":..., "evidence":..., "confidence":0.0}
+    """
+    with metrics.timer("stage_seconds", stage="summarize_window"):
+        prompt = build_window_prompt(frames_captioned)
+        raw = llm_generate(model, prompt, "window", timeout=timeout, backend=backend, cache=cache)
+        return parse_window_response(raw, frames_captioned)
+
+def build_refine_prompt(item: Dict) -> str:
+    evidence = item.get("evidence", []) or []
+    lines = [
+        "You are a JSON-only concise summarizer. Do NOT output explanations.",
+        "Given the evidence (timestamps included), produce a single concise 1-2 sentence summary.",
+        "Return EXACTLY one JSON object between <JSON_START> and <JSON_END> with keys: summary, evidence, confidence.",
+        "<JSON_START>",
+        '{"summary":"...","evidence":[{"ts":0.0,"text":"..."}],"confidence":0.0}',
+        "<JSON_END>"
+    ]
+    # evenly spaced over the whole segment, not just its first captions
+    for e in [evidence[i] for i in pick_indices(len(evidence), REFINE_EVIDENCE)]:
+        text = e.get("caption") if isinstance(e, dict) else str(e)
+        ts = e.get("ts", None) if isinstance(e, dict) else None
+        if ts is not None:
+            lines.append(f"- [{ts:.1f}s] {text}")
+        else:
+            lines.append(f"- {text}")
+    return "\n".join(lines)
+
+def parse_refine_response(raw: str, item: Dict) -> Dict:
+    json_text = extract_first_json(raw)
+    if json_text:
+        try:
+            parsed = json.loads(json_text)
+            return {
+                "start": item["start"],
+                "end": item["end"],
+                "summary": parsed.get("summary", item.get("summary","")),
+                "evidence": item.get("evidence", []),
+                "confidence": parsed.get("confidence", 0.0)
+            }
+        except Exception:
+            pass
+    return {
+        "start": item["start"],
+        "end": item["end"],
+        "summary": item.get("summary",""),
+        "evidence": item.get("evidence", []),
+        "confidence": 0.0
+    }
+
+def refine_merged_with_ollama(merged: List[Dict], model: str, timeout: int = 60,
+                              backend=None, concurrency: int = 1, cache: Optional[LLMCache] = None) -> List[Dict]:
     """Rewrite combined merged summaries into concise single-sentence outputs via Ollama."""
-    refined = []
-    for item in merged:
-        evidence = item.get("evidence", []) or []
-        lines = [
-            "You are a JSON-only concise summarizer. Do NOT output explanations.",
-            "Given the evidence (timestamps included), produce a single concise 1-2 sentence summary.",
-            "Return EXACTLY one JSON object between <JSON_START> and <JSON_END> with keys: summary, evidence, confidence.",
-            "<JSON_START>",
-            '{"summary":"...","evidence":[{"ts":0.0,"text":"..."}],"confidence":0.0}',
-            "<JSON_END>"
-        ]
-        for e in evidence[:12]:
-            text = e.get("caption") if isinstance(e, dict) else str(e)
-            ts = e.get("ts", None) if isinstance(e, dict) else None
-            if ts is not None:
-                lines.append(f"- [{ts:.1f}s] {text}")
-            else:
-                lines.append(f"- {text}")
-        prompt = "\n".join(lines)
-        raw = run_ollama_cli(model, prompt, timeout=timeout)
-        json_text = extract_first_json(raw)
-        if json_text:
-            try:
-                parsed = json.loads(json_text)
-                refined.append({
-                    "start": item["start"],
-                    "end": item["end"],
-                    "summary": parsed.get("summary", item.get("summary","")),
-                    "evidence": item.get("evidence", []),
-                    "confidence": parsed.get("confidence", 0.0)
-                })
-                continue
-            except Exception:
-                pass
-        refined.append({
-            "start": item["start"],
-            "end": item["end"],
-            "summary": item.get("summary",""),
-            "evidence": item.get("evidence", []),
-            "confidence": 0.0
-        })
-    return refined
+    def refine_one(item: Dict) -> Dict:
+        with metrics.timer("stage_seconds", stage="refine"):
+            prompt = build_refine_prompt(item)
+            raw = llm_generate(model, prompt, "refine", timeout=timeout, backend=backend, cache=cache)
+            return parse_refine_response(raw, item)
+    return map_concurrent(refine_one, merged, max_workers=concurrency)
+
+def build_digest_prompt(children: List[Dict]) -> str:
+    lines = [
+        "You are a JSON-only summarizer for long surveillance recordings. Do NOT output explanations.",
+        "Given consecutive summaries of parts of one recording (time ranges included), produce a single",
+        "1-3 sentence digest of the whole span covering the notable activity.",
+        "Return EXACTLY one JSON object between <JSON_START> and <JSON_END> with keys: summary, confidence.",
+        "<JSON_START>",
+        '{"summary":"...","confidence":0.0}',
+        "<JSON_END>"
+    ]
+    for c in children:
+        lines.append(f"- [{c['start']:.1f}s-{c['end']:.1f}s] {(c.get('summary') or '')[:DIGEST_CHILD_CHARS]}")
+    return "\n".join(lines)
+
+def parse_digest_response(raw: str, children: List[Dict]) -> Dict[str, Any]:
+    json_text = extract_first_json(raw)
+    if json_text:
+        try:
+            parsed = json.loads(json_text)
+            if isinstance(parsed, dict) and parsed.get("summary"):
+                return {"summary": str(parsed["summary"]), "confidence": parsed.get("confidence", 0.0)}
+        except Exception:
+            pass
+    # fallback - the start of every child, still bounded
+    share = max(1, DIGEST_CHILD_CHARS // max(1, len(children)))
+    return {"summary": " ".join((c.get("summary") or "")[:share] for c in children if c.get("summary")),
+            "confidence": 0.0}
+
+def digest_with_ollama(children: List[Dict], model: str, timeout: int = 60, backend=None,
+                       cache: Optional[LLMCache] = None) -> Dict[str, Any]:
+    """One reduce step of the hierarchy: a digest of consecutive segments/digests."""
+    with metrics.timer("stage_seconds", stage="digest"):
+        prompt = build_digest_prompt(children)
+        raw = llm_generate(model, prompt, "digest", timeout=timeout, backend=backend, cache=cache)
+        return parse_digest_response(raw, children)
 
 # ---------- Merging logic ----------
-def merge_summaries(windows: List[Dict], merge_gap: float = DEFAULT_MERGE_GAP) -> List[Dict]:
-    if not windows:
-        return []
-    windows = sorted(windows, key=lambda w: w["start"])
+@metrics.timed("stage_seconds", stage="merge")
+def merge_summaries(windows: List[Dict], merge_gap: float = DEFAULT_MERGE_GAP,
+                    max_span: Optional[float] = None) -> List[Dict]:
+    """Merge overlapping/adjacent windows; with max_span no segment grows past max_span seconds."""
+    merger = SegmentMerger(merge_gap, max_span=max_span)
     merged = []
-    cur = {"start": windows[0]["start"], "end": windows[0]["end"],
-           "summaries": [windows[0].get("summary","")], "evidence": windows[0].get("evidence", [])}
-    for w in windows[1:]:
-        if w["start"] <= cur["end"] or (w["start"] - cur["end"]) <= merge_gap:
-            cur["end"] = max(cur["end"], w["end"])
-            cur["summaries"].append(w.get("summary",""))
-            cur["evidence"].extend(w.get("evidence", []))
-        else:
-            combined_text = " ".join(s for s in cur["summaries"] if s)
-            merged.append({"start": cur["start"], "end": cur["end"], "summary": combined_text, "evidence": cur["evidence"]})
-            cur = {"start": w["start"], "end": w["end"], "summaries": [w.get("summary","")], "evidence": w.get("evidence", [])}
-    combined_text = " ".join(s for s in cur["summaries"] if s)
-    merged.append({"start": cur["start"], "end": cur["end"], "summary": combined_text, "evidence": cur["evidence"]})
+    for w in sorted(windows, key=lambda w: w["start"]):
+        merged.extend(merger.add(w))
+    merged.extend(merger.flush())
     return merged
 
 # ---------- Main pipeline ----------
-def run_pipeline(processed_dir: Path,
-                 window_size: float = DEFAULT_WINDOW,
-                 stride: float = DEFAULT_STRIDE,
-                 frames_per_window: int = DEFAULT_FRAMES_PER_WINDOW,
-                 merge_gap: float = DEFAULT_MERGE_GAP,
-                 ollama_model: str = OLLAMA_MODEL):
-    print("Loading metadata...")
-    meta = load_metadata(processed_dir)
-    frames = meta.get("frames", [])
-    windows = build_windows(frames, window_size=window_size, stride=stride)
-    print(f"Built {len(windows)} windows (window={window_size}s stride={stride}s)")
+def caption_windows(processed_dir: Path,
+                    window_size: float = DEFAULT_WINDOW,
+                    stride: float = DEFAULT_STRIDE,
+                    frames_per_window: int = DEFAULT_FRAMES_PER_WINDOW,
+                    get_blip: Callable[[], BlipWrapper] = BlipWrapper,
+                    caption_batch_size: int = DEFAULT_CAPTION_BATCH_SIZE,
+                    caption_cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+                    caption_cache_max_entries: int = DEFAULT_MAX_ENTRIES,
+                    blip_quantized: bool = False,
+                    blip_model: str = BLIP_MODEL_NAME,
+                    adaptive: bool = False,
+                    motion_threshold: float = DEFAULT_MOTION_THRESHOLD) -> Dict[str, Any]:
+    """
+    Captioning stage: build windows, sample frames and caption them.
+    get_blip is only called when some frame is not cached (pass a shared loader to reuse one model);
+    blip_quantized and blip_model say what model it yields (see blip_loader), for the cache key.
+    adaptive: pick frames by the index's motion column (indexes without one: evenly spaced).
+    Returns {"video", "windows", "captioned": [[{"ts", "caption"}, ...] per window], "frames_captioned"}.
+    """
+    print("Loading frame index...")
+    index = load_metadata(processed_dir)
+    windows = build_windows(index.ts, window_size=window_size, stride=stride)
+    print(f"Built {len(windows)} windows over {len(index)} frames (window={window_size}s stride={stride}s)")
+
+    motion = None
+    if adaptive:
+        motion = np.asarray(index.motion) if index.motion is not None else None
+        if motion is None:
+            print("[Adaptive] the frame index has no motion energies (re-extract to add them); picking evenly")
+    # Overlapping windows share frames: caption each unique frame once, up front.
+    picked_per_window = [pick_window_frames(win, frames_per_window, motion, motion_threshold) for win in windows]
+    if index.store == "pack":
+        # refs are record numbers of frames.pack; bytes are hashed and decoded from the mmap
+        store = PackReader(index.root)
+        sampled_per_window = [[int(i) for i in picks] for picks in picked_per_window]
+        digest, load_images = store.digest, store.images
+    else:
+        store = None
+        sampled_per_window = [index.paths(picks) for picks in picked_per_window]
+        digest, load_images = file_digest, None
+    all_paths = [p for paths in sampled_per_window for p in paths]
+    print(f"Captioning {len(set(all_paths))} unique frames ({len(all_paths)} window samples) ...")
+    if caption_cache_path is not None:
+        cache = CaptionCache(caption_cache_path, model_name=blip_model,
+                             params=caption_cache_params(blip_quantized), max_entries=caption_cache_max_entries)
+        caption_map, missing = cache.lookup(all_paths, digest=digest)
+        metrics.inc("caption_cache_total", len(caption_map), result="hit")
+        metrics.inc("caption_cache_total", len(missing), result="miss")
+    else:
+        cache = None
+        caption_map, missing = {}, {p: "" for p in all_paths}
+    if missing:
+        # only pay for loading BLIP when some frame is not cached
+        blip = get_blip()
+        new_captions = caption_frames(blip, list(missing), batch_size=caption_batch_size, load_images=load_images)
+        caption_map.update(new_captions)
+        if cache is not None:
+            cache.store({missing[p]: c for p, c in new_captions.items()})
+    if cache is not None:
+        print(f"[Cache] {cache.stats()}")
+        cache.close()
+    if store is not None:
+        store.close()
+
+    captioned_windows = []
+    for picks, paths in zip(picked_per_window, sampled_per_window):
+        captioned_windows.append([{"ts": float(index.ts[i]), "caption": caption_map.get(p, "")}
+                                  for i, p in zip(picks, paths)])
+    return {"video": index.video, "windows": windows, "captioned": captioned_windows,
+            "frames_captioned": len(missing)}
 
-    blip = BlipWrapper()
+def summarize_windows(windows: List[Dict], captioned_windows: List[List[Dict[str, Any]]], ollama_model: str,
+                      backend, llm_concurrency: int = DEFAULT_CONCURRENCY,
+                      llm_cache: Optional[LLMCache] = None) -> List[Dict]:
+    """LLM stage: one summary per window, up to llm_concurrency calls in flight."""
+    print(f"Summarizing {len(windows)} windows via {backend.name} backend (concurrency={llm_concurrency}) ...")
+    summary_objs = map_concurrent(
+        lambda captioned: call_ollama_summarize(ollama_model, captioned, backend=backend, cache=llm_cache),
+        captioned_windows, max_workers=llm_concurrency)
 
     per_window_results = []
-    for i, win in enumerate(windows):
-        sampled_paths = sample_frames_for_window(win, frames_per_window)
-        captioned = []
-        for p in sampled_paths:
-            try:
-                caption = blip.caption(p)
-            except Exception as e:
-                print("[BLIP] failed to caption", p, e)
-                caption = ""
-            ts = None
-            for fr in win["frames"]:
-                if Path(fr["path"]).name == p.name or str(Path.cwd() / fr["path"]).endswith(str(p)):
-                    ts = fr.get("ts", None)
-                    break
-            if ts is None:
-                ts = (win["start"] + win["end"]) / 2.0
-            captioned.append({"ts": ts, "caption": caption})
-
-        summary_obj = call_ollama_summarize(ollama_model, captioned)
+    for i, (win, captioned, summary_obj) in enumerate(zip(windows, captioned_windows, summary_objs)):
         per_window_results.append({
             "start": win["start"],
             "end": win["end"],
@@ -283,28 +492,311 @@ def run_pipeline(processed_dir: Path,
             "confidence": summary_obj.get("confidence", 0.0)
         })
         print(f"[Window {i}] {win['start']:.1f}-{win['end']:.1f}s -> {len(captioned)} captions -> summary length {len(per_window_results[-1]['summary'])}")
+    return per_window_results
 
+def run_pipeline(processed_dir: Path,
+                 window_size: float = DEFAULT_WINDOW,
+                 stride: float = DEFAULT_STRIDE,
+                 frames_per_window: int = DEFAULT_FRAMES_PER_WINDOW,
+                 merge_gap: float = DEFAULT_MERGE_GAP,
+                 ollama_model: str = OLLAMA_MODEL,
+                 caption_batch_size: int = DEFAULT_CAPTION_BATCH_SIZE,
+                 caption_cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+                 caption_cache_max_entries: int = DEFAULT_MAX_ENTRIES,
+                 llm_backend: str = "auto",
+                 ollama_url: str = DEFAULT_OLLAMA_URL,
+                 llm_concurrency: int = DEFAULT_CONCURRENCY,
+                 llm_timeout: int = DEFAULT_TIMEOUT,
+                 llm_retries: int = DEFAULT_RETRIES,
+                 push_url: Optional[str] = None,
+                 caption_worker: Optional[str] = None,
+                 quantize: bool = False,
+                 segment_span: Optional[float] = DEFAULT_SEGMENT_SPAN,
+                 hierarchy_fanout: int = DEFAULT_FANOUT,
+                 llm_cache_path: Optional[Path] = DEFAULT_LLM_CACHE_PATH,
+                 llm_cache_ttl: Optional[float] = DEFAULT_TTL,
+                 adaptive_frames: bool = False,
+                 motion_threshold: float = DEFAULT_MOTION_THRESHOLD):
+    started = metrics.snapshot()
+    get_blip, quantized, blip_model = blip_loader(caption_worker, quantize)
+    stage = caption_windows(processed_dir, window_size=window_size, stride=stride,
+                            frames_per_window=frames_per_window, get_blip=get_blip,
+                            caption_batch_size=caption_batch_size, caption_cache_path=caption_cache_path,
+                            caption_cache_max_entries=caption_cache_max_entries, blip_quantized=quantized,
+                            blip_model=blip_model,
+                            adaptive=adaptive_frames, motion_threshold=motion_threshold)
+
+    backend = make_backend(llm_backend, ollama_model, base_url=ollama_url, timeout=llm_timeout,
+                           retries=llm_retries, concurrency=llm_concurrency)
+    llm_cache = LLMCache(llm_cache_path, ttl=llm_cache_ttl) if llm_cache_path is not None else None
+    per_window_results = summarize_windows(stage["windows"], stage["captioned"], ollama_model, backend,
+                                           llm_concurrency=llm_concurrency, llm_cache=llm_cache)
+    out_path = finalize_report(stage["video"], per_window_results, merge_gap=merge_gap, ollama_model=ollama_model,
+                               backend=backend, llm_concurrency=llm_concurrency, push_url=push_url,
+                               metrics_since=started, segment_span=segment_span, hierarchy_fanout=hierarchy_fanout,
+                               llm_cache=llm_cache)
+    if llm_cache is not None:
+        llm_cache.close()
+    backend.close()
+    return out_path
+
+def push_report(push_url: str, report: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
+    """POST a whole report to the service's /reports/bulk endpoint (one request, one transaction)."""
+    req = urllib.request.Request(push_url.rstrip("/") + "/reports/bulk", data=json.dumps(report).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+def finalize_report(video: Optional[str], per_window_results: List[Dict], merge_gap: float, ollama_model: str,
+                    backend, llm_concurrency: int = DEFAULT_CONCURRENCY,
+                    push_url: Optional[str] = None, metrics_since: Optional[Dict[str, Any]] = None,
+                    segment_span: Optional[float] = DEFAULT_SEGMENT_SPAN,
+                    hierarchy_fanout: int = DEFAULT_FANOUT, llm_cache: Optional[LLMCache] = None,
+                    llm_cache_since: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+    """
+    Merge and refine per-window results, reduce them into digests (hierarchy_fanout < 2:
+    none), then save the final JSON report - or, with push_url, send it to the reports
+    API instead (the file is still written if that fails).
+    With metrics_since (a metrics.snapshot() taken when the run started) the report gets
+    a "timings" summary of every stage since then. With llm_cache the report gets its
+    "llm_cache" stats (since llm_cache_since, a stats() taken when the run started;
+    default: the cache's lifetime). Returns the saved path, or None when the report was
+    pushed.
+    """
     print("Merging overlapping/adjacent windows ...")
-    merged = merge_summaries(per_window_results, merge_gap=merge_gap)
+    merged = merge_summaries(per_window_results, merge_gap=merge_gap, max_span=segment_span)
 
     print("Refining merged summaries with Ollama ...")
-    refined = refine_merged_with_ollama(merged, ollama_model)
+    refined = refine_merged_with_ollama(merged, ollama_model, backend=backend, concurrency=llm_concurrency,
+                                        cache=llm_cache)
+
+    levels = summarize_hierarchy(
+        refined, lambda children: digest_with_ollama(children, ollama_model, backend=backend, cache=llm_cache),
+        fanout=hierarchy_fanout, concurrency=llm_concurrency)
+    digests = emitted_digests(levels)
+    if digests:
+        print(f"Reduced {len(refined)} segments into {len(levels) - 1} digest levels ({len(digests)} digests)")
 
+    report = {"video": video, "generated_at": datetime.now(timezone.utc).isoformat(), "summaries": refined,
+              "digests": digests}
+    if metrics_since is not None and metrics.enabled:
+        # process-wide: concurrent runs in one process (batch_ingest) see each other's stages
+        report["timings"] = metrics.summary(since=metrics_since)
+    if llm_cache is not None:
+        report["llm_cache"] = llm_cache.stats(since=llm_cache_since)
+        print(f"[LLM cache] {report['llm_cache']}")
+    if push_url:
+        try:
+            result = push_report(push_url, report)
+            print(f"Pushed {result.get('segments')} segments to {push_url} (video_id={result.get('video_id')})")
+            return None
+        except Exception as e:
+            print(f"[Push] failed to push report to {push_url}: {e}; writing it to disk instead")
     DEFAULT_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = DEFAULT_OUTPUT_DIR / f"{meta.get('video','video')}_summaries.json"
-    report = {"video": meta.get("video"), "generated_at": datetime.now(timezone.utc).isoformat(), "summaries": refined}
+    out_path = DEFAULT_OUTPUT_DIR / f"{video or 'video'}_summaries.json"
     out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
     print("Saved final summaries to", out_path)
+    return out_path
+
+def run_streaming_pipeline(video_path: Path,
+                           sample_fps: float = 1.0,
+                           window_size: float = DEFAULT_WINDOW,
+                           stride: float = DEFAULT_STRIDE,
+                           frames_per_window: int = DEFAULT_FRAMES_PER_WINDOW,
+                           merge_gap: float = DEFAULT_MERGE_GAP,
+                           ollama_model: str = OLLAMA_MODEL,
+                           save_dir: Optional[Path] = None,
+                           pack_frames: bool = False,
+                           queue_size: int = DEFAULT_QUEUE_SIZE,
+                           llm_backend: str = "auto",
+                           ollama_url: str = DEFAULT_OLLAMA_URL,
+                           llm_concurrency: int = DEFAULT_CONCURRENCY,
+                           llm_timeout: int = DEFAULT_TIMEOUT,
+                           llm_retries: int = DEFAULT_RETRIES,
+                           push_url: Optional[str] = None,
+                           caption_worker: Optional[str] = None,
+                           quantize: bool = False,
+                           segment_span: Optional[float] = DEFAULT_SEGMENT_SPAN,
+                           hierarchy_fanout: int = DEFAULT_FANOUT,
+                           llm_cache_path: Optional[Path] = DEFAULT_LLM_CACHE_PATH,
+                           llm_cache_ttl: Optional[float] = DEFAULT_TTL,
+                           adaptive_frames: bool = False,
+                           motion_threshold: float = DEFAULT_MOTION_THRESHOLD):
+    """
+    Decode -> caption -> summarize in one process, straight from cv2.VideoCapture.
+    Each window is captioned and sent to the LLM as soon as the decoder has moved past
+    its end; only its sampled frames are captioned. JPEGs (or one frames.pack with
+    pack_frames) + the frame index are written only when save_dir is given.
+    adaptive_frames: measure each decoded frame's motion and pick window frames with
+    pick_active, like run_pipeline does from the index's motion column.
+    """
+    started = metrics.snapshot()
+    blip = blip_loader(caption_worker, quantize)[0]()
+    backend = make_backend(llm_backend, ollama_model, base_url=ollama_url, timeout=llm_timeout,
+                           retries=llm_retries, concurrency=llm_concurrency)
+    llm_cache = LLMCache(llm_cache_path, ttl=llm_cache_ttl) if llm_cache_path is not None else None
+    writer = None
+    if save_dir is not None:
+        cap, video_fps, _ = open_video(video_path)
+        cap.release()
+        writer = FrameWriter(save_dir, video_path.name, video_fps=video_fps, pack=pack_frames)
+    producer = FrameProducer(iter_frames(video_path, sample_fps=sample_fps), maxsize=queue_size,
+                             on_frame=writer.write if writer is not None else None)
+    metrics.gauge_fn("queue_depth", producer.queue.qsize, queue="stream_frames")
+    windows = RollingWindows(window_size, stride)
+    captions: Dict[int, str] = {}        # seq -> caption, for frames still inside an open window
+    pending = []                         # ({"start", "end"}, captioned, future) in window order
+    first_summary_at: List[float] = []
+    probe = MotionProbe() if adaptive_frames else None
+    t0 = time.perf_counter()
+
+    def summarize(captioned: List[Dict[str, Any]]) -> Dict[str, Any]:
+        result = call_ollama_summarize(ollama_model, captioned, backend=backend, cache=llm_cache)
+        if not first_summary_at:
+            first_summary_at.append(time.perf_counter() - t0)
+        return result
+
+    def close_windows(closed: List[Dict], pool: ThreadPoolExecutor) -> None:
+        if probe is not None:
+            picks = [[win["frames"][i] for i in pick_active([f["motion"] for f in win["frames"]], frames_per_window,
+                                                            motion_threshold)] for win in closed]
+        else:
+            picks = [[win["frames"][i] for i in pick_indices(len(win["frames"]), frames_per_window)]
+                     for win in closed]
+        todo = list({f["seq"]: f for ps in picks for f in ps if f["seq"] not in captions}.values())
+        if todo:
+            try:
+                images = [Image.fromarray(f["image"][:, :, ::-1]) for f in todo]   # BGR -> RGB
+                captions.update(zip((f["seq"] for f in todo), blip.caption_images(images)))
+            except Exception as e:
+                print(f"[BLIP] failed to caption {len(todo)} streamed frames: {e}")
+                captions.update((f["seq"], "") for f in todo)
+        for win, ps in zip(closed, picks):
+            captioned = [{"ts": f["ts"], "caption": captions.get(f["seq"], "")} for f in ps]
+            # keep the bounds only: win["frames"] holds the decoded images
+            pending.append(({"start": win["start"], "end": win["end"]}, captioned, pool.submit(summarize, captioned)))
+        # drop pixels/captions no open window can reference any more
+        oldest = windows.oldest_open_seq()
+        for seq in [k for k in captions if oldest is None or k < oldest]:
+            del captions[seq]
+
+    print(f"Streaming {video_path} (fps={sample_fps}, window={window_size}s stride={stride}s) ...")
+    producer.start()
+    with ThreadPoolExecutor(max_workers=max(1, llm_concurrency), thread_name_prefix="llm") as pool:
+        for item in producer:
+            if probe is not None:
+                item["motion"] = probe.push(item["image"])
+            closed = windows.push(item)
+            if closed:
+                close_windows(closed, pool)
+        close_windows(windows.flush(), pool)
+
+        per_window_results = []
+        for i, (win, captioned, fut) in enumerate(pending):
+            summary_obj = fut.result()
+            per_window_results.append({
+                "start": win["start"],
+                "end": win["end"],
+                "summary": summary_obj.get("summary", ""),
+                "evidence": captioned,
+                "confidence": summary_obj.get("confidence", 0.0)
+            })
+            print(f"[Window {i}] {win['start']:.1f}-{win['end']:.1f}s -> {len(captioned)} captions -> summary length {len(per_window_results[-1]['summary'])}")
+
+    elapsed = time.perf_counter() - t0
+    if writer is not None:
+        writer.close()
+    first = f"{first_summary_at[0]:.2f}s" if first_summary_at else "n/a"
+    print(f"[Stream] {producer.produced} frames, {len(pending)} windows in {elapsed:.2f}s; first summary after {first}")
+    out_path = finalize_report(video_path.name, per_window_results, merge_gap=merge_gap, ollama_model=ollama_model,
+                               backend=backend, llm_concurrency=llm_concurrency, push_url=push_url,
+                               metrics_since=started, segment_span=segment_span, hierarchy_fanout=hierarchy_fanout,
+                               llm_cache=llm_cache)
+    if llm_cache is not None:
+        llm_cache.close()
+    backend.close()
+    return out_path
 
 # ---------- CLI ----------
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("processed_dir", type=str, help="Path to data/processed/<video_folder>")
+    parser.add_argument("processed_dir", type=str,
+                        help="Path to data/processed/<video_folder> (or to the video file with --stream)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Decode the video in-process and summarize windows as frames arrive")
+    parser.add_argument("--fps", type=float, default=1.0, help="Sampling rate for --stream (default: 1.0)")
+    parser.add_argument("--save-frames", action="store_true",
+                        help="With --stream, also write JPEGs + the frame index to data/processed/<video>")
+    parser.add_argument("--pack", action="store_true",
+                        help="With --save-frames, write one frames.pack instead of a JPEG per frame")
+    parser.add_argument("--stream-queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Decoded frames buffered ahead of captioning (default: %(default)s)")
     parser.add_argument("--window", type=float, default=DEFAULT_WINDOW)
     parser.add_argument("--stride", type=float, default=DEFAULT_STRIDE)
     parser.add_argument("--frames-per-window", type=int, default=DEFAULT_FRAMES_PER_WINDOW)
+    parser.add_argument("--adaptive-frames", action="store_true",
+                        help="Caption up to --frames-per-window frames where the motion is (one for quiet windows)")
+    parser.add_argument("--motion-threshold", type=float, default=DEFAULT_MOTION_THRESHOLD,
+                        help="With --adaptive-frames, mean gray-level change that counts as activity")
     parser.add_argument("--merge-gap", type=float, default=DEFAULT_MERGE_GAP)
+    parser.add_argument("--segment-span", type=float, default=DEFAULT_SEGMENT_SPAN,
+                        help="Cut merged segments after this many seconds (0: no limit; default: %(default)s)")
+    parser.add_argument("--hierarchy-fanout", type=int, default=DEFAULT_FANOUT,
+                        help="Segments/digests reduced per digest call (0: no digests; default: %(default)s)")
     parser.add_argument("--ollama-model", type=str, default=OLLAMA_MODEL)
+    parser.add_argument("--caption-batch-size", type=int, default=DEFAULT_CAPTION_BATCH_SIZE,
+                        help="Frames per BLIP forward pass (default: %(default)s)")
+    parser.add_argument("--caption-cache", type=str, default=str(DEFAULT_CACHE_PATH),
+                        help="SQLite caption cache file (default: %(default)s)")
+    parser.add_argument("--caption-cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Evict least-recently-used captions beyond this many entries")
+    parser.add_argument("--no-caption-cache", action="store_true", help="Always re-caption every frame")
+    parser.add_argument("--llm-backend", choices=["auto", "http", "cli"], default="auto",
+                        help="Ollama HTTP API, `ollama run` CLI, or HTTP with CLI fallback (default: auto)")
+    parser.add_argument("--ollama-url", type=str, default=DEFAULT_OLLAMA_URL)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Max LLM calls in flight (default: %(default)s)")
+    parser.add_argument("--llm-timeout", type=int, default=DEFAULT_TIMEOUT, help="Per-call timeout in seconds")
+    parser.add_argument("--llm-retries", type=int, default=DEFAULT_RETRIES, help="Retries per HTTP call")
+    parser.add_argument("--llm-cache", type=str, default=str(DEFAULT_LLM_CACHE_PATH),
+                        help="SQLite LLM response cache file (default: %(default)s)")
+    parser.add_argument("--llm-cache-ttl", type=float, default=DEFAULT_TTL,
+                        help="Seconds a cached LLM response stays valid (default: %(default)s)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Send every prompt to the LLM")
+    parser.add_argument("--push-url", type=str, default=None,
+                        help="POST the report to this reports API (e.g. http://127.0.0.1:8080) instead of "
+                             "writing data/reports/<video>_summaries.json")
+    parser.add_argument("--caption-worker", type=str, default=None,
+                        help="Caption with a running scripts/caption_worker.py at this address (e.g. 127.0.0.1:18765)")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Load BLIP with dynamic int8 quantization (in-process model only)")
     args = parser.parse_args()
+    if args.stream:
+        video_path = Path(args.processed_dir)
+        if not video_path.is_file():
+            raise SystemExit(f"Video file not found: {video_path}")
+        save_dir = Path("data") / "processed" / safe_name(video_path) if args.save_frames else None
+        run_streaming_pipeline(video_path, sample_fps=args.fps, window_size=args.window, stride=args.stride,
+                               frames_per_window=args.frames_per_window, merge_gap=args.merge_gap,
+                               ollama_model=args.ollama_model, save_dir=save_dir, pack_frames=args.pack,
+                               queue_size=args.stream_queue_size,
+                               llm_backend=args.llm_backend, ollama_url=args.ollama_url,
+                               llm_concurrency=args.llm_concurrency, llm_timeout=args.llm_timeout,
+                               llm_retries=args.llm_retries, push_url=args.push_url,
+                               caption_worker=args.caption_worker, quantize=args.quantize,
+                               segment_span=args.segment_span or None, hierarchy_fanout=args.hierarchy_fanout,
+                               llm_cache_path=None if args.no_llm_cache else Path(args.llm_cache),
+                               llm_cache_ttl=args.llm_cache_ttl,
+                               adaptive_frames=args.adaptive_frames, motion_threshold=args.motion_threshold)
+        raise SystemExit(0)
     run_pipeline(Path(args.processed_dir), window_size=args.window, stride=args.stride,
-                 frames_per_window=args.frames_per_window, merge_gap=args.merge_gap, ollama_model=args.ollama_model)
+                 frames_per_window=args.frames_per_window, merge_gap=args.merge_gap, ollama_model=args.ollama_model,
+                 caption_batch_size=args.caption_batch_size,
+                 caption_cache_path=None if args.no_caption_cache else Path(args.caption_cache),
+                 caption_cache_max_entries=args.caption_cache_max_entries,
+                 llm_backend=args.llm_backend, ollama_url=args.ollama_url, llm_concurrency=args.llm_concurrency,
+                 llm_timeout=args.llm_timeout, llm_retries=args.llm_retries, push_url=args.push_url,
+                 caption_worker=args.caption_worker, quantize=args.quantize,
+                 segment_span=args.segment_span or None, hierarchy_fanout=args.hierarchy_fanout,
+                 llm_cache_path=None if args.no_llm_cache else Path(args.llm_cache), llm_cache_ttl=args.llm_cache_ttl,
+                 adaptive_frames=args.adaptive_frames, motion_threshold=args.motion_threshold)
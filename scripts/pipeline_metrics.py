@@ -0,0 +1,36 @@
+"""
+scripts/pipeline_metrics.py
+
+The reports service's metrics registry (src/app/metrics.py), for the pipeline scripts.
+
+metrics.py is standard library only. It is loaded here from its file, under its package
+name, so importing a script never adds the repo root to sys.path (which would shadow any
+other top-level `src` package for the whole process). When src.app.metrics is already
+imported (tests, a script running next to the API) that module is reused, so a process
+always has a single REGISTRY. load_app_module does the same for the other
+standard-library-only modules under src/app (worker_ipc.py).
+
+    from pipeline_metrics import metrics, serve_metrics
+"""
+from pathlib import Path
+import importlib.util
+import sys
+
+APP_DIR = Path(__file__).resolve().parents[1] / "src" / "app"
+
+
+def load_app_module(name: str):
+    """src.app.<name> from its file (standard-library-only modules), or the one already imported."""
+    qualified = f"src.app.{name}"
+    module = sys.modules.get(qualified)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(qualified, APP_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[qualified] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_metrics = load_app_module("metrics")
+metrics = _metrics.REGISTRY
+serve_metrics = _metrics.serve_metrics
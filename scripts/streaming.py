@@ -0,0 +1,212 @@
+"""
+scripts/streaming.py
+
+In-process streaming building blocks: decode frames on a producer thread, hand them
+through a bounded queue, and close summarization windows incrementally as soon as
+the stream has moved past their end - no JPEG encode -> write -> read -> decode
+round-trip, and the first summary is produced while the video is still decoding.
+
+ - FrameProducer: thread that drains a (ts, ndarray) iterator into a bounded queue
+   (a full queue blocks the decoder, which is the backpressure).
+ - RollingWindows: incremental version of build_windows() (same start/stride/end
+   arithmetic) that emits each window once no later frame can fall into it.
+ - pick_indices: the evenly spaced start/mid/end selection used by
+   sample_frames_for_window().
+ - FrameRing: fixed-capacity buffer for live sources, which cannot be blocked; when
+   the consumer falls behind, frames are dropped by policy instead of queueing up.
+ - SegmentMerger: incremental merge_summaries(); hands back each merged segment as
+   soon as a later window can no longer extend it.
+
+Model-free on purpose; pipeline_blip_ollama.run_streaming_pipeline and
+live_summarize.py wire it to BLIP and the LLM backend.
+"""
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import queue
+import threading
+
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_RING_SIZE = 64
+DROP_POLICIES = ["oldest", "newest"]
+
+_END = object()
+
+
+def pick_indices(n_frames: int, k: int) -> List[int]:
+    """Indices of k evenly spaced frames (first and last included) out of n_frames."""
+    n = min(k, n_frames)
+    if n <= 0:
+        return []
+    if n == 1:
+        return [0]
+    return [round(i * (n_frames - 1) / (n - 1)) for i in range(n)]
+
+
+class FrameProducer(threading.Thread):
+    """
+    Decode on a background thread. Items are dicts {"seq", "ts", "image"}; the optional
+    on_frame(ts, image) hook runs on the producer thread (used to persist JPEGs).
+    """
+
+    def __init__(self, frames: Iterable[Tuple[float, Any]], maxsize: int = DEFAULT_QUEUE_SIZE,
+                 on_frame: Optional[Callable[[float, Any], None]] = None):
+        super().__init__(name="frame-producer", daemon=True)
+        self.frames = frames
+        self.queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self.on_frame = on_frame
+        self.error: Optional[BaseException] = None
+        self.produced = 0
+
+    def run(self) -> None:
+        try:
+            for seq, (ts, image) in enumerate(self.frames):
+                if self.on_frame is not None:
+                    self.on_frame(ts, image)
+                self.queue.put({"seq": seq, "ts": ts, "image": image})
+                self.produced += 1
+        except BaseException as e:   # surfaced to the consumer by __iter__
+            self.error = e
+        finally:
+            self.queue.put(_END)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+
+class RollingWindows:
+    """
+    Windows [start, start + window) with start = 0, stride, 2*stride, ... opened while
+    start <= latest ts, exactly like build_windows(). push() returns the windows that
+    closed (end <= ts of the new frame); flush() returns the rest at end of stream.
+    """
+
+    def __init__(self, window_size: float, stride: float):
+        self.window_size = window_size
+        self.stride = stride
+        self.next_start = 0.0
+        self.open: Deque[Dict[str, Any]] = deque()
+
+    def push(self, item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        ts = item["ts"]
+        while self.next_start <= ts:
+            self.open.append({"start": self.next_start, "end": self.next_start + self.window_size, "frames": []})
+            self.next_start += self.stride
+        for win in self.open:
+            if win["start"] <= ts < win["end"]:
+                win["frames"].append(item)
+        closed = []
+        while self.open and self.open[0]["end"] <= ts:
+            closed.append(self.open.popleft())
+        return closed
+
+    def flush(self) -> List[Dict[str, Any]]:
+        closed = list(self.open)
+        self.open.clear()
+        return closed
+
+    def oldest_open_seq(self) -> Optional[int]:
+        """seq of the oldest frame any open window still references (None if none)."""
+        for win in self.open:
+            if win["frames"]:
+                return win["frames"][0]["seq"]
+        return None
+
+
+class FrameRing:
+    """
+    Bounded hand-off from a live capture thread. put() never blocks: when the ring is
+    full it drops the oldest buffered frame (policy "oldest": stay close to live) or
+    the incoming one (policy "newest": keep a contiguous backlog). get() blocks until a
+    frame is available and returns None once close() has been called and the ring is empty.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_SIZE, policy: str = "oldest"):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"unknown drop policy {policy!r}; expected one of {DROP_POLICIES}")
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.items: Deque[Any] = deque()
+        self.dropped = 0
+        self.pushed = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item: Any) -> bool:
+        """Add a frame; returns False if it (or nothing, under "oldest") was dropped."""
+        with self._cond:
+            self.pushed += 1
+            if len(self.items) >= self.capacity:
+                self.dropped += 1
+                if self.policy == "newest":
+                    return False
+                self.items.popleft()
+            self.items.append(item)
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.items or self.closed, timeout):
+                raise queue.Empty
+            return self.items.popleft() if self.items else None
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self.items)
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+
+
+class SegmentMerger:
+    """
+    Merge window results {"start", "end", "summary", "evidence"} fed in start order into
+    segments, like merge_summaries(): a window joins the current segment when it overlaps
+    it or starts within merge_gap of its end. add() returns the segments it closed (0 or 1).
+    With max_span, a segment is also closed once it spans that many seconds - on a live
+    stream overlapping windows never leave a gap, so without it nothing would be final.
+    """
+
+    def __init__(self, merge_gap: float, max_span: Optional[float] = None):
+        self.merge_gap = merge_gap
+        self.max_span = max_span
+        self.cur: Optional[Dict[str, Any]] = None
+
+    def _close(self) -> Dict[str, Any]:
+        cur, self.cur = self.cur, None
+        return {"start": cur["start"], "end": cur["end"], "summary": " ".join(s for s in cur["summaries"] if s),
+                "evidence": cur["evidence"]}
+
+    def add(self, window: Dict[str, Any]) -> List[Dict[str, Any]]:
+        closed = []
+        cur = self.cur
+        if cur is not None:
+            joins = window["start"] <= cur["end"] or (window["start"] - cur["end"]) <= self.merge_gap
+            full = self.max_span is not None and cur["end"] - cur["start"] >= self.max_span
+            if joins and not full:
+                cur["end"] = max(cur["end"], window["end"])
+                cur["summaries"].append(window.get("summary", ""))
+                cur["evidence"].extend(window.get("evidence", []))
+                return closed
+            closed.append(self._close())
+        self.cur = {"start": window["start"], "end": window["end"], "summaries": [window.get("summary", "")],
+                    "evidence": list(window.get("evidence", []))}
+        return closed
+
+    def flush(self) -> List[Dict[str, Any]]:
+        return [self._close()] if self.cur is not None else []
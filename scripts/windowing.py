@@ -0,0 +1,74 @@
+"""
+scripts/windowing.py
+
+Sliding windows over a sorted timestamp array, returned as index ranges.
+
+Windows are [start, start + window_size) with start = 0, stride, 2*stride, ... while
+start <= last ts (the arithmetic build_windows() has always used). Instead of
+rescanning every frame per window, both window edges only move forward, so each
+edge is advanced with bisect from its previous position: O((windows + frames) log)
+overall instead of O(windows x frames), and nothing is copied - callers slice or
+index their own frame list with [lo, hi).
+"""
+from bisect import bisect_left
+from typing import Iterator, Sequence, Tuple, Dict, Any, List
+
+
+def iter_window_ranges(ts: Sequence[float], window_size: float, stride: float) -> Iterator[Tuple[float, float, int, int]]:
+    """Lazily yield (start, end, lo, hi) so that ts[lo:hi] are the timestamps in [start, end)."""
+    if stride <= 0:
+        raise ValueError("stride must be > 0")
+    if hasattr(ts, "searchsorted"):
+        yield from _iter_window_ranges_np(ts, window_size, stride)
+        return
+    n = len(ts)
+    if n == 0:
+        return
+    last_ts = ts[-1]
+    lo = hi = 0
+    start = 0.0
+    while start <= last_ts:
+        end = start + window_size
+        lo = bisect_left(ts, start, lo)
+        hi = bisect_left(ts, end, max(lo, hi))
+        yield start, end, lo, hi
+        start += stride
+
+
+def _iter_window_ranges_np(ts, window_size: float, stride: float,
+                           chunk: int = 4096) -> Iterator[Tuple[float, float, int, int]]:
+    """
+    NumPy arrays (e.g. a memory-mapped frame index column): both edges of `chunk` windows
+    at a time with searchsorted, without turning the column into a list. Same starts as
+    the loop above (repeated addition, not arange, so the floats match exactly).
+    """
+    if len(ts) == 0:
+        return
+    last_ts = float(ts[-1])
+    start = 0.0
+    while start <= last_ts:
+        starts = []
+        while start <= last_ts and len(starts) < chunk:
+            starts.append(start)
+            start += stride
+        ends = [s + window_size for s in starts]
+        los = ts.searchsorted(starts, side="left").tolist()
+        his = ts.searchsorted(ends, side="left").tolist()
+        yield from zip(starts, ends, los, his)
+
+
+def iter_windows(frames: Sequence[Dict[str, Any]], window_size: float, stride: float) -> Iterator[Dict[str, Any]]:
+    """Window dicts {"start", "end", "lo", "hi"} over frame dicts sorted by "ts"."""
+    ts = [f["ts"] for f in frames]
+    for start, end, lo, hi in iter_window_ranges(ts, window_size, stride):
+        yield {"start": start, "end": end, "lo": lo, "hi": hi}
+
+
+def is_sorted(ts: Sequence[float]) -> bool:
+    return all(a <= b for a, b in zip(ts, ts[1:]))
+
+
+def sort_frames(frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Frames as written by extract_frames are already in ts order; only sort if they are not."""
+    ts = [f["ts"] for f in frames]
+    return frames if is_sorted(ts) else sorted(frames, key=lambda f: f["ts"])
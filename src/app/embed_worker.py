@@ -0,0 +1,105 @@
+# src/app/embed_worker.py
+"""
+Resident sentence-transformers process for /similar. It loads the embedding model once
+and serves embed requests over a local socket, so the API process never imports torch
+and still gets semantic (not lexical) vectors for the index and for ?q= queries.
+
+Protocol: worker_ipc.py, shared with scripts/caption_worker.py (pickled messages,
+authenticated with a shared key: EMBED_WORKER_AUTHKEY when set, else a random key the
+worker writes on first start to EMBED_WORKER_KEYFILE, default data/cache/embed_worker.key,
+mode 0600). One request dict per message, one response dict back:
+
+    {"op": "info"}                 -> {"model", "dim", "semantic", "load_s", "served"}
+    {"op": "embed", "texts": [...]} -> {"vectors": float32 array (len(texts) x dim), unit length}
+    {"op": "shutdown"}             -> {"ok": True}
+    failures                       -> {"error": "..."}
+
+Texts are embedded in the order they arrive, batch_size at a time; model calls are
+serialized. Addresses: "host:port" (TCP, loopback only, default 127.0.0.1:18766) or
+"unix:/path/to.sock".
+
+Usage:
+    python -m src.app.embed_worker                       # serve on 127.0.0.1:18766
+    uvicorn src.app.main:app --port 8080                  # REPORTS_EMBEDDER=auto uses it
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+import os
+import threading
+import time
+
+import numpy as np
+
+from . import worker_ipc
+
+DEFAULT_ADDRESS = "127.0.0.1:18766"
+DEFAULT_KEYFILE = Path("data") / "cache" / "embed_worker.key"
+KEY_PREFIX = "EMBED_WORKER"
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """EMBED_WORKER_AUTHKEY, else the key file (see worker_ipc.load_authkey)."""
+    return worker_ipc.load_authkey(KEY_PREFIX, DEFAULT_KEYFILE, create=create)
+
+
+class EmbedServer(worker_ipc.WorkerServer):
+    """Serve `embedder` (anything with name, dim and embed(texts))."""
+
+    label = "embed"
+
+    def __init__(self, embedder, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None):
+        super().__init__(address, authkey if authkey is not None else load_authkey(create=True))
+        self.embedder = embedder
+        self.load_s: Optional[float] = None
+        self._model_lock = threading.Lock()
+        self.served = 0
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        op = req.get("op")
+        if op == "info":
+            return {"model": self.embedder.name, "dim": self.embedder.dim,
+                    "semantic": bool(getattr(self.embedder, "semantic", False)), "load_s": self.load_s,
+                    "served": self.served}
+        if op == "embed":
+            with self._model_lock:
+                vectors = np.asarray(self.embedder.embed(list(req["texts"])), dtype=np.float32)
+                self.served += len(vectors)
+            return {"vectors": vectors}
+        return {"error": f"unknown op {op!r}"}
+
+
+class EmbedClient(worker_ipc.WorkerClient):
+    """Embedder look-alike (name, dim, embed) that forwards to a running embed worker (thread-safe)."""
+
+    label = "embed worker"
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None):
+        super().__init__(address, authkey if authkey is not None else load_authkey())
+        info = self._call({"op": "info"})
+        self.name = info["model"]
+        self.dim = int(info["dim"])
+        self.semantic = bool(info["semantic"])
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self._call({"op": "embed", "texts": list(texts)})["vectors"]
+
+
+if __name__ == "__main__":
+    import argparse
+    from .vectors import SentenceEmbedder, DEFAULT_EMBED_MODEL
+
+    p = argparse.ArgumentParser(description="Keep a sentence-transformers model loaded for the reports API.")
+    p.add_argument("--address", type=str, default=os.environ.get("REPORTS_EMBED_WORKER", DEFAULT_ADDRESS),
+                   help="host:port or unix:/path.sock (default: %(default)s)")
+    p.add_argument("--model", type=str, default=DEFAULT_EMBED_MODEL)
+    p.add_argument("--device", type=str, default=None)
+    p.add_argument("--batch-size", type=int, default=64)
+    args = p.parse_args()
+    t0 = time.perf_counter()
+    server = EmbedServer(SentenceEmbedder(args.model, device=args.device, batch_size=args.batch_size), args.address)
+    server.load_s = round(time.perf_counter() - t0, 3)
+    print(f"[Embed worker] {args.model} ready in {server.load_s:.1f}s; listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
@@ -1,38 +1,159 @@
 # src/app/main.py
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from datetime import datetime, timezone
-import sqlite3
+from typing import Any, Dict, List, Optional
+import asyncio
+import base64
+import contextlib
+import json
 import os
+import time
+
+from .store import ReportStore, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .vectors import VectorIndex, EmbeddingIndexer, make_embedder, describe_embedder
+from .pubsub import Broker
+from .metrics import REGISTRY as metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+try:
+    import orjson
+except ImportError:  # optional: plain json is used when orjson is not installed
+    orjson = None
 
 # Database file path (created in project root)
 DB_PATH = os.environ.get("REPORTS_DB", "reports.db")
 
-app = FastAPI(title="Surveil Summarizer (dev)")
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the indexer thread runs while the app serves, not whenever this module is imported
+    indexer.start()
+    yield
+    indexer.close()
+
+app = FastAPI(title="Surveil Summarizer (dev)", lifespan=lifespan)
 
-def get_conn():
+class MetricsMiddleware:
     """
-    Return a sqlite3 connection and ensure the 'reports' table exists.
-    check_same_thread=False allows the connection object to be used from FastAPI worker threads.
-    This simple pattern is fine for development; in production you'd use a proper DB pool.
+    Per-route request latency and status counts. Plain ASGI (not BaseHTTPMiddleware) so
+    streaming responses pass straight through; latency is measured to the response
+    headers, which for /reports/stream is the time to open the stream.
     """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            summary TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    return conn
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", "unmatched")
+                metrics.observe("http_request_seconds", time.perf_counter() - t0, method=scope["method"], route=route)
+                metrics.inc("http_requests_total", method=scope["method"], route=route, status=message["status"])
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+app.add_middleware(MetricsMiddleware)
+
+# WAL-mode store: per-thread read connections, one group-committing writer thread
+store = ReportStore(DB_PATH)
+
+# Fan-out of committed reports to /reports/stream clients (published by the writer thread)
+broker = Broker()
+store.add_listener(lambda rows: publish_reports(broker, rows))
+STREAM_HEARTBEAT_S = 15.0
+STREAM_BACKLOG_LIMIT = 1000
+
+# sampled at scrape time: module globals, so tests that swap `store`/`broker` are measured too
+metrics.gauge_fn("queue_depth", lambda: store.pending_writes(), queue="db_writer")
+metrics.gauge_fn("stream_subscribers", lambda: broker.subscribers)
+
+# Embedding index for /similar, kept next to the database and filled in the background
+VECTORS_PATH = os.environ.get("REPORTS_VECTORS", DB_PATH + ".vectors")
+# auto | worker | hashing | sentence-transformers. auto embeds through the sentence-transformers
+# model of a running embed worker (python -m src.app.embed_worker), so torch stays out of this
+# process, and uses lexical hashing vectors until one answers; sentence-transformers loads it here
+EMBEDDER = os.environ.get("REPORTS_EMBEDDER", "auto")
+EMBED_WORKER = os.environ.get("REPORTS_EMBED_WORKER")   # default 127.0.0.1:18766
+indexer = EmbeddingIndexer(store, VectorIndex(VECTORS_PATH), lambda: make_embedder(EMBEDDER, worker=EMBED_WORKER))
+metrics.gauge_fn("indexed_vectors", lambda: indexer.index.count)
 
-# Single global connection for this simple tutorial
-conn = get_conn()
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available (several times faster on large pages)."""
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(content)
+
+def dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode("utf-8") if orjson is not None else json.dumps(obj)
+
+def encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        ts, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(ts), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
 
 class ReportIn(BaseModel):
     summary: str
 
+class SegmentIn(BaseModel):
+    start: float
+    end: float
+    summary: str = ""
+    confidence: Optional[float] = None
+    level: int = 0                        # 0: merged windows, 1..: hierarchical digests
+    evidence: List[Dict[str, Any]] = []   # [{"ts": float, "caption": str}] as written by the pipeline
+
+class BulkReportIn(BaseModel):
+    """A whole run_pipeline report: {"video", "generated_at", "summaries": [segment, ...], "digests": [...]}."""
+    video: str
+    generated_at: Optional[str] = None
+    summaries: List[SegmentIn] = []
+    digests: List[SegmentIn] = []
+
+async def read_ndjson_report(request: Request, video: Optional[str]) -> BulkReportIn:
+    """
+    NDJSON body: an optional header line {"video": ..., "generated_at": ...} followed by
+    one segment object per line. Lines are parsed as they stream in.
+    """
+    header: Dict[str, Any] = {"video": video} if video else {}
+    segments: List[Dict[str, Any]] = []
+    buf = b""
+
+    def take(line: bytes) -> None:
+        line = line.strip()
+        if not line:
+            return
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValueError(f"expected a JSON object per line, got {type(obj).__name__}")
+        if "start" in obj:
+            segments.append(obj)
+        else:
+            header.update({k: v for k, v in obj.items() if v is not None})
+
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            take(line)
+    take(buf)
+    return BulkReportIn.model_validate({**header, "summaries": segments})
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition: per-route latency, DB commit timings, queue depths, subscribers."""
+    return Response(metrics.render_prometheus(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 def health():
     """Health endpoint — quick check that the service is alive."""
@@ -44,18 +165,171 @@ def add_report(item: ReportIn):
     Add a short textual report. Example POST body: {"summary": "Two people at north gate"}.
     Returns: id, timestamp, and the saved summary.
     """
-    ts = datetime.now(timezone.utc).isoformat()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO reports (ts, summary) VALUES (?, ?)", (ts, item.summary))
-    conn.commit()
-    return {"id": cur.lastrowid, "ts": ts, "summary": item.summary}
+    row = store.add_report(item.summary)
+    indexer.notify()
+    return row
+
+@app.post("/reports/bulk")
+async def add_reports_bulk(request: Request, video: Optional[str] = None):
+    """
+    Ingest a whole pipeline report in one transaction: the video, every segment and its
+    evidence captions. Body is either the JSON report written by run_pipeline
+    (Content-Type: application/json) or NDJSON (application/x-ndjson), streamed in.
+    Returns: video_id, number of segments/evidence rows and the new report ids.
+    """
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            report = await read_ndjson_report(request, video)
+        else:
+            payload = await request.json()
+            if video and isinstance(payload, dict):
+                payload.setdefault("video", video)
+            report = BulkReportIn.model_validate(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
+    except ValueError as e:   # malformed JSON / NDJSON line
+        raise HTTPException(status_code=400, detail=f"invalid JSON body: {e}")
+    segments = [seg.model_dump() for seg in report.summaries + report.digests]
+    result = await run_in_threadpool(store.add_video_report, report.video, segments, report.generated_at)
+    indexer.notify()
+    return result
+
+@app.get("/reports")
+def list_reports(video: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                 min_confidence: Optional[float] = None, cursor: Optional[str] = None,
+                 limit: int = DEFAULT_PAGE_SIZE, level: Optional[int] = None):
+    """
+    Browse reports newest first. Filters: video name, ts range [since, until) as ISO-8601
+    times ("Z" or any offset; naive means UTC), min_confidence, and level - the zoom level of a hierarchical report
+    (0: segments, 1: ~hour digests, ..., highest: the whole video). Pass back
+    `next_cursor` as `cursor` for the next page; it is null on the last page. limit is
+    capped at MAX_PAGE_SIZE.
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    after = decode_cursor(cursor) if cursor else None
+    try:
+        items, next_key = store.list_reports(video=video, since=since, until=until, min_confidence=min_confidence,
+                                             after=after, limit=limit, level=level)
+    except ValueError as e:   # unparseable since/until
+        raise HTTPException(status_code=400, detail=f"invalid time bound: {e}")
+    return FastJSONResponse({"items": items, "next_cursor": encode_cursor(next_key) if next_key else None})
+
+def sse(report: Dict[str, Any]) -> Dict[str, Any]:
+    """A stream event: the report id and its SSE frame, rendered once for all subscribers."""
+    return {"id": report["id"], "frame": f"id: {report['id']}\nevent: report\ndata: {dumps(report)}\n\n"}
+
+def publish_reports(to: Broker, rows: List[Dict[str, Any]]) -> None:
+    to.publish([sse(row) for row in rows])
+
+@app.get("/reports/stream")
+async def stream_reports(request: Request, last_id: Optional[int] = None):
+    """
+    Server-Sent Events: one `report` event per newly inserted report (same fields as
+    GET /reports items), pushed as it is committed. Reconnecting clients send the
+    standard Last-Event-ID header (or ?last_id=) and first receive what they missed;
+    if that is more than STREAM_BACKLOG_LIMIT reports a `gap` event tells them to
+    reload via GET /reports instead. A `: ping` comment is sent every 15s of silence.
+    """
+    header = request.headers.get("last-event-id")
+    if header:
+        try:
+            last_id = int(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid Last-Event-ID")
+    sub = broker.subscribe()   # before reading the backlog, so nothing falls in between
+    backlog: List[Dict[str, Any]] = []
+    gap = False
+    if last_id is not None:
+        backlog, covered = broker.since(last_id)
+        if not covered:
+            rows = await run_in_threadpool(store.reports_after, last_id, STREAM_BACKLOG_LIMIT)
+            gap = len(rows) == STREAM_BACKLOG_LIMIT
+            newest = rows[-1]["id"] if rows else last_id
+            backlog = [] if gap else [sse(r) for r in rows] + [e for e in backlog if e["id"] > newest]
+
+    async def events():
+        sent = last_id or 0
+        try:
+            if gap:
+                yield f"event: gap\ndata: {dumps({'after': last_id})}\n\n"
+            if backlog:
+                yield "".join(e["frame"] for e in backlog)
+                sent = backlog[-1]["id"]
+            while True:
+                try:
+                    events = await sub.get_many(timeout=STREAM_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if events is None:   # fell too far behind; the client reconnects with Last-Event-ID
+                    break
+                frames = [e["frame"] for e in events if e["id"] > sent]
+                if frames:
+                    yield "".join(frames)
+                    sent = events[-1]["id"]
+        finally:
+            sub.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/search")
+def search(q: str, limit: int = 20):
+    """
+    Full-text search over report summaries and per-frame evidence captions,
+    e.g. /search?q=red truck north gate. Results are ranked (bm25) with <b>-highlighted snippets.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="q must not be empty")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return FastJSONResponse({"query": q, "results": store.search(q, limit=limit)})
+
+@app.get("/similar")
+def similar(q: Optional[str] = None, id: Optional[int] = None, limit: int = 10):
+    """
+    Reports semantically similar to a text (?q=someone climbing the fence) or to an
+    existing segment (?id=123, which is left out of the results). Each result carries its
+    cosine score and whether its summary or one of its evidence captions matched.
+    "embedder" names the model behind the scores; "semantic": false means the vectors are
+    lexical (hashing fallback: no embed worker running). Reports inserted in the last
+    moments may not be indexed yet.
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if id is not None:
+        query = indexer.index.vector_for_report(id)
+        if query is None:
+            row = store.reports_by_id([id]).get(id)
+            if row is None:
+                raise HTTPException(status_code=404, detail=f"report {id} not found")
+            query = indexer.embed([row["summary"]])[0]
+    elif q and q.strip():
+        query = indexer.embed([q])[0]
+    else:
+        raise HTTPException(status_code=422, detail="pass q or id")
+    hits = indexer.index.search(query, k=limit, exclude_report=id)
+    rows = store.reports_by_id([h["report_id"] for h in hits])
+    captions = store.captions_by_id([h["evidence_id"] for h in hits if h["evidence_id"]])
+    results = []
+    for h in hits:
+        row = rows.get(h["report_id"])
+        if row is None:
+            continue
+        match = {"field": "summary"}
+        if h["evidence_id"] in captions:
+            match = {"field": "caption", **captions[h["evidence_id"]]}
+        results.append({**row, "score": h["score"], "match": match})
+    return FastJSONResponse({"query": q if id is None else {"id": id}, "embedder": describe_embedder(indexer.embedder),
+                             "results": results})
 
 @app.get("/latest-report")
 def latest_report():
     """Return the most recent saved report (or nulls if none exist)."""
-    cur = conn.cursor()
-    row = cur.execute("SELECT id, ts, summary FROM reports ORDER BY id DESC LIMIT 1").fetchone()
+    row = store.latest_report()
     if not row:
         return {"id": None, "ts": None, "summary": None}
-    return {"id": row[0], "ts": row[1], "summary": row[2]}
-
+    return row
@@ -0,0 +1,293 @@
+# src/app/metrics.py
+"""
+Minimal in-process metrics: counters, gauges and histograms with labels, rendered in
+the Prometheus text format (GET /metrics) or as a JSON timing summary (embedded in
+pipeline reports). Standard library only, so the pipeline scripts can use it too
+(scripts/pipeline_metrics.py loads this file without touching sys.path).
+
+    from src.app.metrics import REGISTRY as metrics
+    with metrics.timer("stage_seconds", stage="decode"):
+        ...
+    metrics.inc("frames_total", stage="decode")
+
+Long-running scripts without the API (live_summarize, batch_ingest) can expose the same
+text with serve_metrics(port).
+
+Set METRICS_ENABLED=0 to turn every call into an early return; timer() then hands
+back a shared no-op context manager, so instrumented code costs one attribute check.
+"""
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+import os
+import threading
+import time
+
+PREFIX = "surveil_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                   120.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "t0")
+
+    def __init__(self, registry: "Registry", name: str, labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauge_fns: Dict[str, Dict[LabelKey, Callable[[], float]]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    # ---------- recording ----------
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def gauge_fn(self, name: str, fn: Callable[[], float], **labels: Any) -> None:
+        """Gauge read at collection time (queue depths and the like: no cost between scrapes)."""
+        with self._lock:
+            self._gauge_fns.setdefault(name, {})[_key(labels)] = fn
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self.buckets)
+            hist.observe(value)
+
+    def timer(self, name: str, **labels: Any):
+        """Context manager observing the elapsed seconds of its block into histogram `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name: str, **labels: Any):
+        """Decorator form of timer()."""
+        def wrap(fn):
+            def inner(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Timer(self, name, labels):
+                    return fn(*args, **kwargs)
+            inner.__name__, inner.__doc__, inner.__wrapped__ = fn.__name__, fn.__doc__, fn
+            return inner
+        return wrap
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    # ---------- export ----------
+    def _gauge_values(self) -> Dict[str, Dict[LabelKey, float]]:
+        with self._lock:
+            values = {name: dict(series) for name, series in self._gauges.items()}
+            fns = [(name, key, fn) for name, series in self._gauge_fns.items() for key, fn in series.items()]
+        for name, key, fn in fns:
+            try:
+                values.setdefault(name, {})[key] = float(fn())
+            except Exception:
+                continue
+        return values
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            hists = {n: {k: (list(h.counts), h.sum, h.count) for k, h in s.items()} for n, s in self._histograms.items()}
+        for name, series in sorted(counters.items()):
+            header(name, "counter")
+            for key, v in sorted(series.items()):
+                lines.append(f"{PREFIX}{name}{_fmt_labels(key)} {_fmt_value(v)}")
+        for name, series in sorted(self._gauge_values().items()):
+            header(name, "gauge")
+            for key, v in sorted(series.items()):
+                lines.append(f"{PREFIX}{name}{_fmt_labels(key)} {_fmt_value(v)}")
+        for name, series in sorted(hists.items()):
+            header(name, "histogram")
+            for key, (counts, total, count) in sorted(series.items()):
+                cumulative = 0
+                for bound, c in zip(list(self.buckets) + [math.inf], counts):
+                    cumulative += c
+                    lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(key, ('le', _fmt_value(bound)))} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+                lines.append(f"{PREFIX}{name}_count{_fmt_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Raw copy of counters and histograms, to diff against with summary(since=...)."""
+        with self._lock:
+            return {"counters": {n: dict(s) for n, s in self._counters.items()},
+                    "histograms": {n: {k: (list(h.counts), h.sum, h.count, h.max) for k, h in s.items()}
+                                   for n, s in self._histograms.items()}}
+
+    def summary(self, since: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        JSON-friendly summary: per histogram series count/total/mean/p50/p95/max seconds and
+        counter values, keyed "name{label=value,...}". With `since` (an earlier snapshot())
+        only what was recorded after it (max is then the all-time max).
+        """
+        now = self.snapshot()
+        before = since or {"counters": {}, "histograms": {}}
+        out: Dict[str, Any] = {"stages": {}, "counters": {}}
+        for name, series in now["histograms"].items():
+            for key, (counts, total, count, mx) in series.items():
+                prev = before["histograms"].get(name, {}).get(key)
+                if prev:
+                    counts = [a - b for a, b in zip(counts, prev[0])]
+                    total, count = total - prev[1], count - prev[2]
+                if not count:
+                    continue
+                hist = _Histogram(self.buckets)
+                hist.counts, hist.sum, hist.count, hist.max = counts, total, count, mx
+                out["stages"][name + _fmt_labels(key)] = {
+                    "count": count, "total_s": round(total, 6), "mean_s": round(total / count, 6),
+                    "p50_s": round(hist.quantile(0.5), 6), "p95_s": round(hist.quantile(0.95), 6), "max_s": round(mx, 6)}
+        for name, series in now["counters"].items():
+            for key, v in series.items():
+                v -= before["counters"].get(name, {}).get(key, 0.0)
+                if v:
+                    out["counters"][name + _fmt_labels(key)] = v
+        return out
+
+
+REGISTRY = Registry(enabled=os.environ.get("METRICS_ENABLED", "1") not in ("0", "false", "no"))
+for _name, _help in (
+        ("stage_seconds", "Time spent per pipeline stage call (decode, jpeg_write, caption_batch, llm_call, ...)"),
+        ("stage_items_total", "Items processed per pipeline stage (frames, windows, prompts)"),
+        ("queue_depth", "Items waiting in an in-process queue"),
+        ("http_request_seconds", "API request latency by route"),
+        ("http_requests_total", "API requests by route and status"),
+        ("llm_errors_total", "Failed LLM calls by backend"),
+        ("caption_cache_total", "Caption cache lookups by result"),
+        ("llm_cache_total", "LLM response cache lookups by result (hit, miss, coalesced)"),
+        ("db_commit_errors_total", "Failed group commits"),
+        ("stream_subscribers", "Open /reports/stream connections"),
+        ("indexed_vectors", "Rows in the /similar embedding index"),
+        ("ring_dropped_frames", "Live frames dropped by the ring buffer")):
+    REGISTRY.describe(_name, _help)
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread (for processes that are not the API)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200 if self.path.split("?")[0] in ("/", "/metrics") else 404)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,129 @@
+# src/app/pubsub.py
+"""
+In-process fan-out of newly inserted reports to streaming clients (GET /reports/stream).
+
+The store's writer thread publishes each committed batch once, in id order; the broker
+hands it to the event loop that owns the subscriptions with a single
+call_soon_threadsafe per batch, and the loop copies it onto every subscriber's queue.
+A dashboard connected to the stream therefore costs no SQLite reads at all; the
+database is only read when a client resumes from an id older than the broker's
+in-memory history.
+
+A subscriber that stops reading is cut off once `max_queue` events are waiting for it
+(instead of the server buffering without bound); it reconnects with Last-Event-ID and
+catches up from history.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import threading
+
+DEFAULT_HISTORY = 4096
+DEFAULT_MAX_QUEUE = 1024
+
+_CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.broker = broker
+        self.loop = loop
+        self.max_queue = max_queue
+        self.queue: "asyncio.Queue" = asyncio.Queue()
+        self.overflowed = False
+
+    def _deliver(self, events: List[Dict[str, Any]]) -> None:
+        """Runs on the subscription's event loop."""
+        if self.overflowed:
+            return
+        if self.queue.qsize() + len(events) > self.max_queue:
+            self.overflowed = True
+            self.queue.put_nowait(_CLOSED)
+            return
+        for event in events:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event; None once the subscription was cut off. Raises asyncio.TimeoutError."""
+        item = await asyncio.wait_for(self.queue.get(), timeout)
+        return None if item is _CLOSED else item
+
+    async def get_many(self, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """Next event plus whatever else is already queued (one write to the client instead of many)."""
+        first = await self.get(timeout)
+        if first is None:
+            return None
+        events = [first]
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is _CLOSED:
+                self.queue.put_nowait(_CLOSED)   # reported by the next call
+                break
+            events.append(item)
+        return events
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self, history: int = DEFAULT_HISTORY, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.max_queue = max_queue
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._subs: Dict[asyncio.AbstractEventLoop, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subs.values())
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Fan out events (dicts with an increasing "id"); safe to call from any thread.
+        Render anything per-event (e.g. the wire format) before publishing: it is shared
+        by every subscriber.
+        """
+        if not events:
+            return
+        with self._lock:
+            self._history.extend(events)
+            self.published += len(events)
+            targets = [(loop, list(subs)) for loop, subs in self._subs.items() if subs]
+        for loop, subs in targets:
+            try:
+                loop.call_soon_threadsafe(self._fanout, subs, events)
+            except RuntimeError:   # loop already closed
+                pass
+
+    @staticmethod
+    def _fanout(subs: List[Subscription], events: List[Dict[str, Any]]) -> None:
+        for sub in subs:
+            sub._deliver(events)
+
+    def subscribe(self) -> Subscription:
+        """Register a subscriber on the running event loop."""
+        loop = asyncio.get_running_loop()
+        sub = Subscription(self, loop, self.max_queue)
+        with self._lock:
+            self._subs.setdefault(loop, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.loop)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.loop]
+
+    def since(self, last_id: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Events with id > last_id still in history, and whether history reaches back far
+        enough to be sure none are missing (False: the caller must read the gap from the DB).
+        """
+        with self._lock:
+            history = list(self._history)
+        covered = bool(history) and history[0]["id"] <= last_id + 1
+        return [e for e in history if e["id"] > last_id], covered
@@ -0,0 +1,486 @@
+# src/app/store.py
+"""
+SQLite storage for the reports service.
+
+ - WAL journal: readers never block the writer and vice versa.
+ - One connection per thread for reads (FastAPI runs sync handlers on a thread pool,
+   whose threads are reused, so each keeps its connection and statement cache).
+ - All writes go through a single writer thread that group-commits: it takes whatever
+   inserts are queued (up to batch_size, waiting at most max_delay for more) and
+   commits them in one transaction, so N concurrent POSTs cost one fsync, not N. Each
+   write runs under its own SAVEPOINT: one that fails is rolled back and reported to its
+   caller alone, and the rest of the batch still commits.
+   Callers block until their row is committed, so an acknowledged insert survives a
+   crash of the process. With synchronous=NORMAL it is not fsynced until the next
+   checkpoint: a power loss can drop the last commits.
+
+db_path must be a file: every thread opens its own connection, and ":memory:"
+would give each of them a separate empty database.
+
+Listeners added with add_listener() are called on the writer thread after every
+commit with the rows it inserted, in id order (the API's push stream hangs off this).
+
+Schema: a row in `reports` is either a free-text report (POST /reports) or one
+summarized segment of a video (video_id, start_s, end_s, confidence set), whose
+per-frame captions live in `evidence`. `level` is the zoom level of a segment: 0 for
+merged windows, 1.. for the digests of the pipeline's hierarchical summarizer, each
+reducing a group of rows of the level below (and carrying no evidence).
+"""
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from .metrics import REGISTRY as metrics
+
+CREATE_REPORTS = """
+    CREATE TABLE IF NOT EXISTS reports (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT NOT NULL,
+        summary TEXT NOT NULL
+    )
+"""
+
+# columns added to `reports` after the first release; existing databases are migrated in place
+REPORT_COLUMNS = [
+    ("video_id", "INTEGER REFERENCES videos(id)"),
+    ("start_s", "REAL"),
+    ("end_s", "REAL"),
+    ("confidence", "REAL"),
+    ("level", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS videos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        generated_at TEXT,
+        ingested_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS evidence (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_id INTEGER NOT NULL REFERENCES reports(id),
+        ts REAL,
+        caption TEXT NOT NULL
+    )
+    """,
+    # keyset pagination walks (ts, id) newest-first; confidence is in the index so the
+    # min_confidence filter is checked before touching the table. Deliberately not covering:
+    # that would copy every summary into the index, doubling the largest column on disk and
+    # on every insert, to save one rowid lookup for each of the <= MAX_PAGE_SIZE rows a page
+    # returns. The walk itself never sorts and never reads rows it skips (test_query.py)
+    "DROP INDEX IF EXISTS idx_reports_ts",
+    "CREATE INDEX IF NOT EXISTS idx_reports_ts_id ON reports(ts, id, confidence)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_video_ts_id ON reports(video_id, ts, id, confidence)",
+    # GET /reports?level=N: the few digest rows of a level without scanning every segment
+    "CREATE INDEX IF NOT EXISTS idx_reports_level_ts_id ON reports(level, ts, id)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_video_level_ts_id ON reports(video_id, level, ts, id)",
+    "CREATE INDEX IF NOT EXISTS idx_videos_name ON videos(name)",
+    "CREATE INDEX IF NOT EXISTS idx_evidence_report ON evidence(report_id)",
+]
+
+# Full-text indexes over report summaries and evidence captions. External-content FTS5
+# tables kept in sync by triggers, so every insert path (single, bulk) is covered.
+FTS_TABLES = [
+    ("reports_fts", "reports", "summary"),
+    ("evidence_fts", "evidence", "caption"),
+]
+FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+        {col}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+        INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col});
+    END;
+    CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col});
+    END;
+    CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col} ON {table} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col});
+        INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col});
+    END;
+"""
+SEARCH_SUMMARIES = """
+    SELECT reports_fts.rowid, snippet(reports_fts, 0, ?, ?, '…', ?), bm25(reports_fts), NULL
+    FROM reports_fts WHERE reports_fts MATCH ? ORDER BY rank LIMIT ?
+"""
+# one hit per report (its best caption) before LIMIT, or a report with many matching captions
+# fills the page on its own. FTS5 auxiliary functions are not allowed in an aggregate query,
+# so `best` groups on the rank column and the outer query makes snippets for its rows only
+SEARCH_CAPTIONS = """
+    WITH best AS (
+        SELECT e.report_id AS report_id, e.id AS evidence_id, e.ts AS ts, MIN(m.rank) AS score
+        FROM (SELECT rowid, rank FROM evidence_fts WHERE evidence_fts MATCH ?) m
+        JOIN evidence e ON e.id = m.rowid
+        GROUP BY e.report_id ORDER BY score LIMIT ?
+    )
+    SELECT best.report_id, snippet(evidence_fts, 0, ?, ?, '…', ?), best.score, best.ts
+    FROM best JOIN evidence_fts ON evidence_fts.rowid = best.evidence_id
+    WHERE evidence_fts MATCH ? ORDER BY best.score
+"""
+SELECT_REPORTS_BY_ID = """
+    SELECT r.id, r.ts, r.summary, v.name, r.start_s, r.end_s, r.confidence, r.level
+    FROM reports r LEFT JOIN videos v ON v.id = r.video_id
+    WHERE r.id IN ({marks})
+"""
+
+SELECT_SUMMARIES_AFTER = "SELECT id, id, summary FROM reports WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_CAPTIONS_AFTER = "SELECT id, report_id, caption FROM evidence WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_REPORTS_AFTER = """
+    SELECT r.id, r.ts, r.summary, v.name, r.start_s, r.end_s, r.confidence, r.level
+    FROM reports r LEFT JOIN videos v ON v.id = r.video_id
+    WHERE r.id > ? ORDER BY r.id LIMIT ?
+"""
+SELECT_CAPTIONS_BY_ID = "SELECT id, ts, caption FROM evidence WHERE id IN ({marks})"
+
+INSERT_REPORT = "INSERT INTO reports (ts, summary) VALUES (?, ?)"
+INSERT_VIDEO = "INSERT INTO videos (name, generated_at, ingested_at) VALUES (?, ?, ?)"
+SELECT_VIDEO_ID = "SELECT id FROM videos WHERE name = ? ORDER BY id LIMIT 1"
+INSERT_SEGMENT = ("INSERT INTO reports (ts, summary, video_id, start_s, end_s, confidence, level) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)")
+INSERT_EVIDENCE = "INSERT INTO evidence (report_id, ts, caption) VALUES (?, ?, ?)"
+SELECT_LATEST = "SELECT id, ts, summary FROM reports ORDER BY id DESC LIMIT 1"
+SELECT_REPORT_PAGE = """
+    SELECT r.id, r.ts, r.summary, v.name, r.start_s, r.end_s, r.confidence, r.level
+    FROM reports r LEFT JOIN videos v ON v.id = r.video_id
+    WHERE {where}
+    ORDER BY r.ts DESC, r.id DESC
+    LIMIT ?
+"""
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_STOP = object()
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_terms(query: str) -> List[str]:
+    """Quote every word so user input can never be parsed as FTS5 query syntax."""
+    return ['"' + w + '"' for w in _WORD.findall(query)]
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def normalize_ts(value: str) -> str:
+    """
+    An ISO-8601 time ("Z", any offset, or naive meaning UTC) in the UTC form utc_now()
+    stores, so that it compares correctly with ts as a string. ValueError if unparseable.
+    """
+    dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+class ReportStore:
+    def __init__(self, db_path: str, batch_size: int = 256, max_delay: float = 0.002,
+                 busy_timeout_ms: int = 5000):
+        self.db_path = str(db_path)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self.batches = 0
+        self.rows_written = 0
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._inserted: List[Dict[str, Any]] = []   # rows of the batch being committed (writer thread only)
+
+        conn = self._open()
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate(conn)
+        conn.commit()
+        conn.close()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="report-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        conn.execute(CREATE_REPORTS)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+        for name, decl in REPORT_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE reports ADD COLUMN {name} {decl}")
+        for stmt in SCHEMA:
+            conn.execute(stmt)
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for fts, table, col in FTS_TABLES:
+            conn.executescript(FTS_SCHEMA.format(fts=fts, table=table, col=col))
+            if fts not in existing:
+                # index rows written before full-text search existed
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    # ---------- connections ----------
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False only so close() can run from any thread;
+        # each connection is still used by exactly one thread
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0, cached_statements=256,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        # WAL + NORMAL: durable against process crashes, fsync at checkpoints
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """The calling thread's read connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    # ---------- writes ----------
+    def _writer_loop(self) -> None:
+        conn = self._open()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get(timeout=self.max_delay)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit_batch(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[Tuple[Any, Future]]) -> None:
+        results: List[Any] = []
+        failed: Dict[int, BaseException] = {}
+        self._inserted = []
+        t0 = time.perf_counter()
+        try:
+            with conn:   # one transaction for the whole batch, one savepoint per write
+                conn.execute("BEGIN")
+                for i, (write, _) in enumerate(batch):
+                    inserted = len(self._inserted)
+                    conn.execute("SAVEPOINT write")
+                    try:
+                        results.append(write(conn))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write")
+                        del self._inserted[inserted:]
+                        failed[i] = e
+                        results.append(None)
+                    conn.execute("RELEASE write")
+        except Exception as e:   # BEGIN/COMMIT itself failed: nothing was written
+            metrics.inc("db_commit_errors_total")
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        metrics.observe("stage_seconds", time.perf_counter() - t0, stage="db_commit")
+        metrics.inc("stage_items_total", len(batch) - len(failed), stage="db_commit")
+        if failed:
+            metrics.inc("db_commit_errors_total", len(failed))
+        self.batches += 1
+        self.rows_written += len(batch) - len(failed)
+        for i, ((_, fut), result) in enumerate(zip(batch, results)):
+            if i in failed:
+                fut.set_exception(failed[i])
+            else:
+                fut.set_result(result)
+        for listener in self._listeners:
+            try:
+                listener(self._inserted)
+            except Exception as e:   # a broken listener must not stop the writer
+                print(f"[Store] listener failed: {e}")
+
+    def pending_writes(self) -> int:
+        return self._queue.qsize()
+
+    def add_listener(self, fn: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """fn(rows) runs on the writer thread after each commit; rows are report dicts in id order."""
+        self._listeners.append(fn)
+
+    def submit(self, write) -> Future:
+        """Queue write(conn) to run inside the next group commit; the future resolves after COMMIT."""
+        fut: Future = Future()
+        self._queue.put((write, fut))
+        return fut
+
+    def add_report(self, summary: str, ts: Optional[str] = None) -> Dict[str, Any]:
+        ts = ts or utc_now()
+
+        def write(conn: sqlite3.Connection) -> Dict[str, Any]:
+            row = {"id": conn.execute(INSERT_REPORT, (ts, summary)).lastrowid, "ts": ts, "summary": summary}
+            self._inserted.append({**row, "video": None, "start": None, "end": None, "confidence": None, "level": 0})
+            return row
+
+        return self.submit(write).result()
+
+    def add_video_report(self, video: str, segments: List[Dict[str, Any]],
+                         generated_at: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Insert a whole pipeline report - one reports row per segment and its evidence
+        captions - in a single transaction. The video row is created on the first report
+        for a name and reused after that, so a live camera publishing one report per
+        segment stays one row.
+        segments: [{"start", "end", "summary", "confidence"?, "level"?, "evidence": [{"ts", "caption" | "text"}]}]
+        """
+        ts = utc_now()
+
+        def write(conn: sqlite3.Connection) -> Dict[str, Any]:
+            # only the writer thread inserts videos, so lookup-then-insert cannot race
+            found = conn.execute(SELECT_VIDEO_ID, (video,)).fetchone()
+            video_id = found[0] if found else conn.execute(INSERT_VIDEO, (video, generated_at, ts)).lastrowid
+            report_ids, evidence_rows = [], []
+            for seg in segments:
+                level = seg.get("level") or 0
+                report_id = conn.execute(INSERT_SEGMENT, (ts, seg.get("summary") or "", video_id, seg.get("start"),
+                                                          seg.get("end"), seg.get("confidence"), level)).lastrowid
+                report_ids.append(report_id)
+                self._inserted.append({"id": report_id, "ts": ts, "summary": seg.get("summary") or "", "video": video,
+                                       "start": seg.get("start"), "end": seg.get("end"),
+                                       "confidence": seg.get("confidence"), "level": level})
+                for ev in seg.get("evidence") or []:
+                    if isinstance(ev, dict):
+                        evidence_rows.append((report_id, ev.get("ts"), ev.get("caption", ev.get("text")) or ""))
+                    else:
+                        evidence_rows.append((report_id, None, str(ev)))
+            conn.executemany(INSERT_EVIDENCE, evidence_rows)
+            return {"video_id": video_id, "ts": ts, "segments": len(report_ids), "evidence": len(evidence_rows),
+                    "report_ids": report_ids}
+
+        return self.submit(write).result()
+
+    # ---------- reads ----------
+    def latest_report(self) -> Optional[Dict[str, Any]]:
+        row = self.connection().execute(SELECT_LATEST).fetchone()
+        if not row:
+            return None
+        return {"id": row[0], "ts": row[1], "summary": row[2]}
+
+    def list_reports(self, video: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                     min_confidence: Optional[float] = None, after: Optional[Tuple[str, int]] = None,
+                     limit: int = DEFAULT_PAGE_SIZE,
+                     level: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """
+        One page of reports, newest first, using keyset pagination on (ts, id): `after` is the
+        (ts, id) of the last row of the previous page, so every page is an index range scan
+        no matter how deep it is. since/until bound ts as [since, until) and may use any UTC
+        offset (normalized with normalize_ts; ValueError if invalid); level selects one
+        zoom level (None: all).
+        Returns (rows, key of the last row or None when there are no more pages).
+        """
+        conn = self.connection()
+        clauses, params = ["1"], []
+        if video is not None:
+            video_ids = [r[0] for r in conn.execute("SELECT id FROM videos WHERE name = ?", (video,))]
+            if not video_ids:
+                return [], None
+            # a single `video_id = ?` lets SQLite walk idx_reports_video_ts_id in order;
+            # IN (...) is only for databases written before video rows were reused by name
+            clauses.append("r.video_id = ?" if len(video_ids) == 1
+                           else f"r.video_id IN ({','.join('?' * len(video_ids))})")
+            params.extend(video_ids)
+        if since is not None:
+            clauses.append("r.ts >= ?")
+            params.append(normalize_ts(since))
+        if until is not None:
+            clauses.append("r.ts < ?")
+            params.append(normalize_ts(until))
+        if min_confidence is not None:
+            clauses.append("r.confidence >= ?")
+            params.append(min_confidence)
+        if level is not None:
+            clauses.append("r.level = ?")
+            params.append(level)
+        if after is not None:
+            clauses.append("(r.ts, r.id) < (?, ?)")
+            params.extend(after)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sql = SELECT_REPORT_PAGE.format(where=" AND ".join(clauses))
+        # fetch one extra row to know whether another page exists
+        rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+        more = len(rows) > limit
+        items = [{"id": r[0], "ts": r[1], "summary": r[2], "video": r[3], "start": r[4], "end": r[5],
+                  "confidence": r[6], "level": r[7]} for r in rows[:limit]]
+        next_key = (items[-1]["ts"], items[-1]["id"]) if more else None
+        return items, next_key
+
+    def search(self, query: str, limit: int = 20, snippet_tokens: int = 12,
+               mark: Tuple[str, str] = ("<b>", "</b>")) -> List[Dict[str, Any]]:
+        """
+        Ranked full-text search over summaries and evidence captions. `query` is plain words,
+        all of which must occur in the same summary or caption (porter-stemmed). Returns one
+        hit per report, best bm25 first, with highlighted snippets of what matched.
+        """
+        terms = fts_terms(query)
+        if not terms:
+            return []
+        match = " AND ".join(terms)
+        conn = self.connection()
+        hits: Dict[int, Dict[str, Any]] = {}
+        for sql, field, params in ((SEARCH_SUMMARIES, "summary", (*mark, snippet_tokens, match, limit)),
+                                   (SEARCH_CAPTIONS, "caption", (match, limit, *mark, snippet_tokens, match))):
+            for report_id, snippet, score, ts in conn.execute(sql, params):
+                hit = hits.setdefault(report_id, {"score": score, "highlights": []})
+                hit["score"] = min(hit["score"], score)   # bm25: lower is better
+                highlight = {"field": field, "snippet": snippet}
+                if field == "caption":
+                    highlight["ts"] = ts
+                hit["highlights"].append(highlight)
+        best = sorted(hits.items(), key=lambda kv: kv[1]["score"])[:limit]
+        rows = self.reports_by_id([rid for rid, _ in best])
+        results = []
+        for report_id, hit in best:
+            if report_id in rows:
+                results.append({**rows[report_id], "score": -hit["score"], "highlights": hit["highlights"]})
+        return results
+
+    def reports_by_id(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        sql = SELECT_REPORTS_BY_ID.format(marks=",".join("?" * len(ids)))
+        return {r[0]: {"id": r[0], "ts": r[1], "summary": r[2], "video": r[3], "start": r[4], "end": r[5],
+                       "confidence": r[6], "level": r[7]} for r in self.connection().execute(sql, list(ids))}
+
+    def captions_by_id(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        sql = SELECT_CAPTIONS_BY_ID.format(marks=",".join("?" * len(ids)))
+        return {r[0]: {"ts": r[1], "caption": r[2]} for r in self.connection().execute(sql, list(ids))}
+
+    def reports_after(self, last_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Reports with id > last_id, oldest first (stream clients catching up)."""
+        rows = self.connection().execute(SELECT_REPORTS_AFTER, (last_id, limit)).fetchall()
+        return [{"id": r[0], "ts": r[1], "summary": r[2], "video": r[3], "start": r[4], "end": r[5],
+                 "confidence": r[6], "level": r[7]} for r in rows]
+
+    def summaries_after(self, last_id: int, limit: int) -> List[Tuple[int, int, str]]:
+        """(id, report id, summary) of reports with id > last_id, oldest first (for incremental indexing)."""
+        return self.connection().execute(SELECT_SUMMARIES_AFTER, (last_id, limit)).fetchall()
+
+    def captions_after(self, last_id: int, limit: int) -> List[Tuple[int, int, str]]:
+        """(id, report id, caption) of evidence rows with id > last_id, oldest first."""
+        return self.connection().execute(SELECT_CAPTIONS_AFTER, (last_id, limit)).fetchall()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5)
+        with self._conns_lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
@@ -0,0 +1,467 @@
+# src/app/vectors.py
+"""
+Embedding index for "find events like this one" (GET /similar).
+
+Every report summary and every evidence caption gets one unit-length embedding. The
+vectors live next to the report database in a directory of append-only files:
+
+  vectors.f16   float16 rows (count x dim), read through np.memmap
+  keys.i8       (report_id, evidence_id) per row, evidence_id 0 for a summary
+  lists.i4      coarse cluster of each row (-1 until the index is trained)
+  centroids.npy float32 cluster centroids
+  meta.json     model, dim, count and the last report/evidence id indexed
+
+Queries scan everything exactly while the index is small. Past `train_min` rows a
+spherical k-means (~sqrt(n) clusters) is trained and a query only scores the rows of
+its `nprobe` nearest clusters (an IVF index), which keeps a million vectors in the tens
+of milliseconds on one CPU; it is retrained when the index has grown 4x.
+
+EmbeddingIndexer keeps the index in step with the database: it embeds rows with ids
+above the last ones indexed, in batches, on a background thread woken after each insert.
+The embedder is a sentence-transformers model. make_embedder("auto") reaches it through
+a resident embed worker (embed_worker.py), so the calling process never imports torch;
+without a worker it falls back to a feature-hashing bag of words (lexical, not semantic)
+and the indexer tries the worker again every `retry_s` seconds.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import warnings
+
+import numpy as np
+
+DEFAULT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_TRAIN_MIN = 20_000
+DEFAULT_NPROBE = 16
+DEFAULT_RETRY_S = 60.0
+RETRAIN_GROWTH = 4
+KMEANS_ITERS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+SCAN_CHUNK = 4096
+KEY_DTYPE = np.dtype([("report", "<i8"), ("evidence", "<i8")])
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# ---------- embedders ----------
+class SentenceEmbedder:
+    """sentence-transformers model; imported and loaded when constructed."""
+
+    semantic = True
+
+    def __init__(self, model_name: str = DEFAULT_EMBED_MODEL, device: Optional[str] = None, batch_size: int = 64):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device=device)
+        self.name = model_name
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.batch_size = batch_size
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vecs = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vecs, dtype=np.float32)
+
+
+class HashingEmbedder:
+    """
+    Dependency-free fallback: words and word bigrams hashed into `dim` signed buckets.
+    Lexical rather than semantic, but keeps /similar working without the model.
+    `fallback` is set when it stands in for a model that could not be reached.
+    """
+
+    semantic = False
+
+    def __init__(self, dim: int = 256, fallback: bool = False):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self.fallback = fallback
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        return h % self.dim, (1.0 if (h >> 63) & 1 else -1.0)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w.lower() for w in _WORD.findall(text)]
+            for token in words + [a + " " + b for a, b in zip(words, words[1:])]:
+                col, sign = self._bucket(token)
+                out[row, col] += sign
+        return normalize(out)
+
+
+def make_embedder(kind: str = "auto", model_name: str = DEFAULT_EMBED_MODEL, worker: Optional[str] = None):
+    """
+    kind: "auto" (the embed worker at `worker` if one answers, else hashing), "worker" (the
+    embed worker, which must be running), "sentence-transformers" (the model loaded in this
+    process: imports torch) or "hashing".
+    """
+    if kind == "hashing":
+        return HashingEmbedder()
+    if kind == "sentence-transformers":
+        return SentenceEmbedder(model_name)
+    from .embed_worker import EmbedClient, DEFAULT_ADDRESS
+    try:
+        return EmbedClient(worker or DEFAULT_ADDRESS)
+    except (OSError, EOFError) as e:   # not running, no key file, ...
+        if kind != "auto":
+            raise
+        warnings.warn(f"no embed worker at {worker or DEFAULT_ADDRESS} ({e}); /similar uses the hashing embedder")
+        return HashingEmbedder(fallback=True)
+
+
+def describe_embedder(embedder) -> Dict[str, Any]:
+    """What /similar reports about the vectors it searched."""
+    return {"name": embedder.name, "dim": embedder.dim, "semantic": bool(getattr(embedder, "semantic", False)),
+            "fallback": bool(getattr(embedder, "fallback", False))}
+
+
+# ---------- index ----------
+def spherical_kmeans(data: np.ndarray, nlist: int, iters: int = KMEANS_ITERS, seed: int = 0) -> np.ndarray:
+    """Centroids (nlist x dim, unit length) of unit-length `data` under cosine similarity."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        # re-seed empty clusters from random points
+        sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class VectorIndex:
+    def __init__(self, path: str, train_min: int = DEFAULT_TRAIN_MIN, nprobe: int = DEFAULT_NPROBE):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.train_min = train_min
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._vec_file = self.path / "vectors.f16"
+        self._key_file = self.path / "keys.i8"
+        self._list_file = self.path / "lists.i4"
+        self._centroid_file = self.path / "centroids.npy"
+        self._meta_file = self.path / "meta.json"
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self) -> None:
+        meta = {}
+        if self._meta_file.exists():
+            meta = json.loads(self._meta_file.read_text(encoding="utf-8"))
+        self.model: Optional[str] = meta.get("model")
+        self.dim: int = int(meta.get("dim", 0))
+        self.count: int = int(meta.get("count", 0))
+        self.last_report_id: int = int(meta.get("last_report_id", 0))
+        self.last_evidence_id: int = int(meta.get("last_evidence_id", 0))
+        self.trained_count: int = int(meta.get("trained_count", 0))
+        # rows appended after the last meta.json write (a crash mid-add) are dropped
+        if self.dim:
+            for f, row_bytes in ((self._vec_file, 2 * self.dim), (self._key_file, KEY_DTYPE.itemsize),
+                                 (self._list_file, 4)):
+                if f.exists() and f.stat().st_size > self.count * row_bytes:
+                    os.truncate(f, self.count * row_bytes)
+        self._assign = np.full(max(1024, self.count), -1, dtype=np.int32)
+        if self.count and self._list_file.exists():
+            self._assign[:self.count] = np.fromfile(self._list_file, dtype=np.int32, count=self.count)
+        self._centroids = np.load(self._centroid_file) if self.trained_count and self._centroid_file.exists() else None
+        self._vecs = self._keys = None
+        self._mapped = -1
+        self._rebuild_lists()
+
+    def _write_meta(self) -> None:
+        meta = {"model": self.model, "dim": self.dim, "count": self.count, "last_report_id": self.last_report_id,
+                "last_evidence_id": self.last_evidence_id, "trained_count": self.trained_count}
+        tmp = self._meta_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._meta_file)
+
+    def reset(self, model: str, dim: int) -> None:
+        """Drop every vector (e.g. the embedding model changed) and start over."""
+        with self._lock:
+            for f in (self._vec_file, self._key_file, self._list_file, self._centroid_file):
+                if f.exists():
+                    f.unlink()
+            self.model, self.dim = model, dim
+            self.count = self.last_report_id = self.last_evidence_id = self.trained_count = 0
+            self._write_meta()
+            self._load()
+
+    def _mapped_arrays(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Read-only memmaps of the first `count` rows, re-mapped when the files have grown."""
+        if self._mapped != self.count:
+            if self.count:
+                self._vecs = np.memmap(self._vec_file, dtype=np.float16, mode="r", shape=(self.count, self.dim))
+                self._keys = np.memmap(self._key_file, dtype=KEY_DTYPE, mode="r", shape=(self.count,))
+            else:
+                self._vecs = self._keys = None
+            self._mapped = self.count
+        return self._vecs, self._keys
+
+    # ---------- inverted lists ----------
+    def _rebuild_lists(self) -> None:
+        """Row positions grouped by cluster: _order[_offsets[c]:_offsets[c + 1]] are the rows of cluster c."""
+        if self._centroids is None:
+            self._order = self._offsets = None
+            self._sorted_upto = 0
+            return
+        assign = self._assign[:self.count]
+        self._order = np.argsort(assign, kind="stable").astype(np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(self._centroids)))])
+        self._sorted_upto = self.count
+
+    def _assign_rows(self, vecs: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(vecs), dtype=np.int32)
+        for i in range(0, len(vecs), SCAN_CHUNK):
+            chunk = np.asarray(vecs[i:i + SCAN_CHUNK], dtype=np.float32)
+            out[i:i + SCAN_CHUNK] = np.argmax(chunk @ centroids.T, axis=1)
+        return out
+
+    def train(self) -> None:
+        """
+        (Re)train the coarse clusters on the current rows and reassign every row. The
+        k-means runs outside the lock, so searches keep using the old clusters meanwhile.
+        """
+        with self._lock:
+            vecs, _ = self._mapped_arrays()
+            n = self.count
+        nlist = max(8, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(n, size=min(n, nlist * KMEANS_SAMPLE_PER_LIST), replace=False)
+        centroids = spherical_kmeans(np.asarray(vecs[np.sort(sample)], dtype=np.float32), nlist)
+        assign = self._assign_rows(vecs, centroids)
+        with self._lock:
+            if self.count > n:   # rows added while training
+                newer, _ = self._mapped_arrays()
+                assign = np.concatenate([assign, self._assign_rows(newer[n:], centroids)])
+            np.save(self._centroid_file, centroids)
+            tmp = self._list_file.with_suffix(".tmp")
+            assign.tofile(tmp)
+            os.replace(tmp, self._list_file)
+            self._assign[:len(assign)] = assign
+            self._centroids = centroids
+            self.trained_count = len(assign)
+            self._write_meta()
+            self._rebuild_lists()
+
+    # ---------- writes ----------
+    def add(self, keys: Sequence[Tuple[int, int]], vectors: np.ndarray,
+            last_report_id: Optional[int] = None, last_evidence_id: Optional[int] = None) -> None:
+        """Append rows; (report_id, evidence_id) per vector, evidence_id 0 for a summary."""
+        vectors = normalize(vectors)
+        if len(keys) != len(vectors):
+            raise ValueError("keys and vectors differ in length")
+        with self._lock:
+            if vectors.size and vectors.shape[1] != self.dim:
+                raise ValueError(f"expected {self.dim}-d vectors, got {vectors.shape[1]}")
+            n = len(keys)
+            lists = (self._assign_rows(vectors, self._centroids) if self._centroids is not None
+                     else np.full(n, -1, dtype=np.int32))
+            with open(self._vec_file, "ab") as f:
+                f.write(vectors.astype(np.float16).tobytes())
+            with open(self._key_file, "ab") as f:
+                f.write(np.array(list(keys), dtype=KEY_DTYPE).tobytes())
+            with open(self._list_file, "ab") as f:
+                f.write(lists.tobytes())
+            if self.count + n > len(self._assign):
+                grown = np.full(max(2 * len(self._assign), self.count + n), -1, dtype=np.int32)
+                grown[:self.count] = self._assign[:self.count]
+                self._assign = grown
+            self._assign[self.count:self.count + n] = lists
+            self.count += n
+            if last_report_id is not None:
+                self.last_report_id = max(self.last_report_id, last_report_id)
+            if last_evidence_id is not None:
+                self.last_evidence_id = max(self.last_evidence_id, last_evidence_id)
+            self._write_meta()
+            retrain = self.count >= self.train_min and (
+                self._centroids is None or self.count >= RETRAIN_GROWTH * self.trained_count)
+            if not retrain and self._order is not None and \
+                    self.count - self._sorted_upto > max(SCAN_CHUNK, self._sorted_upto // 8):
+                self._rebuild_lists()
+        if retrain:
+            self.train()
+
+    # ---------- reads ----------
+    def vector_for_report(self, report_id: int) -> Optional[np.ndarray]:
+        """The stored summary embedding of a report, if it has been indexed."""
+        with self._lock:
+            vecs, keys = self._mapped_arrays()
+        if keys is None:
+            return None
+        rows = np.flatnonzero((keys["report"] == report_id) & (keys["evidence"] == 0))
+        return np.asarray(vecs[rows[0]], dtype=np.float32) if len(rows) else None
+
+    def _candidates(self, q: np.ndarray, nprobe: int, count: int) -> Optional[np.ndarray]:
+        """Row positions to score: all rows (None) below train_min, else those of the nprobe nearest clusters."""
+        with self._lock:
+            centroids, order, offsets = self._centroids, self._order, self._offsets
+            sorted_upto, assign = self._sorted_upto, self._assign[:count]
+        if centroids is None:
+            return None
+        probes = np.argpartition(-(centroids @ q), min(nprobe, len(centroids)) - 1)[:nprobe]
+        parts = [order[offsets[c]:offsets[c + 1]] for c in probes]
+        # rows added since the lists were last rebuilt
+        tail = np.arange(sorted_upto, count)
+        parts.append(tail[np.isin(assign[sorted_upto:], probes)])
+        return np.concatenate(parts)
+
+    def search(self, query: np.ndarray, k: int = 10, exclude_report: Optional[int] = None,
+               nprobe: Optional[int] = None, exact: bool = False) -> List[Dict[str, Any]]:
+        """
+        Up to k reports most similar to `query`, best first, one hit per report (the better
+        of its summary and its captions): [{"report_id", "evidence_id", "score"}].
+        """
+        q = normalize(query).reshape(-1)
+        with self._lock:
+            count = self.count
+            vecs, keys = self._mapped_arrays()
+        if not count or q.shape[0] != self.dim:
+            return []
+        positions = None if exact else self._candidates(q, nprobe or self.nprobe, count)
+        if positions is None:
+            scores = np.empty(count, dtype=np.float32)
+            for i in range(0, count, SCAN_CHUNK):
+                scores[i:i + SCAN_CHUNK] = np.asarray(vecs[i:i + SCAN_CHUNK], dtype=np.float32) @ q
+            positions = np.arange(count)
+        else:
+            positions.sort()   # sequential memmap reads
+            scores = np.asarray(vecs[positions], dtype=np.float32) @ q
+        # over-fetch: several rows (summary + captions) can belong to the same report
+        want = min(len(scores), 4 * k + 4)
+        top = np.argpartition(-scores, want - 1)[:want] if want < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        results, seen = [], set()
+        for i in top:
+            key = keys[positions[i]]
+            report_id = int(key["report"])
+            if report_id in seen or report_id == exclude_report:
+                continue
+            seen.add(report_id)
+            results.append({"report_id": report_id, "evidence_id": int(key["evidence"]), "score": float(scores[i])})
+            if len(results) == k:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.model, "dim": self.dim, "vectors": self.count,
+                "lists": 0 if self._centroids is None else len(self._centroids),
+                "last_report_id": self.last_report_id, "last_evidence_id": self.last_evidence_id}
+
+
+# ---------- incremental indexing ----------
+class EmbeddingIndexer:
+    """
+    Embeds report summaries and evidence captions not yet in the index, `batch_size` texts
+    per embedder call. sync() catches up synchronously; start() runs it on a daemon thread
+    that wakes on notify() (called after inserts) or every `poll_s` seconds, to also pick up
+    rows written by other processes. A fallback embedder (no embed worker yet) is replaced
+    by asking the factory again at most every `retry_s` seconds; a different model resets
+    the index, which is then rebuilt with the new vectors.
+    """
+
+    def __init__(self, store, index: VectorIndex, embedder_factory: Callable[[], Any] = make_embedder,
+                 batch_size: int = 64, poll_s: float = 30.0, retry_s: float = DEFAULT_RETRY_S):
+        self.store = store
+        self.index = index
+        self.embedder_factory = embedder_factory
+        self.batch_size = batch_size
+        self.poll_s = poll_s
+        self.retry_s = retry_s
+        self._embedder = None
+        self._resolved_at = 0.0
+        self._embedder_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def embedder(self):
+        with self._embedder_lock:
+            if self._embedder is None:
+                self._resolve()
+            return self._embedder
+
+    def _resolve(self, quiet: bool = False) -> None:
+        """(Re)create the embedder; called with _embedder_lock held."""
+        with warnings.catch_warnings():
+            if quiet:
+                warnings.simplefilter("ignore")
+            self._embedder = self.embedder_factory()
+        self._resolved_at = time.monotonic()
+        if (self.index.model, self.index.dim) != (self._embedder.name, self._embedder.dim):
+            self.index.reset(self._embedder.name, self._embedder.dim)
+
+    def _retry_fallback(self) -> None:
+        """Swap a fallback embedder for the real one once it can be reached; called with _sync_lock held."""
+        with self._embedder_lock:
+            if getattr(self._embedder, "fallback", False) and time.monotonic() - self._resolved_at >= self.retry_s:
+                self._resolve(quiet=True)   # warned once already
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.embedder.embed(texts)
+
+    def _index_rows(self, fetch: Callable[[int, int], List[Tuple[int, int, str]]], is_caption: bool) -> int:
+        done = 0
+        while True:
+            last = self.index.last_evidence_id if is_caption else self.index.last_report_id
+            rows = fetch(last, self.batch_size)
+            if not rows:
+                return done
+            vectors = self.embed([text for _, _, text in rows])
+            keys = [(report_id, row_id if is_caption else 0) for row_id, report_id, text in rows]
+            last_id = rows[-1][0]
+            if is_caption:
+                self.index.add(keys, vectors, last_evidence_id=last_id)
+            else:
+                self.index.add(keys, vectors, last_report_id=last_id)
+            done += len(rows)
+
+    def sync(self) -> int:
+        """Embed everything inserted since the last sync; returns the number of rows indexed."""
+        with self._sync_lock:
+            self.embedder   # load, and reset the index if the model changed
+            self._retry_fallback()
+            return (self._index_rows(self.store.summaries_after, False)
+                    + self._index_rows(self.store.captions_after, True))
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.poll_s)
+            self._wake.clear()
+            if self._stopped:
+                break
+            try:
+                self.sync()
+            except Exception as e:   # keep serving; retried on the next wake-up
+                print(f"[Vectors] indexing failed: {e}")
+
+    def start(self) -> "EmbeddingIndexer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="embedding-indexer", daemon=True)
+            self._thread.start()
+            self._wake.set()   # catch up on whatever is already in the database
+        return self
+
+    def close(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
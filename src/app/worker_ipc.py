@@ -0,0 +1,150 @@
+# src/app/worker_ipc.py
+"""
+The local-socket protocol shared by the resident model workers: the caption worker
+(scripts/caption_worker.py) and the embed worker (src/app/embed_worker.py).
+
+multiprocessing.connection carries pickled messages, and unpickling runs code, so the
+shared key is the whole security boundary. Each worker has its own key: the
+<PREFIX>_AUTHKEY environment variable when set, else a random key the worker writes on
+first start to <PREFIX>_KEYFILE (or its default path), mode 0600, which clients on the
+same machine read. There is no built-in default key.
+
+One request dict per message, one response dict back; {"op": "shutdown"} stops the
+worker and failures come back as {"error": "..."}. Each client connection gets a thread.
+
+Addresses: "host:port" (TCP), "unix:/path/to.sock", or a Windows named pipe
+r"\\\\.\\pipe\\name". TCP on a non-loopback host is refused unless allow_remote.
+
+Standard library only, like metrics.py: the pipeline scripts load it from its file.
+"""
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+import ipaddress
+import os
+import secrets
+import socket
+import threading
+
+Address = Union[str, Tuple[str, int]]
+
+
+def load_authkey(prefix: str, default_keyfile: Path, create: bool = False) -> bytes:
+    """
+    <prefix>_AUTHKEY, else the key file (<prefix>_KEYFILE or default_keyfile). With create
+    (the worker), a missing key file is created with a random key, readable by its owner
+    only. Clients without a key get FileNotFoundError.
+    """
+    key = os.environ.get(f"{prefix}_AUTHKEY")
+    if key:
+        return key.encode("utf-8")
+    path = Path(os.environ.get(f"{prefix}_KEYFILE", str(default_keyfile)))
+    if create and not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as fh:
+            fh.write(secrets.token_hex(32))
+    return path.read_text().strip().encode("utf-8")
+
+
+def parse_address(address: str) -> Address:
+    if address.startswith("unix:"):
+        return address[len("unix:"):]
+    if address.startswith("\\\\"):
+        return address
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def is_loopback(address: Address) -> bool:
+    """Unix sockets and named pipes are local; TCP hosts must resolve to a loopback address."""
+    if isinstance(address, str):
+        return True
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(address[0])).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+class WorkerServer:
+    """Accept loop and per-connection threads; subclasses implement handle(req) -> response."""
+
+    label = "worker"   # thread names
+
+    def __init__(self, address: str, authkey: bytes, allow_remote: bool = False):
+        parsed = parse_address(address)
+        if not allow_remote and not is_loopback(parsed):
+            raise ValueError(f"refusing to serve on non-loopback {address} (pass allow_remote=True / --allow-remote)")
+        self.listener = Listener(parsed, authkey=authkey)
+        self.address = self.listener.address
+        self._authkey = authkey
+        self._closed = threading.Event()
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _serve_conn(self, conn: Connection) -> None:
+        with conn:
+            while not self._closed.is_set():
+                try:
+                    req = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    resp = {"ok": True} if req.get("op") == "shutdown" else self.handle(req)
+                except Exception as e:
+                    resp = {"error": f"{type(e).__name__}: {e}"}
+                conn.send(resp)
+                if req.get("op") == "shutdown":
+                    self.close()
+
+    def serve_forever(self) -> None:
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, AuthenticationError):   # e.g. a client with the wrong key
+                if self._closed.is_set():
+                    break
+                continue
+            if self._closed.is_set():
+                conn.close()
+                break
+            threading.Thread(target=self._serve_conn, args=(conn,), name=f"{self.label}-conn", daemon=True).start()
+        self.listener.close()
+
+    def close(self) -> None:
+        """Stop serve_forever (from any thread): set the flag, then wake accept() with a connection."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            Client(self.address, authkey=self._authkey).close()
+        except (OSError, AuthenticationError):
+            pass
+
+
+class WorkerClient:
+    """One connection to a worker; calls are serialized, so an instance is thread-safe."""
+
+    label = "worker"   # error messages
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self._conn = Client(parse_address(address), authkey=authkey)
+        self._lock = threading.Lock()
+
+    def _call(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._conn.send(req)
+            resp = self._conn.recv()
+        if "error" in resp:
+            raise RuntimeError(f"{self.label} {self.address}: {resp['error']}")
+        return resp
+
+    def shutdown(self) -> None:
+        self._call({"op": "shutdown"})
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
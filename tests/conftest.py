@@ -6,3 +6,34 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+# Standalone pipeline modules under scripts/ import each other by bare name
+SCRIPTS = ROOT / "scripts"
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+# Keep the module-level store in src/app/main.py away from the checked-in reports.db
+import os
+import tempfile
+os.environ.setdefault("REPORTS_DB", str(Path(tempfile.mkdtemp(prefix="reports-test-")) / "reports.db"))
+
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A fresh ReportStore installed as the API's main.store; the previous one is put back after."""
+    import src.app.main as main
+    from src.app.store import ReportStore
+    s, saved = ReportStore(str(tmp_path / "reports.db")), main.store
+    main.store = s
+    yield s
+    main.store = saved
+    s.close()
+
+
+@pytest.fixture
+def client(store):
+    import src.app.main as main
+    from fastapi.testclient import TestClient
+    return TestClient(main.app)
@@ -0,0 +1,62 @@
+# tests/test_adaptive_sampling.py
+import numpy as np
+from adaptive_sampling import allocate_budget, motion_energy, pick_active
+from extract_frames import FrameWriter
+from frame_index import FrameIndex, FrameIndexWriter
+from pipeline_blip_ollama import caption_windows
+
+def test_motion_energy_is_mean_abs_difference():
+    grays = np.zeros((3, 4, 4), dtype=np.uint8)
+    grays[1] = 10
+    assert motion_energy(grays).tolist() == [0.0, 10.0, 10.0]
+    assert motion_energy(grays[:1]).tolist() == [0.0]
+
+def test_pick_active_follows_the_energy():
+    assert pick_active([0.1] * 9, k=3) == [4]                       # quiet: the middle frame
+    assert pick_active([0.1] * 9, k=3, min_picks=3) == [1, 4, 7]
+    assert pick_active([0, 5, 0, 0, 6, 0], k=3) == [1, 4]            # fewer active than k
+    burst = [0.0] * 10 + [50.0] * 4 + [3.0] * 6
+    picks = pick_active(burst, k=3)
+    assert len(picks) == 3 and all(10 <= p < 14 for p in picks[:2])
+
+def test_allocate_budget_per_minute():
+    ts = np.arange(0, 180, 1.0)
+    energy = np.zeros(len(ts), dtype=np.float32)
+    energy[70:100] = 10.0                                            # activity in minute 2 only
+    keep = allocate_budget(ts, energy, budget_per_minute=6, min_per_minute=1)
+    per_minute = np.bincount((ts[keep] // 60).astype(int), minlength=3).tolist()
+    assert per_minute == [1, 6, 1]
+    assert all(70 <= ts[i] < 100 for i in keep if 60 <= ts[i] < 120)
+    assert allocate_budget(np.array([60.0]), np.array([9.0])).tolist() == [0]
+
+def test_index_round_trips_motion(tmp_path):
+    writer = FrameIndexWriter(tmp_path, "cam.mp4", video_fps=10.0)
+    for i in range(4):
+        writer.append(float(i), i * 10, motion=float(i))
+    writer.close(json_export=False)
+    index = FrameIndex.load(tmp_path)
+    assert np.asarray(index.motion).tolist() == [0.0, 1.0, 2.0, 3.0]
+
+    writer = FrameIndexWriter(tmp_path / "old", "cam.mp4")
+    writer.append(0.0, 0)
+    writer.append(1.0, 10, motion=1.0)
+    writer.close(json_export=False)
+    assert FrameIndex.load(tmp_path / "old").motion is None           # incomplete column: none
+
+class FakeBlip:
+    def caption_images(self, images):
+        return [f"mean {int(np.asarray(img).mean())}" for img in images]
+
+def test_adaptive_windows_caption_one_frame_when_quiet(tmp_path):
+    writer = FrameWriter(tmp_path, "cam.mp4", video_fps=10.0, pack=True, pack_size=32)
+    for i in range(40):
+        value = 40 if i < 20 else (i % 2) * 200                     # still, then flickering
+        writer.write(float(i), np.full((36, 64, 3), value, dtype=np.uint8))
+    writer.close()
+    kw = dict(window_size=20.0, stride=20.0, frames_per_window=3, get_blip=FakeBlip,
+              caption_cache_path=None)
+    fixed = caption_windows(tmp_path, **kw)
+    adaptive = caption_windows(tmp_path, adaptive=True, **kw)
+    assert [len(c) for c in fixed["captioned"]] == [3, 3]
+    assert [len(c) for c in adaptive["captioned"]] == [1, 3]
+    assert adaptive["captioned"][0][0]["ts"] == 10.0
@@ -0,0 +1,63 @@
+# tests/test_batch_ingest.py
+import json
+import shutil
+import sys
+from pathlib import Path
+import batch_ingest
+import pipeline_blip_ollama as pipeline
+from extract_frames import extract_frames
+from ollama_stub_server import start_stub_server
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+from mocks import MockBlip  # noqa: E402
+
+VIDEO = ROOT / "data" / "raw" / "EJFBM.mp4"
+
+def test_batch_extracts_captions_and_summarizes(tmp_path, monkeypatch):
+    raw, processed, reports = tmp_path / "raw", tmp_path / "processed", tmp_path / "reports"
+    raw.mkdir()
+    for name in ("a.mp4", "b.mp4"):
+        shutil.copy(VIDEO, raw / name)
+    extract_frames(raw / "b.mp4", processed / "b")   # b skips extraction and is captioned first
+    monkeypatch.setattr(batch_ingest, "DEFAULT_REPORTS_DIR", reports)
+    monkeypatch.setattr(pipeline, "DEFAULT_OUTPUT_DIR", reports)
+    blip = MockBlip(per_call_s=0.0, per_image_s=0.0)
+    monkeypatch.setattr(pipeline, "blip_loader", lambda *a: (lambda: blip, False, "mock-blip"))
+    server, url = start_stub_server()
+    try:
+        kw = {"llm_backend": "http", "ollama_url": url, "ollama_model": "stub",
+              "caption_cache_path": tmp_path / "captions.sqlite", "llm_cache_path": tmp_path / "llm.sqlite"}
+        report = batch_ingest.run_batch(raw, processed, extract_workers=1, pipeline_kwargs=kw)
+        assert report["videos_completed"] == 2 and not report["videos_failed"]
+        assert report["stages"]["extract"]["videos"] == 1 and report["stages"]["caption"]["videos"] == 2
+        assert blip.images == 7                   # same frames in both copies: captioned once
+        for name in ("a.mp4", "b.mp4"):
+            assert json.loads((reports / f"{name}_summaries.json").read_text())["summaries"]
+        again = batch_ingest.run_batch(raw, processed, extract_workers=1, pipeline_kwargs=kw)
+        assert again["videos_skipped"] == 2 and again["videos_completed"] == 0
+    finally:
+        server.shutdown()
+
+def test_batch_skips_videos_pushed_to_the_api(tmp_path, monkeypatch):
+    raw, processed, reports = tmp_path / "raw", tmp_path / "processed", tmp_path / "reports"
+    raw.mkdir()
+    shutil.copy(VIDEO, raw / "a.mp4")
+    monkeypatch.setattr(batch_ingest, "DEFAULT_REPORTS_DIR", reports)
+    monkeypatch.setattr(pipeline, "DEFAULT_OUTPUT_DIR", reports)
+    monkeypatch.setattr(pipeline, "blip_loader", lambda *a: (lambda: MockBlip(0.0, 0.0), False, "mock-blip"))
+    pushed = []
+    monkeypatch.setattr(pipeline, "push_report", lambda url, report: pushed.append(report) or {})
+    server, url = start_stub_server()
+    try:
+        kw = {"llm_backend": "http", "ollama_url": url, "ollama_model": "stub", "push_url": "http://reports.test",
+              "caption_cache_path": tmp_path / "captions.sqlite", "llm_cache_path": tmp_path / "llm.sqlite"}
+        report = batch_ingest.run_batch(raw, processed, extract_workers=1, pipeline_kwargs=kw)
+        assert report["videos_completed"] == 1 and len(pushed) == 1
+        assert not reports.exists()               # pushed, so no report file to find
+        marker = json.loads((processed / "a" / batch_ingest.DONE_MARKER).read_text())
+        assert marker["report"] == "http://reports.test"
+        again = batch_ingest.run_batch(raw, processed, extract_workers=1, pipeline_kwargs=kw)
+        assert again["videos_skipped"] == 1 and again["videos_completed"] == 0 and len(pushed) == 1
+    finally:
+        server.shutdown()
@@ -0,0 +1,62 @@
+# tests/test_bulk.py
+import json
+
+REPORT = {
+    "video": "EJFBM.mp4",
+    "generated_at": "2025-11-02T12:42:55+00:00",
+    "summaries": [
+        {"start": 0.0, "end": 40.0, "summary": "a woman sitting on a couch", "confidence": 0.8,
+         "evidence": [{"ts": 0.0, "caption": "a small room with a bed"}, {"ts": 10.0, "caption": "a woman on a couch"}]},
+        {"start": 60.0, "end": 80.0, "summary": "an empty bedroom", "confidence": 0.4,
+         "evidence": [{"ts": 61.0, "text": "an empty bedroom"}]},
+    ],
+}
+
+def test_bulk_json_inserts_video_segments_and_evidence(client, store):
+    r = client.post("/reports/bulk", json=REPORT)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["segments"] == 2 and body["evidence"] == 3
+    conn = store.connection()
+    rows = conn.execute("SELECT summary, start_s, end_s, confidence, video_id FROM reports ORDER BY id").fetchall()
+    assert rows == [("a woman sitting on a couch", 0.0, 40.0, 0.8, body["video_id"]),
+                    ("an empty bedroom", 60.0, 80.0, 0.4, body["video_id"])]
+    captions = [r[0] for r in conn.execute("SELECT caption FROM evidence ORDER BY id")]
+    assert captions == ["a small room with a bed", "a woman on a couch", "an empty bedroom"]
+    assert client.get("/latest-report").json()["summary"] == "an empty bedroom"
+
+def test_bulk_ndjson_stream(client, store):
+    lines = [json.dumps({"generated_at": REPORT["generated_at"]})] + [json.dumps(s) for s in REPORT["summaries"]]
+    r = client.post("/reports/bulk?video=cam-7.mp4", content="\n".join(lines),
+                    headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 200 and r.json()["segments"] == 2
+    name = store.connection().execute("SELECT name FROM videos").fetchone()[0]
+    assert name == "cam-7.mp4"
+
+def test_bulk_ndjson_rejects_non_object_lines(client, store):
+    for line in ("42", '["start"]', "null"):
+        r = client.post("/reports/bulk?video=cam-7.mp4", content=line + "\n" + json.dumps(REPORT["summaries"][0]),
+                        headers={"Content-Type": "application/x-ndjson"})
+        assert r.status_code == 400, line
+    assert store.connection().execute("SELECT COUNT(*) FROM reports").fetchone()[0] == 0
+
+def test_reports_for_one_name_share_a_video_row(client, store):
+    ids = {client.post("/reports/bulk", json={**REPORT, "video": "cam1"}).json()["video_id"] for _ in range(3)}
+    assert len(ids) == 1
+    assert store.connection().execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 1
+    assert len(client.get("/reports", params={"video": "cam1"}).json()["items"]) == 6
+
+def test_bulk_rejects_missing_video(client):
+    r = client.post("/reports/bulk", json={"summaries": []})
+    assert r.status_code == 422
+
+def test_digests_are_stored_with_their_level(client, store):
+    report = {**REPORT, "digests": [{"start": 0.0, "end": 80.0, "summary": "a woman leaves the bedroom",
+                                     "confidence": 0.7, "level": 1}]}
+    assert client.post("/reports/bulk", json=report).json()["segments"] == 3
+    top = client.get("/reports", params={"level": 1}).json()["items"]
+    assert [(i["summary"], i["level"], i["start"], i["end"]) for i in top] == [
+        ("a woman leaves the bedroom", 1, 0.0, 80.0)]
+    segments = client.get("/reports", params={"video": "EJFBM.mp4", "level": 0}).json()["items"]
+    assert {i["summary"] for i in segments} == {"a woman sitting on a couch", "an empty bedroom"}
+    assert len(client.get("/reports").json()["items"]) == 3
@@ -0,0 +1,36 @@
+# tests/test_caption_cache.py
+from caption_cache import CaptionCache
+
+def write_frame(path, payload):
+    path.write_bytes(payload)
+    return path
+
+def test_hit_after_store(tmp_path):
+    frame = write_frame(tmp_path / "frame_0000.jpg", b"jpeg-bytes-0")
+    cache = CaptionCache(tmp_path / "captions.sqlite", model_name="blip", params={"max_length": 40})
+    hits, missing = cache.lookup([frame, frame])
+    assert hits == {} and list(missing) == [frame]
+    cache.store({missing[frame]: "a parking lot"})
+    hits, missing = cache.lookup([frame])
+    assert hits == {frame: "a parking lot"} and missing == {}
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_key_depends_on_content_and_params(tmp_path):
+    frame = write_frame(tmp_path / "frame_0000.jpg", b"jpeg-bytes-0")
+    a = CaptionCache(tmp_path / "captions.sqlite", model_name="blip", params={"max_length": 40})
+    b = CaptionCache(tmp_path / "captions.sqlite", model_name="blip", params={"max_length": 20})
+    key = a.key_for(frame)
+    assert key != b.key_for(frame)
+    write_frame(frame, b"jpeg-bytes-changed")
+    assert key != a.key_for(frame)
+
+def test_lru_eviction(tmp_path):
+    frames = [write_frame(tmp_path / f"frame_{i:04d}.jpg", f"jpeg-{i}".encode()) for i in range(3)]
+    cache = CaptionCache(tmp_path / "captions.sqlite", model_name="blip", max_entries=2)
+    for i, f in enumerate(frames):
+        _, missing = cache.lookup([f])
+        cache.store({missing[f]: f"caption {i}"})
+    hits, missing = cache.lookup(frames)
+    assert cache.stats()["entries"] == 2
+    assert frames[0] in missing and frames[2] in hits
@@ -0,0 +1,39 @@
+# tests/test_caption_frames.py
+import sys
+from pathlib import Path
+from PIL import Image
+from pipeline_blip_ollama import caption_frames
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+from mocks import MockBlip, write_synthetic_frames  # noqa: E402
+
+def test_unique_frames_in_batches(tmp_path):
+    paths = write_synthetic_frames(tmp_path, 10, size=(32, 24))
+    blip = MockBlip(per_call_s=0.0, per_image_s=0.0)
+    captions = caption_frames(blip, paths + paths[:4], batch_size=4)
+    assert list(captions) == paths                  # each frame once, in order
+    assert (blip.calls, blip.images) == (3, 10)      # batches of 4, 4, 2
+    assert captions == caption_frames(MockBlip(0.0, 0.0), paths, batch_size=1)
+
+def test_failed_batch_is_retried_frame_by_frame(tmp_path):
+    paths = write_synthetic_frames(tmp_path, 5, size=(32, 24))
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not a jpeg")
+    blip = MockBlip(per_call_s=0.0, per_image_s=0.0)
+    captions = caption_frames(blip, paths[:2] + [broken] + paths[2:], batch_size=3)
+    assert captions[broken] == ""
+    assert all(captions[p].endswith(("lot", "dock", "gate", "corridor", "street")) for p in paths)
+    assert blip.images == 5                          # the good frames of the failed batch, one by one
+
+def test_refs_are_loaded_with_load_images():
+    blip = MockBlip(per_call_s=0.0, per_image_s=0.0)
+    images = {i: Image.new("RGB", (16, 16), (40 * i, 0, 0)) for i in range(3)}
+
+    def load(refs):
+        if 2 in refs and len(refs) > 1:
+            raise OSError("torn record")
+        return [images[r] for r in refs]
+
+    captions = caption_frames(blip, [0, 1, 2, 1], batch_size=8, load_images=load)
+    assert list(captions) == [0, 1, 2] and all(captions.values())
@@ -0,0 +1,86 @@
+# tests/test_caption_worker.py
+import os
+import stat
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import pytest
+from PIL import Image
+from caption_worker import CaptionClient, CaptionServer, load_authkey
+from pipeline_blip_ollama import blip_loader, caption_cache_params, BLIP_MODEL_NAME
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+
+class FakeBlip:
+    model_name = "fake-blip"
+    quantized = True
+
+    def caption_batch(self, paths):
+        if any(p.name == "broken.jpg" for p in paths):
+            raise OSError("cannot identify image file")
+        return [f"file {p.name}" for p in paths]
+
+    def caption_images(self, images):
+        return [f"{img.mode} {img.size[0]}x{img.size[1]}" for img in images]
+
+@pytest.fixture(autouse=True)
+def keyfile(tmp_path, monkeypatch):
+    monkeypatch.delenv("CAPTION_WORKER_AUTHKEY", raising=False)
+    monkeypatch.setenv("CAPTION_WORKER_KEYFILE", str(tmp_path / "keys" / "worker.key"))
+    return tmp_path / "keys" / "worker.key"
+
+@pytest.fixture
+def worker(tmp_path):
+    server = CaptionServer(FakeBlip(), address="127.0.0.1:0", roots=[tmp_path])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, "{}:{}".format(*server.address)
+    server.close()
+    thread.join(timeout=5)
+
+def test_client_round_trip(worker, tmp_path):
+    server, address = worker
+    client = CaptionClient(address)
+    assert client.model_name == "fake-blip" and client.quantized is True
+    assert client.caption_batch([tmp_path / "a.jpg", tmp_path / "b.jpg"]) == ["file a.jpg", "file b.jpg"]
+    assert client.caption_images([Image.new("L", (4, 3)), Image.new("RGB", (2, 2))]) == ["RGB 4x3", "RGB 2x2"]
+    with pytest.raises(RuntimeError, match="cannot identify"):
+        client.caption(tmp_path / "broken.jpg")
+    assert client.caption(tmp_path / "c.jpg") == "file c.jpg"   # connection still usable
+    assert server.served == 5
+    client.close()
+
+def test_key_file_paths_and_hosts(worker, keyfile, tmp_path):
+    server, address = worker
+    assert stat.S_IMODE(os.stat(keyfile).st_mode) == 0o600 and len(load_authkey()) == 64
+    client = CaptionClient(address)
+    with pytest.raises(RuntimeError, match="outside the worker's roots"):
+        client.caption_batch([tmp_path.parent / "elsewhere.jpg"])
+    client.close()
+    with pytest.raises(ValueError, match="non-loopback"):
+        CaptionServer(FakeBlip(), address="0.0.0.0:0")
+    keyfile.unlink()
+    with pytest.raises(FileNotFoundError):   # no key, no connection (blip_loader falls back)
+        CaptionClient(address)
+
+def test_shutdown_stops_server(tmp_path):
+    server = CaptionServer(FakeBlip(), address="127.0.0.1:0")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    CaptionClient("{}:{}".format(*server.address)).shutdown()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+def test_loader_uses_worker_or_falls_back(worker):
+    _, address = worker
+    get_blip, quantized, model = blip_loader(address)
+    assert isinstance(get_blip(), CaptionClient) and quantized is True and model == "fake-blip"
+    get_blip, quantized, model = blip_loader("127.0.0.1:1", quantize=False)   # nothing listening
+    assert get_blip.func.__name__ == "BlipWrapper" and quantized is False and model == BLIP_MODEL_NAME
+    assert caption_cache_params(True) != caption_cache_params(False)
+
+def test_pipeline_import_does_not_load_torch():
+    code = "import sys, pipeline_blip_ollama; print('torch' in sys.modules or 'transformers' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(SCRIPTS), capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,29 @@
+# tests/test_extract_frames.py
+from pathlib import Path
+import numpy as np
+import extract_frames
+from extract_frames import iter_frames
+
+VIDEO = Path(__file__).resolve().parents[1] / "data" / "raw" / "EJFBM.mp4"
+
+def decode(mode, **kw):
+    return list(iter_frames(VIDEO, sample_fps=1.0, mode=mode, **kw))
+
+def test_decode_modes_yield_the_same_frames():
+    read = decode("read")
+    assert len(read) == 26
+    for mode in ("grab", "seek", "auto"):
+        other = decode(mode)
+        assert [t for t, _ in other] == [t for t, _ in read], mode
+        assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(other, read)), mode
+
+def test_seek_without_frame_count_falls_back_to_grab(monkeypatch):
+    real_open = extract_frames.open_video
+
+    def no_count(path):
+        cap, fps, _ = real_open(path)
+        return cap, fps, 0
+
+    monkeypatch.setattr(extract_frames, "open_video", no_count)
+    frames = decode("seek", max_frames=5)
+    assert [t for t, _ in frames] == [0.0, 1.0, 2.0, 3.0, 4.0]
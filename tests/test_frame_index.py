@@ -0,0 +1,82 @@
+# tests/test_frame_index.py
+import json
+import numpy as np
+from PIL import Image
+from frame_index import FrameIndex, FrameIndexWriter, HEADER_FILE, LEGACY_FILE, has_index
+from pipeline_blip_ollama import caption_windows
+
+def test_writer_round_trip_is_memory_mapped(tmp_path):
+    writer = FrameIndexWriter(tmp_path, "cam.mp4", video_fps=25.0)
+    for i in range(5):
+        assert writer.next_path() == tmp_path / f"frame_{i:04d}.jpg"
+        writer.append(i * 0.5, i * 12)
+    writer.close()
+    index = FrameIndex.load(tmp_path)
+    assert isinstance(index.ts, np.memmap) and len(index) == 5
+    assert index.video == "cam.mp4" and index.video_fps == 25.0
+    assert index.ts.tolist() == [0.0, 0.5, 1.0, 1.5, 2.0] and index.frame.tolist() == [0, 12, 24, 36, 48]
+    assert index.path(3) == tmp_path / "frame_0003.jpg"
+    meta = json.loads((tmp_path / LEGACY_FILE).read_text(encoding="utf-8"))
+    assert [f["index"] for f in meta["frames"]] == list(range(5)) and meta["frames"][2]["ts"] == 1.0
+    assert meta["frames"][2]["path"].endswith("frame_0002.jpg")
+
+def test_empty_index(tmp_path):
+    FrameIndexWriter(tmp_path, "empty.mp4").close(json_export=False)
+    assert has_index(tmp_path) and not (tmp_path / LEGACY_FILE).exists()
+    assert len(FrameIndex.load(tmp_path)) == 0
+
+def test_legacy_metadata_is_converted(tmp_path):
+    frames = [{"index": i, "ts": float(i), "path": f"data\\processed\\cam\\frame_{i:04d}.jpg"} for i in (1, 0, 2)]
+    (tmp_path / LEGACY_FILE).write_text(json.dumps({"video": "cam.mp4", "frames": frames}), encoding="utf-8")
+    index = FrameIndex.load(tmp_path)
+    assert index.ts.tolist() == [0.0, 1.0, 2.0] and index.names is None
+    assert index.path(1) == tmp_path / "frame_0001.jpg"
+    assert (tmp_path / HEADER_FILE).exists()
+    assert isinstance(FrameIndex.load(tmp_path).ts, np.memmap)
+
+    other = tmp_path / "other"
+    other.mkdir()
+    rows = [{"index": 0, "ts": 0.0, "path": "/abs/shot_a.jpg"}, {"index": 1, "ts": 3.0, "path": "/abs/shot_b.jpg"}]
+    (other / LEGACY_FILE).write_text(json.dumps({"video": "x.mp4", "frames": rows}), encoding="utf-8")
+    assert FrameIndex.load(other).paths([0, 1]) == [other / "shot_a.jpg", other / "shot_b.jpg"]
+
+class FakeBlip:
+    def caption_batch(self, paths):
+        return [f"caption {p.name}" for p in paths]
+
+def test_caption_windows_reads_the_index(tmp_path):
+    writer = FrameIndexWriter(tmp_path, "cam.mp4")
+    for i in range(30):
+        Image.new("RGB", (8, 8), (i, i, i)).save(writer.next_path())
+        writer.append(float(i))
+    writer.close(json_export=False)
+    stage = caption_windows(tmp_path, window_size=20.0, stride=10.0, frames_per_window=3,
+                            get_blip=FakeBlip, caption_cache_path=None)
+    assert stage["video"] == "cam.mp4"
+    assert [(w["start"], w["lo"], w["hi"]) for w in stage["windows"]] == [(0.0, 0, 20), (10.0, 10, 30),
+                                                                            (20.0, 20, 30)]
+    first = stage["captioned"][0]
+    assert [f["ts"] for f in first] == [0.0, 10.0, 19.0]
+    assert first[1]["caption"] == "caption frame_0010.jpg"
+
+def test_caption_cache_is_keyed_on_the_active_model(tmp_path):
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    writer = FrameIndexWriter(frames, "cam.mp4")
+    for i in range(10):
+        Image.new("RGB", (8, 8), (i, i, i)).save(writer.next_path())
+        writer.append(float(i))
+    writer.close(json_export=False)
+    loads = []
+
+    def get_blip():
+        loads.append(1)
+        return FakeBlip()
+
+    kw = {"window_size": 20.0, "stride": 10.0, "frames_per_window": 3, "get_blip": get_blip,
+          "caption_cache_path": tmp_path / "captions.sqlite"}
+    caption_windows(frames, blip_model="worker/blip-large", **kw)
+    caption_windows(frames, blip_model="worker/blip-large", **kw)
+    assert len(loads) == 1                                   # second run: all hits
+    assert caption_windows(frames, blip_model="blip-base", **kw)["frames_captioned"] == 3
+    assert len(loads) == 2                                   # another model's captions are not reused
@@ -0,0 +1,68 @@
+# tests/test_frame_store.py
+import numpy as np
+from extract_frames import FrameWriter
+from frame_index import FrameIndex, LEGACY_FILE
+from frame_store import PackReader, PackWriter, OFFSETS_FILE, PACK_FILE
+from pipeline_blip_ollama import caption_windows
+
+def frame(h, w, value):
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    img[:, : w // 2] = value
+    return img
+
+def test_round_trip_downscales_to_shorter_side(tmp_path):
+    writer = PackWriter(tmp_path, size=384)
+    assert writer.append(frame(720, 1280, 200)) == 0
+    assert writer.append(frame(100, 60, 50)) == 1      # never upscaled
+    writer.close()
+    reader = PackReader(tmp_path)
+    assert len(reader) == 2
+    assert reader.decode(0).shape == (384, 683, 3) and reader.decode(1).shape == (100, 60, 3)
+    assert reader.image(0).mode == "RGB" and reader.image(0).size == (683, 384)
+    assert bytes(reader.raw(1)[:2]) == b"\xff\xd8"       # JPEG SOI, straight from the mapping
+    assert reader.digest(0) != reader.digest(1)
+    reader.close()
+
+def test_torn_tail_is_ignored(tmp_path):
+    writer = PackWriter(tmp_path)
+    for v in (10, 20, 30):
+        writer.append(frame(48, 64, v))
+    writer.close()
+    size = (tmp_path / PACK_FILE).stat().st_size
+    with open(tmp_path / PACK_FILE, "r+b") as fh:      # crash mid-payload of the last frame
+        fh.truncate(size - 10)
+    with open(tmp_path / OFFSETS_FILE, "ab") as fh:    # ...and mid-offset record
+        fh.write(b"\x00" * 5)
+    assert len(PackReader(tmp_path)) == 2
+    resumed = PackWriter(tmp_path, resume=True)
+    assert resumed.count == 3
+    resumed.close()
+
+class FakeBlip:
+    def __init__(self):
+        self.seen = []
+
+    def caption_images(self, images):
+        self.seen.extend(img.size for img in images)
+        return [f"mean {int(np.asarray(img).mean())}" for img in images]
+
+def test_caption_windows_reads_a_pack(tmp_path):
+    writer = FrameWriter(tmp_path, "cam.mp4", video_fps=10.0, pack=True, pack_size=32)
+    for i in range(30):
+        writer.write(float(i), np.full((64, 96, 3), i * 8, dtype=np.uint8))
+    writer.close()
+    index = FrameIndex.load(tmp_path)
+    assert index.store == "pack" and len(index) == 30 and index.frame[3] == 30
+    assert not (tmp_path / LEGACY_FILE).exists() and not list(tmp_path.glob("*.jpg"))
+
+    blip = FakeBlip()
+    cache = tmp_path / "captions.sqlite"
+    stage = caption_windows(tmp_path, window_size=20.0, stride=10.0, frames_per_window=3,
+                            get_blip=lambda: blip, caption_cache_path=cache)
+    first = stage["captioned"][0]
+    assert [f["ts"] for f in first] == [0.0, 10.0, 19.0]
+    assert first[1]["caption"] == "mean 80" and set(blip.seen) == {(48, 32)}
+    assert stage["frames_captioned"] == len(blip.seen) > 0
+    again = caption_windows(tmp_path, window_size=20.0, stride=10.0, frames_per_window=3,
+                            get_blip=lambda: None, caption_cache_path=cache)
+    assert again["frames_captioned"] == 0 and again["captioned"] == stage["captioned"]
@@ -1,23 +1,16 @@
 # tests/test_health.py
-import sqlite3
 import pytest
 from fastapi.testclient import TestClient
 import src.app.main as main  # imports your FastAPI app
+from src.app.store import ReportStore
 
 @pytest.fixture(autouse=True)
-def use_in_memory_db():
-    conn = sqlite3.connect(":memory:", check_same_thread=False)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            summary TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    main.conn = conn
-    yield
-    conn.close()
+def use_temp_db(tmp_path):
+    # the store opens one connection per thread, so it needs a real file
+    store = ReportStore(str(tmp_path / "reports.db"))
+    main.store = store
+    yield store
+    store.close()
 
 @pytest.fixture
 def client():
@@ -0,0 +1,79 @@
+# tests/test_hierarchical.py
+import json
+import threading
+from hierarchical import emitted_digests, summarize_hierarchy
+from pipeline_blip_ollama import build_digest_prompt, finalize_report, merge_summaries, DIGEST_CHILD_CHARS
+import pipeline_blip_ollama as pipeline
+
+def segments(n, span=600.0):
+    return [{"start": i * span, "end": (i + 1) * span, "summary": f"s{i}", "confidence": 0.5, "evidence": []}
+            for i in range(n)]
+
+def test_levels_reduce_fixed_size_groups():
+    calls, lock = [], threading.Lock()
+
+    def reduce_group(children):
+        with lock:
+            calls.append(len(children))
+        return {"summary": "+".join(c["summary"] for c in children), "confidence": 0.9}
+
+    levels = summarize_hierarchy(segments(13), reduce_group, fanout=6, concurrency=4)
+    assert [len(level) for level in levels] == [13, 3, 1]
+    assert sorted(calls) == [3, 6, 6]               # the lone 13th segment is carried up without a call
+    hour = levels[1]
+    assert [(n["start"], n["end"], n["children"]) for n in hour] == [(0.0, 3600.0, 6), (3600.0, 7200.0, 6),
+                                                                      (7200.0, 7800.0, 0)]
+    assert hour[2]["summary"] == "s12" and hour[2]["carried"] and all(n["level"] == 1 for n in hour)
+    top = levels[-1][0]
+    assert (top["level"], top["start"], top["end"]) == (2, 0.0, 7800.0)
+    assert top["summary"].startswith("s0+s1") and top["summary"].endswith("+s12")
+    # the carried copy of s12 is not a digest: it would duplicate its segment at level 1
+    assert [(n["level"], n["children"]) for n in emitted_digests(levels)] == [(1, 6), (1, 6), (2, 3)]
+
+def test_single_segment_and_disabled_hierarchy_make_no_calls():
+    def reduce_group(children):
+        raise AssertionError("no digest expected")
+    assert len(summarize_hierarchy(segments(1), reduce_group)) == 1
+    assert len(summarize_hierarchy(segments(20), reduce_group, fanout=0)) == 1
+    assert summarize_hierarchy([], reduce_group) == [[]]
+
+def test_digest_prompt_is_bounded():
+    children = [{"start": 0.0, "end": 10.0, "summary": "x" * 10_000}] * 6
+    assert len(build_digest_prompt(children)) < 6 * (DIGEST_CHILD_CHARS + 40) + 1000
+
+def test_continuous_activity_is_cut_into_segments():
+    windows = [{"start": float(t), "end": t + 20.0, "summary": f"w{t}", "evidence": []} for t in range(0, 3600, 10)]
+    assert len(merge_summaries(windows, merge_gap=2.0)) == 1
+    cut = merge_summaries(windows, merge_gap=2.0, max_span=600.0)
+    assert len(cut) == 7 and all(s["end"] - s["start"] <= 600.0 for s in cut)
+    assert cut[0]["end"] == 600.0 and cut[-1]["end"] == 3610.0
+
+class EchoBackend:
+    name = "echo"
+
+    def generate(self, prompt):
+        return '<JSON_START>{"summary": "digest", "confidence": 0.6}<JSON_END>'
+
+def test_report_has_digest_levels(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "DEFAULT_OUTPUT_DIR", tmp_path)
+    windows = [{"start": float(t), "end": t + 20.0, "summary": f"w{t}", "confidence": 0.5,
+                "evidence": [{"ts": float(t), "caption": f"c{t}"}]} for t in range(0, 3600, 10)]
+    out = finalize_report("cam.mp4", windows, merge_gap=2.0, ollama_model="m", backend=EchoBackend(),
+                          segment_span=300.0, hierarchy_fanout=4)
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert len(report["summaries"]) == 13
+    assert [d["level"] for d in report["digests"]] == [1, 1, 1, 2]   # the 13th segment is carried, not a digest
+    top = report["digests"][-1]
+    assert (top["summary"], top["start"], top["end"], top["evidence"]) == ("digest", 0.0, 3610.0, [])
+
+def test_report_leaves_out_carried_nodes(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "DEFAULT_OUTPUT_DIR", tmp_path)
+    windows = [{"start": float(t), "end": t + 20.0, "summary": f"w{t}", "confidence": 0.5, "evidence": []}
+               for t in range(0, 1500, 10)]
+    out = finalize_report("cam.mp4", windows, merge_gap=2.0, ollama_model="m", backend=EchoBackend(),
+                          segment_span=300.0, hierarchy_fanout=2)
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert len(report["summaries"]) == 6
+    # 6 segments -> 3 digests -> 1 digest + 1 carried -> 1 top digest
+    assert [(d["level"], d["children"]) for d in report["digests"]] == [(1, 2), (1, 2), (1, 2), (2, 2), (3, 2)]
+    assert all(d["summary"] == "digest" and "carried" not in d for d in report["digests"])
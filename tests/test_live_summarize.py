@@ -0,0 +1,53 @@
+# tests/test_live_summarize.py
+import sys
+from pathlib import Path
+import live_summarize
+from ollama_stub_server import start_stub_server
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+from mocks import MockBlip  # noqa: E402
+
+VIDEO = ROOT / "data" / "raw" / "EJFBM.mp4"
+
+def run(tmp_path, monkeypatch, latency=0.0, **kw):
+    captures, pushed = [], []
+
+    class RecordingCapture(live_summarize.LiveCapture):
+        def __init__(self, *a, **k):
+            super().__init__(*a, **k)
+            captures.append(self)
+
+    def push(url, report):
+        pushed.append((report["summaries"][0], captures[0].is_alive()))
+
+    monkeypatch.setattr(live_summarize, "LiveCapture", RecordingCapture)
+    monkeypatch.setattr(live_summarize, "push_report", push)
+    blip = MockBlip(per_call_s=0.0, per_image_s=0.0)
+    server, url = start_stub_server(latency=latency)
+    try:
+        stats = live_summarize.run_live(str(VIDEO), realtime=True, window_size=4.0, stride=2.0,
+                                        llm_backend="http", ollama_url=url, ollama_model="stub",
+                                        push_url="http://reports.test", get_blip=lambda: blip,
+                                        llm_cache_path=tmp_path / "llm.sqlite", **kw)
+    finally:
+        server.shutdown()
+    return stats, pushed
+
+def test_live_replay_publishes_segments_in_order_as_they_close(tmp_path, monkeypatch):
+    stats, pushed = run(tmp_path, monkeypatch, speed=20.0, max_segment=6.0)
+    segments = [seg for seg, _ in pushed]
+    assert len(segments) == stats["segments"] == stats["segments_pushed"] >= 3
+    assert [s["start"] for s in segments] == sorted(s["start"] for s in segments)
+    assert all(a["end"] <= b["end"] for a, b in zip(segments, segments[1:]))
+    assert all(s["summary"] for s in segments)
+    assert pushed[0][1]                       # first segment went out while the file was still playing
+    assert stats["frames_dropped"] == 0
+
+def test_live_backpressure_drops_frames_and_bounds_pending(tmp_path, monkeypatch):
+    stats, pushed = run(tmp_path, monkeypatch, latency=0.2, speed=20.0, ring_size=2,
+                        llm_concurrency=1, max_pending=1, refine=False, llm_cache_ttl=None)
+    assert stats["frames_dropped"] > 0
+    assert stats["frames_sampled"] > stats["frames_dropped"]
+    assert stats["pending_peak"] <= 1
+    assert pushed
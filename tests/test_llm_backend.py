@@ -0,0 +1,43 @@
+# tests/test_llm_backend.py
+import threading
+import time
+import pytest
+from llm_backend import OllamaHTTPBackend, make_backend, map_concurrent
+from ollama_stub_server import start_stub_server
+
+@pytest.fixture
+def stub():
+    server, url = start_stub_server(latency=0.05)
+    yield server, url
+    server.shutdown()
+
+def test_http_generate_against_stub(stub):
+    server, url = stub
+    backend = OllamaHTTPBackend("stub", base_url=url)
+    raw = backend.generate("captions:\n- [1.0s] a red truck at the gate")
+    assert "<JSON_START>" in raw and "a red truck at the gate" in raw
+    assert make_backend("auto", "stub", base_url=url).name == "http"
+
+def test_retries_after_server_error(stub):
+    server, url = stub
+    server.fail_next = 1
+    backend = OllamaHTTPBackend("stub", base_url=url, retries=1, backoff=0.0)
+    assert "<JSON_START>" in backend.generate("- [0.0s] empty lot")
+    assert server.calls == 2
+
+def test_map_concurrent_bounds_and_keeps_order():
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+    def work(x):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return x * 2
+    assert map_concurrent(work, range(12), max_workers=3) == [x * 2 for x in range(12)]
+    assert peak[0] <= 3
+
+def test_auto_falls_back_to_cli_when_unreachable():
+    assert make_backend("auto", "stub", base_url="http://127.0.0.1:9", timeout=1).name == "cli"
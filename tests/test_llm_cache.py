@@ -0,0 +1,129 @@
+# tests/test_llm_cache.py
+import sqlite3
+import threading
+import time
+from llm_cache import LLMCache
+from pipeline_blip_ollama import build_window_prompt, summarize_windows
+
+def test_hit_after_miss_and_key_parts(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite")
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return f"answer {len(calls)}"
+
+    assert cache.generate("m", "window/1", "a  parking\nlot", generate) == "answer 1"
+    assert cache.generate("m", "window/1", "a parking lot ", generate) == "answer 1"   # whitespace-normalized
+    assert cache.generate("m", "window/2", "a parking lot", generate) == "answer 2"    # template version
+    assert cache.generate("other", "window/1", "a parking lot", generate) == "answer 3"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 3)
+    assert LLMCache(tmp_path / "llm.sqlite").generate("m", "window/1", "a parking lot", generate) == "answer 1"
+
+def test_timestamps_only_ignored_for_window_prompts():
+    a = build_window_prompt([{"ts": 10.0, "caption": "a parking lot with cars parked"}])
+    b = build_window_prompt([{"ts": 370.0, "caption": "a parking lot with cars parked"}])
+    assert LLMCache.key_for("m", "window/1", a, strip_timestamps=True) == \
+        LLMCache.key_for("m", "window/1", b, strip_timestamps=True)
+    assert LLMCache.key_for("m", "window/1", a) != LLMCache.key_for("m", "window/1", b)
+
+def test_ttl_lru_and_empty_answers(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite", ttl=0.05, max_entries=2)
+    assert cache.generate("m", "t", "p0", lambda p: "") == ""
+    assert cache.stats()["entries"] == 0          # a failed call is never cached
+    for i in range(3):
+        cache.generate("m", "t", f"p{i}", lambda p: "ok " + p)
+    assert cache.stats()["entries"] == 2 and cache.evictions == 1
+    time.sleep(0.1)
+    assert cache.generate("m", "t", "p2", lambda p: "fresh") == "fresh"
+    assert cache.expired == 1
+
+def test_concurrent_identical_prompts_share_one_call(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite")
+    calls, started = [], threading.Event()
+    release = threading.Event()
+
+    def slow(prompt):
+        calls.append(prompt)
+        started.set()
+        release.wait(5)
+        return "shared"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.generate("m", "t", "same", slow)))
+               for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    while cache.coalesced < 3:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == ["shared"] * 4 and len(calls) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hit_rate"]) == (1, 3, 0.75)
+
+class CountingBackend:
+    name = "counting"
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        return '<JSON_START>{"summary": "cars parked", "confidence": 0.8}<JSON_END>'
+
+def test_static_camera_windows_hit_the_cache(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite")
+    backend = CountingBackend()
+    windows = [{"start": t, "end": t + 20.0} for t in range(0, 200, 10)]
+    captioned = [[{"ts": t + k * 9.5, "caption": "a parking lot with cars parked"} for k in range(3)]
+                 for t in range(0, 200, 10)]
+    results = summarize_windows(windows, captioned, "m", backend, llm_concurrency=1, llm_cache=cache)
+    assert len(backend.prompts) == 1 and all(r["summary"] == "cars parked" for r in results)
+    assert results[5]["evidence"][0]["ts"] == 50.0      # evidence is still the window's own
+    assert cache.stats(since={"hits": 0, "misses": 1})["hit_rate"] == 1.0
+
+def test_failed_cache_write_still_releases_waiters(tmp_path, monkeypatch):
+    cache = LLMCache(tmp_path / "llm.sqlite")
+
+    def locked(key, response):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "_put", locked)
+    assert cache.generate("m", "t", "p", lambda p: "first") == "first"
+    assert cache.write_errors == 1 and not cache._inflight
+
+    done = []
+    t = threading.Thread(target=lambda: done.append(cache.generate("m", "t", "p", lambda p: "second")))
+    t.start()
+    t.join(3)
+    assert done == ["second"]
+
+def test_failed_generation_is_not_cached(tmp_path, monkeypatch):
+    import subprocess
+    import llm_backend
+    from llm_backend import OllamaCLIBackend
+    from pipeline_blip_ollama import call_ollama_summarize
+
+    def failing(cmd, **kw):
+        raise subprocess.CalledProcessError(1, cmd, output="Error: pull model manifest: file does not exist")
+
+    monkeypatch.setattr(llm_backend.subprocess, "check_output", failing)
+    cache = LLMCache(tmp_path / "llm.sqlite")
+    frames = [{"ts": 0.0, "caption": "a parking lot"}]
+    result = call_ollama_summarize("m", frames, backend=OllamaCLIBackend("m"), cache=cache)
+    assert result["confidence"] == 0.0 and "Error" not in result["summary"]
+    assert cache.stats()["entries"] == 0
+
+    class Truncated:
+        def generate(self, prompt):
+            return '<JSON_START>{"summary": "a car arri'
+    call_ollama_summarize("m", frames, backend=Truncated(), cache=cache)
+    assert cache.stats()["entries"] == 0 and cache.rejected == 1
+
+    call_ollama_summarize("m", frames, backend=CountingBackend(), cache=cache)
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,82 @@
+# tests/test_metrics.py
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+import src.app.main as main
+from src.app.metrics import Registry, _NULL_TIMER
+from src.app.store import ReportStore
+
+def test_counters_histograms_and_render():
+    reg = Registry(buckets=(0.1, 1.0))
+    reg.describe("stage_seconds", "Time per stage")
+    reg.inc("frames_total", stage="decode")
+    reg.inc("frames_total", 2, stage="decode")
+    reg.observe("stage_seconds", 0.05, stage="decode")
+    reg.observe("stage_seconds", 0.5, stage="decode")
+    reg.observe("stage_seconds", 5.0, stage="decode")
+    reg.gauge_fn("queue_depth", lambda: 7, queue="db_writer")
+    text = reg.render_prometheus()
+    assert 'surveil_frames_total{stage="decode"} 3' in text
+    assert "# HELP surveil_stage_seconds Time per stage" in text
+    assert "# TYPE surveil_stage_seconds histogram" in text
+    assert 'surveil_stage_seconds_bucket{stage="decode",le="0.1"} 1' in text
+    assert 'surveil_stage_seconds_bucket{stage="decode",le="1"} 2' in text
+    assert 'surveil_stage_seconds_bucket{stage="decode",le="+Inf"} 3' in text
+    assert 'surveil_stage_seconds_count{stage="decode"} 3' in text
+    assert 'surveil_queue_depth{queue="db_writer"} 7' in text
+
+def test_summary_since_snapshot():
+    reg = Registry(buckets=(0.1, 1.0))
+    reg.observe("stage_seconds", 0.5, stage="refine")
+    started = reg.snapshot()
+    with reg.timer("stage_seconds", stage="decode"):
+        pass
+    reg.observe("stage_seconds", 0.05, stage="refine")
+    reg.inc("llm_errors_total", backend="http")
+    summary = reg.summary(since=started)
+    decode = summary["stages"]['stage_seconds{stage="decode"}']
+    refine = summary["stages"]['stage_seconds{stage="refine"}']
+    assert decode["count"] == 1 and refine["count"] == 1
+    assert refine["total_s"] == 0.05 and refine["p50_s"] == 0.1
+    assert summary["counters"] == {'llm_errors_total{backend="http"}': 1.0}
+    assert reg.summary()["stages"]['stage_seconds{stage="refine"}']["count"] == 2
+
+def test_disabled_registry_records_nothing():
+    reg = Registry(enabled=False)
+    assert reg.timer("stage_seconds", stage="decode") is _NULL_TIMER
+
+    @reg.timed("stage_seconds", stage="merge")
+    def merge(x):
+        return x + 1
+
+    assert merge(1) == 2
+    reg.inc("frames_total")
+    reg.observe("stage_seconds", 1.0)
+    assert reg.render_prometheus().strip() == ""
+    assert reg.summary() == {"stages": {}, "counters": {}}
+
+def test_metrics_endpoint_labels_routes(tmp_path):
+    store, saved = ReportStore(str(tmp_path / "reports.db")), main.store
+    main.store = store
+    try:
+        client = TestClient(main.app)
+        assert client.post("/reports", json={"summary": "gate opened"}).status_code == 200
+        client.get("/reports/does-not-exist")
+        r = client.get("/metrics")
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+        assert 'surveil_http_requests_total{method="POST",route="/reports",status="200"}' in r.text
+        assert 'surveil_http_request_seconds_count{method="POST",route="/reports"}' in r.text
+        assert 'surveil_stage_seconds_count{stage="db_commit"}' in r.text
+        assert 'surveil_queue_depth{queue="db_writer"}' in r.text
+    finally:
+        main.store = saved
+        store.close()
+
+def test_scripts_share_the_registry_without_touching_sys_path():
+    root = Path(__file__).resolve().parents[1]
+    code = ("import sys, pipeline_blip_ollama, pipeline_metrics; from pathlib import Path; "
+            "print(str(Path.cwd().parent) in sys.path, pipeline_metrics.metrics is sys.modules['src.app.metrics'].REGISTRY)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(root / "scripts"), capture_output=True, text=True,
+                         check=True)
+    assert out.stdout.split() == ["False", "True"]
@@ -0,0 +1,67 @@
+# tests/test_query.py
+
+def seed(store):
+    for i in range(5):
+        store.add_report(f"free text {i}", ts=f"2025-01-01T00:00:0{i}+00:00")
+    segments = [{"start": 10.0 * i, "end": 10.0 * i + 10, "summary": f"segment {i}", "confidence": i / 4}
+                for i in range(5)]
+    store.add_video_report("cam-1.mp4", segments)
+
+def walk(client, **params):
+    items, cursor = [], None
+    while True:
+        q = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/reports", params=q).json()
+        items.extend(body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return items
+
+def test_keyset_pages_cover_everything_once(client, store):
+    seed(store)
+    items = walk(client, limit=3)
+    assert len(items) == 10 and len({i["id"] for i in items}) == 10
+    keys = [(i["ts"], i["id"]) for i in items]
+    assert keys == sorted(keys, reverse=True)
+
+def test_filters(client, store):
+    seed(store)
+    video = walk(client, video="cam-1.mp4", limit=2)
+    assert [i["summary"] for i in video] == [f"segment {i}" for i in reversed(range(5))]
+    confident = walk(client, min_confidence=0.5)
+    assert {i["summary"] for i in confident} == {"segment 2", "segment 3", "segment 4"}
+    window = walk(client, since="2025-01-01T00:00:01+00:00", until="2025-01-01T00:00:03+00:00")
+    assert [i["summary"] for i in window] == ["free text 2", "free text 1"]
+    for since, until in [("2025-01-01T00:00:01Z", "2025-01-01T00:00:03Z"),
+                         ("2025-01-01T01:00:01+01:00", "2024-12-31T19:00:03-05:00"),
+                         ("2025-01-01T00:00:01", "2025-01-01T00:00:03")]:
+        window = walk(client, since=since, until=until)
+        assert [i["summary"] for i in window] == ["free text 2", "free text 1"], (since, until)
+    assert client.get("/reports", params={"since": "yesterday"}).status_code == 400
+
+def test_bad_cursor_and_limit(client):
+    assert client.get("/reports", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/reports", params={"limit": 0}).status_code == 422
+
+def test_level_pages_use_a_level_index(store):
+    from src.app.store import SELECT_REPORT_PAGE
+    conn = store.connection()
+    for where, params, index in [("r.level = ?", (2,), "idx_reports_level_ts_id"),
+                                 ("r.video_id = ? AND r.level = ?", (1, 2), "idx_reports_video_level_ts_id")]:
+        plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + SELECT_REPORT_PAGE.format(where=where),
+                                                   (*params, 10)))
+        assert f"SEARCH r USING INDEX {index}" in plan and "TEMP B-TREE" not in plan
+
+def test_pages_walk_the_ts_index_without_sorting(store):
+    from src.app.store import SELECT_REPORT_PAGE
+    conn = store.connection()
+    cursor = "(r.ts, r.id) < (?, ?)"
+    for where, params, index in [("1", (), "idx_reports_ts_id"),
+                                 (f"1 AND {cursor}", ("2025", 9), "idx_reports_ts_id"),
+                                 (f"1 AND r.confidence >= ? AND {cursor}", (0.5, "2025", 9), "idx_reports_ts_id"),
+                                 (f"1 AND r.video_id = ? AND {cursor}", (1, "2025", 9), "idx_reports_video_ts_id")]:
+        plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + SELECT_REPORT_PAGE.format(where=where),
+                                                   (*params, 10)))
+        assert f"USING INDEX {index}" in plan and "TEMP B-TREE" not in plan, (where, plan)
+        if cursor in where:
+            assert "ts<?" in plan, (where, plan)   # the cursor bounds the range scan
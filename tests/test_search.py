@@ -0,0 +1,48 @@
+# tests/test_search.py
+import sqlite3
+from src.app.store import ReportStore
+
+def test_search_ranks_summaries_and_captions(client, store):
+    store.add_report("Two people at north gate")
+    store.add_video_report("cam-3.mp4", [
+        {"start": 0.0, "end": 20.0, "summary": "quiet parking lot",
+         "evidence": [{"ts": 4.0, "caption": "a red truck parked at the north gate"}]},
+        {"start": 40.0, "end": 60.0, "summary": "a red truck drives through the north gate", "evidence": []},
+    ])
+    body = client.get("/search", params={"q": "red trucks north gate"}).json()
+    summaries = [r["summary"] for r in body["results"]]
+    assert set(summaries) == {"quiet parking lot", "a red truck drives through the north gate"}
+    by_summary = {r["summary"]: r for r in body["results"]}
+    caption_hit = by_summary["quiet parking lot"]["highlights"][0]
+    assert caption_hit["field"] == "caption" and caption_hit["ts"] == 4.0
+    assert "<b>red</b>" in caption_hit["snippet"]
+    assert by_summary["quiet parking lot"]["video"] == "cam-3.mp4"
+
+def test_many_matching_captions_count_as_one_report(store):
+    store.add_video_report("cam-4.mp4", [
+        {"start": 0.0, "end": 20.0, "summary": "busy lane",
+         "evidence": [{"ts": float(i), "caption": "red truck"} for i in range(5)]},
+        {"start": 20.0, "end": 40.0, "summary": "loading dock",
+         "evidence": [{"ts": 25.0, "caption": "a red truck backs up slowly to the loading dock"}]},
+    ])
+    results = store.search("red truck", limit=2)
+    assert [r["summary"] for r in results] == ["busy lane", "loading dock"]
+    assert len(results[0]["highlights"]) == 1
+
+def test_search_input_is_not_fts_syntax(client, store):
+    store.add_report("door opened")
+    r = client.get("/search", params={"q": 'door" OR NEAR(('})
+    assert r.status_code == 200
+    assert [x["summary"] for x in r.json()["results"]] == []
+    assert client.get("/search", params={"q": "  "}).status_code == 422
+
+def test_existing_rows_are_indexed_on_upgrade(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE reports (id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL, summary TEXT NOT NULL)")
+    conn.execute("INSERT INTO reports (ts, summary) VALUES ('2025-01-01T00:00:00+00:00', 'forklift near dock')")
+    conn.commit()
+    conn.close()
+    s = ReportStore(path)
+    assert [r["summary"] for r in s.search("forklift")] == ["forklift near dock"]
+    s.close()
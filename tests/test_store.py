@@ -0,0 +1,50 @@
+# tests/test_store.py
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.app.store import ReportStore
+
+@pytest.fixture
+def store(tmp_path):
+    s = ReportStore(str(tmp_path / "reports.db"))
+    yield s
+    s.close()
+
+def test_wal_mode_and_ts_index(store):
+    conn = store.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {"idx_reports_ts_id", "idx_reports_video_ts_id"} <= names
+
+def test_concurrent_inserts_are_group_committed(store):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        rows = list(pool.map(lambda i: store.add_report(f"report {i}"), range(200)))
+    assert len({r["id"] for r in rows}) == 200
+    assert store.rows_written == 200
+    assert store.batches < 200
+    count = store.connection().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    assert count == 200
+    assert store.latest_report()["id"] == max(r["id"] for r in rows)
+
+def test_failed_write_does_not_fail_its_batch(store):
+    from concurrent.futures import Future
+    seen = []
+    store.add_listener(lambda rows: seen.extend(r["summary"] for r in rows))
+
+    def insert(summary, fail=False):
+        def write(conn):
+            conn.execute("INSERT INTO reports (ts, summary) VALUES ('2025-01-01', ?)", (summary,))
+            store._inserted.append({"summary": summary})
+            if fail:
+                raise ValueError("bad row")
+            return summary
+        return write, Future()
+
+    batch = [insert("first"), insert("broken", fail=True), insert("last")]
+    conn = store._open()
+    store._commit_batch(conn, batch)
+    conn.close()
+    assert [f.result() for _, f in (batch[0], batch[2])] == ["first", "last"]
+    with pytest.raises(ValueError):
+        batch[1][1].result()
+    summaries = [r[0] for r in store.connection().execute("SELECT summary FROM reports ORDER BY id")]
+    assert summaries == ["first", "last"] and seen == ["first", "last"]
@@ -0,0 +1,94 @@
+# tests/test_stream.py
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+import pytest
+import uvicorn
+import src.app.main as main
+from src.app.pubsub import Broker
+from src.app.store import ReportStore
+
+def test_broker_fanout_from_another_thread():
+    async def scenario():
+        broker = Broker(max_queue=2)
+        a, b = broker.subscribe(), broker.subscribe()
+        threading.Thread(target=broker.publish, args=([{"id": 1}, {"id": 2}],)).start()
+        assert [await a.get(timeout=5), await a.get(timeout=5)] == [{"id": 1}, {"id": 2}]
+        assert (await b.get(timeout=5))["id"] == 1
+        broker.publish([{"id": 3}, {"id": 4}])   # b still has {"id": 2} queued: over max_queue, cut off
+        await asyncio.sleep(0.05)
+        assert [(await a.get(timeout=5))["id"] for _ in range(2)] == [3, 4]
+        assert (await b.get(timeout=5))["id"] == 2
+        assert (await b.get(timeout=5)) is None
+        a.close()
+        b.close()
+        assert broker.subscribers == 0
+        assert broker.since(2) == ([{"id": 3}, {"id": 4}], True)
+        assert broker.since(-5)[1] is False
+    asyncio.run(scenario())
+
+@pytest.fixture
+def server(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.db"))
+    main.store, main.broker = store, Broker()
+    store.add_listener(lambda rows: main.publish_reports(main.broker, rows))
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    srv = uvicorn.Server(uvicorn.Config(main.app, log_level="warning"))
+    thread = threading.Thread(target=srv.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not srv.started:
+        time.sleep(0.01)
+    yield store, sock.getsockname()[1]
+    srv.should_exit = True
+    thread.join(timeout=5)
+    store.close()
+
+def read_events(port, n, headers=None, path="/reports/stream"):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    assert resp.status == 200 and resp.getheader("content-type").startswith("text/event-stream")
+    events, current = [], {}
+    while len(events) < n:
+        line = resp.fp.readline().decode("utf-8").rstrip("\n")
+        if not line:
+            if current:
+                events.append(current)
+            current = {}
+        elif not line.startswith(":"):
+            key, _, value = line.partition(": ")
+            current[key] = value
+    conn.close()
+    return events
+
+def wait_for_subscribers(n):
+    deadline = time.time() + 5
+    while main.broker.subscribers < n and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_stream_pushes_new_reports_and_resumes(server):
+    store, port = server
+    got = []
+    reader = threading.Thread(target=lambda: got.extend(read_events(port, 3)))
+    reader.start()
+    wait_for_subscribers(1)
+    first = store.add_report("gate opened")
+    store.add_video_report("cam-1.mp4", [{"start": 0.0, "end": 20.0, "summary": "car arrives", "confidence": 0.9},
+                                         {"start": 30.0, "end": 40.0, "summary": "car leaves"}])
+    reader.join(timeout=5)
+    assert [e["event"] for e in got] == ["report"] * 3
+    payloads = [json.loads(e["data"]) for e in got]
+    assert [p["summary"] for p in payloads] == ["gate opened", "car arrives", "car leaves"]
+    assert payloads[1]["video"] == "cam-1.mp4" and payloads[1]["confidence"] == 0.9
+    assert [int(e["id"]) for e in got] == [p["id"] for p in payloads]
+
+    # resume from history, then from the database once history is gone
+    resumed = read_events(port, 2, headers={"Last-Event-ID": str(first["id"])})
+    assert [json.loads(e["data"])["summary"] for e in resumed] == ["car arrives", "car leaves"]
+    main.broker = Broker()
+    resumed = read_events(port, 2, path=f"/reports/stream?last_id={first['id']}")
+    assert [json.loads(e["data"])["summary"] for e in resumed] == ["car arrives", "car leaves"]
@@ -0,0 +1,183 @@
+# tests/test_streaming.py
+import threading
+from streaming import FrameProducer, FrameRing, RollingWindows, SegmentMerger, pick_indices
+
+def naive_windows(ts_list, window, stride):
+    # same arithmetic as build_windows() in pipeline_blip_ollama.py
+    out, start = [], 0.0
+    while start <= ts_list[-1]:
+        out.append((start, start + window, [t for t in ts_list if start <= t < start + window]))
+        start += stride
+    return out
+
+def test_rolling_windows_match_batch_windows():
+    ts_list = [i * 0.7 for i in range(60)]
+    rw = RollingWindows(window_size=5.0, stride=2.0)
+    closed = []
+    for seq, ts in enumerate(ts_list):
+        closed.extend(rw.push({"seq": seq, "ts": ts}))
+    closed.extend(rw.flush())
+    got = [(w["start"], w["end"], [f["ts"] for f in w["frames"]]) for w in closed]
+    assert got == naive_windows(ts_list, 5.0, 2.0)
+
+def test_producer_preserves_order_with_small_queue():
+    frames = [(float(i), f"img{i}") for i in range(50)]
+    producer = FrameProducer(iter(frames), maxsize=2)
+    producer.start()
+    items = list(producer)
+    assert [(it["ts"], it["image"]) for it in items] == frames
+    assert [it["seq"] for it in items] == list(range(50))
+
+def test_pick_indices():
+    assert pick_indices(0, 3) == []
+    assert pick_indices(1, 3) == [0]
+    assert pick_indices(10, 3) == [0, 4, 9]
+
+def test_frame_ring_drop_policies():
+    oldest = FrameRing(capacity=3, policy="oldest")
+    newest = FrameRing(capacity=3, policy="newest")
+    for i in range(5):
+        oldest.put(i)
+        newest.put(i)
+    oldest.close()
+    newest.close()
+    assert list(oldest) == [2, 3, 4] and oldest.dropped == 2
+    assert list(newest) == [0, 1, 2] and newest.dropped == 2
+
+def test_frame_ring_wakes_consumer():
+    ring = FrameRing(capacity=4)
+    got = []
+    consumer = threading.Thread(target=lambda: got.extend(ring))
+    consumer.start()
+    ring.put("a")
+    ring.put("b")
+    ring.close()
+    consumer.join(timeout=5)
+    assert got == ["a", "b"]
+
+def windows(*spans):
+    return [{"start": s, "end": e, "summary": f"w{i}", "evidence": [{"ts": s}]} for i, (s, e) in enumerate(spans)]
+
+def test_segment_merger_closes_on_gap():
+    merger = SegmentMerger(merge_gap=2.0)
+    closed = []
+    for w in windows((0, 20), (10, 30), (31, 40), (50, 60)):
+        closed.append(merger.add(w))
+    assert closed[:3] == [[], [], []]
+    assert closed[3] == [{"start": 0, "end": 40, "summary": "w0 w1 w2", "evidence": [{"ts": 0}, {"ts": 10}, {"ts": 31}]}]
+    assert [(s["start"], s["end"]) for s in merger.flush()] == [(50, 60)]
+    assert merger.flush() == []
+
+def test_segment_merger_max_span():
+    merger = SegmentMerger(merge_gap=2.0, max_span=30.0)
+    out = []
+    for w in windows(*[(s, s + 20) for s in range(0, 100, 10)]):
+        out.extend(merger.add(w))
+    out.extend(merger.flush())
+    assert [(s["start"], s["end"]) for s in out] == [(0, 30), (20, 50), (40, 70), (60, 90), (80, 110)]
+
+def reference_merge(windows, merge_gap, max_span=None):
+    # the batch merge_summaries() that SegmentMerger replaced, plus the max_span cut
+    windows = sorted(windows, key=lambda w: w["start"])
+    merged, cur = [], None
+    for w in windows:
+        if cur is not None and (w["start"] <= cur["end"] or w["start"] - cur["end"] <= merge_gap) and \
+                (max_span is None or cur["end"] - cur["start"] < max_span):
+            cur["end"] = max(cur["end"], w["end"])
+            cur["summaries"].append(w.get("summary", ""))
+            cur["evidence"].extend(w.get("evidence", []))
+            continue
+        if cur is not None:
+            merged.append({"start": cur["start"], "end": cur["end"],
+                           "summary": " ".join(t for t in cur["summaries"] if t), "evidence": cur["evidence"]})
+        cur = {"start": w["start"], "end": w["end"], "summaries": [w.get("summary", "")],
+               "evidence": list(w.get("evidence", []))}
+    if cur is not None:
+        merged.append({"start": cur["start"], "end": cur["end"],
+                       "summary": " ".join(t for t in cur["summaries"] if t), "evidence": cur["evidence"]})
+    return merged
+
+def test_incremental_merge_matches_batch_merge_on_random_windows():
+    import copy
+    import random
+    from pipeline_blip_ollama import merge_summaries
+    rng = random.Random(7)
+    for trial in range(300):
+        n = rng.randint(0, 25)
+        ws = []
+        for i in range(n):
+            start = round(rng.uniform(0, 300), 1)
+            ws.append({"start": start, "end": start + rng.choice([5.0, 10.0, 20.0, 40.0]),
+                       "summary": rng.choice(["", f"w{i}"]), "evidence": [{"ts": start}]})
+        merge_gap = rng.choice([0.0, 2.0, 15.0])
+        max_span = rng.choice([None, 30.0, 60.0, 600.0])
+        expected = reference_merge(copy.deepcopy(ws), merge_gap, max_span)
+        assert merge_summaries(copy.deepcopy(ws), merge_gap, max_span=max_span) == expected, trial
+
+        # fed one window at a time: segments are final when add() returns them
+        merger, out, snapshots = SegmentMerger(merge_gap, max_span=max_span), [], []
+        for w in sorted(copy.deepcopy(ws), key=lambda w: w["start"]):
+            closed = merger.add(w)
+            out.extend(closed)
+            snapshots.extend(copy.deepcopy(closed))
+        out.extend(merger.flush())
+        assert out == expected and out[:len(snapshots)] == snapshots, trial
+
+class FakeBlip:
+    def caption_images(self, images):
+        return ["a frame"] * len(images)
+
+class EchoBackend:
+    name = "echo"
+
+    def generate(self, prompt):
+        return '<JSON_START>{"summary": "quiet", "confidence": 0.5}<JSON_END>'
+
+    def close(self):
+        pass
+
+def test_streaming_pipeline_releases_closed_window_images(tmp_path, monkeypatch):
+    import weakref
+    import numpy as np
+    import pipeline_blip_ollama as pipeline
+
+    refs = []
+
+    def frames(video_path, sample_fps=1.0):
+        for i in range(60):
+            image = np.zeros((8, 8, 3), dtype=np.uint8)
+            refs.append(weakref.ref(image))
+            yield float(i), image
+
+    alive_at_finalize = []
+
+    def finalize(video, results, **kw):
+        alive_at_finalize.append(sum(r() is not None for r in refs))
+        return tmp_path / "report.json"
+
+    monkeypatch.setattr(pipeline, "iter_frames", frames)
+    monkeypatch.setattr(pipeline, "blip_loader", lambda *a: (FakeBlip, False, "fake-blip"))
+    monkeypatch.setattr(pipeline, "make_backend", lambda *a, **kw: EchoBackend())
+    monkeypatch.setattr(pipeline, "finalize_report", finalize)
+    pipeline.run_streaming_pipeline(tmp_path / "cam.mp4", window_size=20.0, stride=10.0, llm_cache_path=None)
+    assert len(refs) == 60
+    assert alive_at_finalize[0] <= 20     # at most the last window's frames, not the whole video
+
+def test_streaming_pipeline_adaptive_frames_follow_motion(tmp_path, monkeypatch):
+    import numpy as np
+    import pipeline_blip_ollama as pipeline
+
+    def frames(video_path, sample_fps=1.0):
+        for i in range(20):
+            yield float(i), np.full((32, 32, 3), 255 if i == 5 else 0, dtype=np.uint8)
+
+    reports = []
+    monkeypatch.setattr(pipeline, "iter_frames", frames)
+    monkeypatch.setattr(pipeline, "blip_loader", lambda *a: (FakeBlip, False, "fake-blip"))
+    monkeypatch.setattr(pipeline, "make_backend", lambda *a, **kw: EchoBackend())
+    monkeypatch.setattr(pipeline, "finalize_report", lambda video, results, **kw: reports.append(results))
+    for adaptive in (False, True):
+        pipeline.run_streaming_pipeline(tmp_path / "cam.mp4", window_size=20.0, stride=20.0, frames_per_window=3,
+                                        llm_cache_path=None, adaptive_frames=adaptive)
+    evenly, active = ([e["ts"] for e in r[0]["evidence"]] for r in reports)
+    assert len(evenly) == 3 and active == [5.0, 6.0]   # the frame that lights up and the one after it
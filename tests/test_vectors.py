@@ -0,0 +1,163 @@
+# tests/test_vectors.py
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import src.app.main as main
+from src.app.store import ReportStore
+from src.app.vectors import VectorIndex, EmbeddingIndexer, HashingEmbedder, normalize
+
+def clustered(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return normalize(centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim)))
+
+def fill(index, vecs, first_id=1):
+    index.reset("test", vecs.shape[1])
+    index.add([(first_id + i, 0) for i in range(len(vecs))], vecs, last_report_id=first_id + len(vecs) - 1)
+
+def test_exact_search_and_reopen(tmp_path):
+    vecs = clustered(500)
+    index = VectorIndex(str(tmp_path / "v"))
+    fill(index, vecs)
+    hits = index.search(vecs[41], k=5)
+    assert hits[0]["report_id"] == 42 and hits[0]["score"] == pytest.approx(1.0, abs=1e-2)
+    assert [h["report_id"] for h in index.search(vecs[41], k=5, exclude_report=42)][0] != 42
+    reopened = VectorIndex(str(tmp_path / "v"))
+    assert reopened.count == 500 and reopened.last_report_id == 500
+    assert reopened.search(vecs[41], k=1)[0]["report_id"] == 42
+    assert np.allclose(reopened.vector_for_report(42), vecs[41], atol=1e-2)
+
+def test_ivf_matches_exact_search(tmp_path):
+    vecs = clustered(3000)
+    index = VectorIndex(str(tmp_path / "v"), train_min=1000, nprobe=8)
+    fill(index, vecs[:2000])
+    assert index.stats()["lists"] > 0
+    index.add([(2001 + i, 0) for i in range(1000)], vecs[2000:])   # assigned to existing clusters
+    recall = []
+    for q in clustered(20, seed=1):
+        exact = {h["report_id"] for h in index.search(q, k=10, exact=True)}
+        approx = {h["report_id"] for h in index.search(q, k=10)}
+        recall.append(len(exact & approx) / 10)
+    assert np.mean(recall) >= 0.9
+
+def test_one_hit_per_report(tmp_path):
+    index = VectorIndex(str(tmp_path / "v"))
+    vecs = clustered(3)
+    index.reset("test", vecs.shape[1])
+    index.add([(1, 0), (1, 7), (2, 0)], np.stack([vecs[0], vecs[0], vecs[1]]))
+    assert [h["report_id"] for h in index.search(vecs[0], k=5)] == [1, 2]
+
+@pytest.fixture
+def client(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.db"))
+    indexer = EmbeddingIndexer(store, VectorIndex(str(tmp_path / "vectors")), HashingEmbedder, batch_size=2)
+    main.store, main.indexer = store, indexer
+    yield TestClient(main.app)
+    store.close()
+
+def test_similar_by_text_and_by_id(client):
+    store, indexer = main.store, main.indexer
+    store.add_report("a red truck parked at the north gate")
+    store.add_report("two people walking a dog in the parking lot")
+    store.add_video_report("cam-1.mp4", [
+        {"start": 0.0, "end": 20.0, "summary": "quiet scene",
+         "evidence": [{"ts": 3.0, "caption": "a dog walking in the parking lot"}]},
+    ])
+    assert indexer.sync() == 4
+    assert indexer.sync() == 0   # incremental: nothing new
+
+    body = client.get("/similar", params={"q": "red truck at the gate"}).json()
+    assert body["results"][0]["summary"] == "a red truck parked at the north gate"
+
+    body = client.get("/similar", params={"id": 2, "limit": 1}).json()
+    top = body["results"][0]
+    assert top["summary"] == "quiet scene"
+    assert top["match"] == {"field": "caption", "ts": 3.0, "caption": "a dog walking in the parking lot"}
+
+    store.add_report("a red truck leaving the north gate")
+    indexer.sync()
+    ids = [r["id"] for r in client.get("/similar", params={"id": 1}).json()["results"]]
+    assert ids[0] == 4
+
+    assert client.get("/similar").status_code == 422
+    assert client.get("/similar", params={"id": 999}).status_code == 404
+
+def test_auto_embedder_falls_back_when_no_worker_answers(monkeypatch, tmp_path):
+    import src.app.vectors as vectors
+    monkeypatch.setenv("EMBED_WORKER_KEYFILE", str(tmp_path / "missing.key"))
+    monkeypatch.delenv("EMBED_WORKER_AUTHKEY", raising=False)
+    with pytest.warns(UserWarning):
+        embedder = vectors.make_embedder("auto", worker="127.0.0.1:1")
+    assert isinstance(embedder, HashingEmbedder) and embedder.fallback
+    with pytest.raises(OSError):
+        vectors.make_embedder("worker", worker="127.0.0.1:1")
+
+class FakeModel(HashingEmbedder):
+    semantic = True
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.name = "fake-minilm"
+
+@pytest.fixture
+def embed_worker(monkeypatch, tmp_path):
+    import threading
+    from src.app.embed_worker import EmbedServer
+    monkeypatch.delenv("EMBED_WORKER_AUTHKEY", raising=False)
+    monkeypatch.setenv("EMBED_WORKER_KEYFILE", str(tmp_path / "embed.key"))
+    server = EmbedServer(FakeModel(), address="127.0.0.1:0")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, "{}:{}".format(*server.address)
+    server.close()
+    thread.join(timeout=5)
+
+def test_similar_embeds_through_the_worker(client, embed_worker):
+    server, address = embed_worker
+    import src.app.vectors as vectors
+    main.indexer.embedder_factory = lambda: vectors.make_embedder("auto", worker=address)
+    main.store.add_report("a red truck parked at the north gate")
+    main.store.add_report("two people walking a dog in the parking lot")
+    assert main.indexer.sync() == 2 and server.served == 2
+    body = client.get("/similar", params={"q": "red truck"}).json()
+    assert body["embedder"] == {"name": "fake-minilm", "dim": 64, "semantic": True, "fallback": False}
+    assert body["results"][0]["summary"] == "a red truck parked at the north gate"
+    assert main.indexer.index.stats()["model"] == "fake-minilm"
+
+def test_embed_worker_shares_the_worker_protocol(embed_worker):
+    from src.app.embed_worker import EmbedClient, EmbedServer
+    server, address = embed_worker
+    client = EmbedClient(address)
+    with pytest.raises(RuntimeError, match=r"^embed worker .*unknown op"):
+        client._call({"op": "nope"})
+    assert client.embed(["a red truck"]).shape == (1, 64)   # connection still usable
+    client.close()
+    with pytest.raises(ValueError, match="non-loopback"):
+        EmbedServer(FakeModel(), address="0.0.0.0:0")
+
+def test_indexer_swaps_fallback_for_worker_once_it_answers(client, embed_worker, monkeypatch):
+    server, address = embed_worker
+    import src.app.vectors as vectors
+    target = ["127.0.0.1:1"]
+    main.indexer.embedder_factory = lambda: vectors.make_embedder("auto", worker=target[0])
+    main.indexer.retry_s = 0.0
+    main.store.add_report("a red truck parked at the north gate")
+    with pytest.warns(UserWarning):
+        assert main.indexer.sync() == 1
+    body = client.get("/similar", params={"q": "red truck"}).json()
+    assert body["embedder"]["semantic"] is False and body["embedder"]["fallback"] is True
+    target[0] = address
+    assert main.indexer.sync() == 1                  # re-embedded with the worker's model
+    assert client.get("/similar", params={"q": "red truck"}).json()["embedder"]["name"] == "fake-minilm"
+
+def test_indexer_is_not_started_at_import():
+    assert main.EMBEDDER == "auto" and main.indexer._thread is None
+
+def test_api_import_does_not_load_torch():
+    import subprocess
+    import sys
+    from pathlib import Path
+    code = "import sys, src.app.main; print('torch' in sys.modules or 'sentence_transformers' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(Path(__file__).resolve().parents[1]),
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
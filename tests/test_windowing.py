@@ -0,0 +1,39 @@
+# tests/test_windowing.py
+import random
+from pathlib import Path
+import numpy as np
+from frame_index import FrameIndex
+from windowing import iter_window_ranges, iter_windows
+from mock_captioner import simple_aggregate_captions
+
+def naive(ts, window, stride):
+    out, start = [], 0.0
+    while start <= ts[-1]:
+        out.append((start, start + window, [t for t in ts if start <= t < start + window]))
+        start += stride
+    return out
+
+def test_ranges_match_naive_scan_with_gaps():
+    rng = random.Random(7)
+    ts = sorted(rng.uniform(0, 300) for _ in range(400)) + [900.0, 901.5]
+    for window, stride in [(20.0, 10.0), (5.0, 7.5), (30.0, 30.0)]:
+        got = [(s, e, ts[lo:hi]) for s, e, lo, hi in iter_window_ranges(ts, window, stride)]
+        assert got == naive(ts, window, stride)
+
+def test_numpy_ranges_match_list_ranges():
+    rng = random.Random(11)
+    for _ in range(50):
+        ts = sorted(rng.uniform(0, 200) for _ in range(rng.randint(0, 300)))
+        window, stride = rng.uniform(0.5, 30.0), rng.uniform(0.3, 15.0)
+        assert list(iter_window_ranges(np.array(ts), window, stride)) == list(iter_window_ranges(ts, window, stride))
+
+def test_iter_windows_is_lazy_and_empty_safe():
+    assert list(iter_windows([], 20.0, 10.0)) == []
+    gen = iter_windows([{"ts": float(i)} for i in range(100)], 20.0, 10.0)
+    assert next(gen) == {"start": 0.0, "end": 20.0, "lo": 0, "hi": 20}
+
+def test_mock_aggregate_skips_empty_windows():
+    index = FrameIndex(Path("."), "cam.mp4", np.array([0.0, 1.0, 45.0]), np.full(3, -1))
+    caps = simple_aggregate_captions(index, window=20.0)
+    assert [(c["start"], c["end"]) for c in caps] == [(0.0, 20.0), (40.0, 60.0)]
+    assert caps[0]["summary"].startswith("2 sampled frames")